@@ -83,6 +83,75 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Le cache versionné des statistiques (django_exo_1/cache.py) doit être partagé
+# entre les workers en production : utiliser un backend commun (FileBasedCache,
+# memcached, redis...). LocMemCache ne convient qu'à un processus unique :
+# les invalidations d'un worker n'atteignent pas les autres, seule l'expiration
+# (FACTURES_CACHE_TIMEOUT) borne alors la durée des données périmées.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'django-exo-1',
+    }
+}
+
+# Alias du cache utilisé pour les statistiques
+FACTURES_CACHE_ALIAS = 'default'
+
+# Durée de vie (secondes) des statistiques en cache et de l'index
+# d'autocomplétion des clients, filet de sécurité pour les caches non partagés
+FACTURES_CACHE_TIMEOUT = 300
+
+# Au-delà de ce nombre de lignes, les listes paginées affichent une estimation
+# (liste non filtrée) ou "plus de N" au lieu d'un COUNT(*) exact ; None = toujours exact
+FACTURES_COMPTE_EXACT_MAX = None
+
+# Moteur de recherche des factures : 'auto' (plein texte FTS5 sous SQLite,
+# tsvector sous PostgreSQL) ou 'like' (filtres icontains, sans index)
+FACTURES_RECHERCHE = 'auto'
+
+# Synchronisation incrémentale (api/changements/) : délai en secondes avant
+# qu'une entrée du journal des changements soit renvoyée, le temps que les
+# transactions ayant écrit dans le journal avant elle soient validées (doit
+# dépasser la durée des transactions d'écriture entre journal et commit)
+FACTURES_SYNC_DELAI = 5
+
+# Rétention du journal des changements, en jours : la commande
+# purger_changements compacte les entrées plus anciennes (un client de
+# synchronisation dont le curseur est plus ancien doit tout resynchroniser)
+FACTURES_SYNC_RETENTION = 90
+
+# Import JSON des factures (factures/import/) : nombre maximum d'éléments par requête
+FACTURES_IMPORT_MAX = 10000
+
+# Import JSON des factures : taille maximale du corps de requête, en octets
+# (vérifiée avant l'analyse du JSON, à la place de DATA_UPLOAD_MAX_MEMORY_SIZE)
+FACTURES_IMPORT_TAILLE_MAX = 20 * 1024 * 1024
+
+# Actions de lot sur les factures : largeur des tranches d'identifiants
+# traitées par transaction (UPDATE/DELETE ensemblistes)
+FACTURES_ACTIONS_TRANCHE = 1000
+
+# Au-delà de ce nombre de factures, l'action de lot est confiée au worker
+# (commande traiter_taches) au lieu d'être traitée dans la requête web
+FACTURES_ACTIONS_SEUIL_TACHE = 5000
+
+# Calcul parallèle des sections du dashboard et de l'accueil sous ASGI
+# (séquentiel sous WSGI) et taille du pool de threads associé
+FACTURES_SECTIONS_CONCURRENTES = True
+FACTURES_SECTIONS_MAX_THREADS = 4
+
+# Nombre de lignes affichées par section du dashboard
+FACTURES_DASHBOARD_LIMITES = {
+    'en_retard': 5,
+    'echeance_proche': 5,
+    'top_clients': 5,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -21,6 +21,7 @@ Version: 1.0
 
 from django.contrib import admin
 from .models import Client, CategorieFacture, Facture, LogCreationFacture, LogCreationFacture
+from .models import StatistiqueJournaliere, TacheLot
 
 
 @admin.register(Client)
@@ -61,7 +62,7 @@ class ClientAdmin(admin.ModelAdmin):
         - Saisir les informations de manière organisée
     """
     # Configuration d'affichage - Définit les colonnes visibles dans la vue liste
-    list_display = ('nom', 'type_client', 'email', 'ville', 'est_actif', 'date_creation')
+    list_display = ('nom', 'type_client', 'email', 'ville', 'est_actif', 'nb_factures', 'ca_paye', 'encours', 'derniere_facture', 'date_creation')
     
     # Configuration de filtrage - Ajoute des filtres dans la barre latérale
     list_filter = ('type_client', 'est_actif', 'pays', 'date_creation')
@@ -73,7 +74,7 @@ class ClientAdmin(admin.ModelAdmin):
     ordering = ('nom',)
     
     # Configuration des champs en lecture seule - Protège les champs automatiques
-    readonly_fields = ('date_creation', 'date_modification')
+    readonly_fields = ('date_creation', 'date_modification', 'nb_factures', 'ca_paye', 'encours', 'derniere_facture')
     
     # Organisation du formulaire en sections logiques
     fieldsets = (
@@ -94,6 +95,11 @@ class ClientAdmin(admin.ModelAdmin):
             'fields': ('notes',),
             'description': 'Notes libres sur le client'
         }),
+        ('Compteurs', {
+            'fields': ('nb_factures', 'ca_paye', 'encours', 'derniere_facture'),
+            'classes': ('collapse',),  # Section repliable
+            'description': 'Compteurs de factures maintenus automatiquement'
+        }),
         ('Métadonnées', {
             'fields': ('date_creation', 'date_modification'),
             'classes': ('collapse',),  # Section repliable
@@ -232,6 +238,13 @@ class FactureAdmin(admin.ModelAdmin):
             'description': 'Informations de suivi automatique'
         }),
     )
+    
+    def get_queryset(self, request):
+        """Liste : profil pour_liste (relations jointes, colonnes affichées seulement)."""
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.pour_liste()
+        return queryset
 
 
 @admin.register(LogCreationFacture)
@@ -346,3 +359,44 @@ class LogCreationFactureAdmin(admin.ModelAdmin):
             'description': 'Données soumises lors de la création'
         }),
     )
+
+
+@admin.register(StatistiqueJournaliere)
+class StatistiqueJournaliereAdmin(admin.ModelAdmin):
+    """Configuration de l'interface d'administration pour les statistiques journalières.
+    
+    Consultation en lecture seule des agrégats maintenus automatiquement
+    à partir des factures (voir signals.py et la commande
+    reconstruire_statistiques).
+    """
+    list_display = ('jour', 'categorie', 'statut', 'nb_factures', 'total_ht', 'total_tva', 'total_ttc')
+    list_filter = ('statut', 'categorie', 'jour')
+    ordering = ('-jour', 'categorie', 'statut')
+    
+    def has_add_permission(self, request):
+        """Les agrégats sont calculés, jamais saisis."""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Les agrégats sont calculés, jamais modifiés manuellement."""
+        return False
+
+
+@admin.register(TacheLot)
+class TacheLotAdmin(admin.ModelAdmin):
+    """Configuration de l'interface d'administration pour les tâches de lot.
+    
+    Consultation en lecture seule des actions de lot confiées au worker
+    (voir taches.py et la commande traiter_taches).
+    """
+    list_display = ('id', 'action', 'statut', 'nb_factures', 'nb_tranches', 'date_creation', 'date_fin')
+    list_filter = ('statut', 'action')
+    ordering = ('-date_creation',)
+    
+    def has_add_permission(self, request):
+        """Les tâches sont créées par les actions de lot."""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Les tâches ne sont jamais modifiées manuellement."""
+        return False
@@ -0,0 +1,446 @@
+"""
+API JSON en lecture seule : factures, clients et catégories.
+
+Chaque liste est paginée par curseur sur la clé primaire (paramètre apres,
+lien `suivant` de la réponse) : une synchronisation parcourt toute la table
+page après page à coût constant, sans OFFSET ni COUNT(*).
+
+Les lignes sont lues en tuples (values_list) et converties directement en
+dicts, sans instancier de modèle. Les objets liés demandés avec ?embed= sont
+lus dans la même requête (jointure) : pas de requête par ligne.
+
+La synchronisation incrémentale (api/changements/) renvoie les factures et
+clients modifiés ainsi que les suppressions depuis un curseur opaque (une
+position dans le journal des changements, dans l'ordre des commits).
+
+Paramètres communs des listes:
+    fields: Champs à renvoyer, séparés par des virgules (défaut : tous)
+    embed: Objets liés à inclure (factures : client, categorie)
+    limite: Nombre de lignes par page (100 par défaut, 1000 au plus)
+    apres: Jeton de pagination (fourni par le lien suivant)
+
+Format de réponse:
+    {"resultats": [{...}, ...], "suivant": "?apres=...&..." ou null}
+"""
+
+import json
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from . import pagination
+from .models import CategorieFacture, Changement, Client, Facture
+
+# Taille de page par défaut et maximale
+LIMITE = 100
+LIMITE_MAX = 1000
+
+
+class ParametreInvalide(ValueError):
+    """Paramètre GET invalide (réponse 400)."""
+
+
+class RessourceAPI:
+    """
+    Description d'une ressource de l'API.
+
+    Attributs:
+        modele: Modèle lu
+        champs: {nom exposé: chemin ORM}, dans l'ordre de sortie
+        embarques: {nom: {nom exposé: chemin ORM}} des objets liés
+    """
+    modele = None
+    champs = {}
+    embarques = {}
+
+    def queryset(self):
+        return self.modele._default_manager.all()
+
+    def filtrer(self, queryset, parametres):
+        """Applique les filtres propres à la ressource (aucun par défaut)."""
+        return queryset
+
+    def _selection(self, parametres, nom, disponibles):
+        """Liste de noms demandée par un paramètre (tous si absent)."""
+        valeur = parametres.get(nom)
+        if not valeur:
+            return None
+        noms = list(dict.fromkeys(n.strip() for n in valeur.split(',') if n.strip()))
+        inconnus = [n for n in noms if n not in disponibles]
+        if inconnus or not noms:
+            raise ParametreInvalide(f"{nom} : valeurs inconnues {', '.join(inconnus)}")
+        return noms
+
+    def lister(self, request):
+        """
+        Construit la réponse JSON d'une page de la ressource.
+
+        Raises:
+            ParametreInvalide: Si un paramètre est invalide
+        """
+        parametres = request.GET
+        champs = self._selection(parametres, 'fields', self.champs) or list(self.champs)
+        embarques = self._selection(parametres, 'embed', self.embarques) or []
+        try:
+            limite = int(parametres.get('limite', LIMITE))
+        except ValueError:
+            raise ParametreInvalide("limite : entier attendu")
+        limite = max(1, min(limite, LIMITE_MAX))
+
+        # Colonnes lues et plan de reconstruction des dicts (nom, position ou sous-plan)
+        colonnes = [self.champs[champ] for champ in champs]
+        plan = [(champ, i) for i, champ in enumerate(champs)]
+        for nom in embarques:
+            sous_plan = []
+            for champ, chemin in self.embarques[nom].items():
+                sous_plan.append((champ, len(colonnes)))
+                colonnes.append(chemin)
+            plan.append((nom, sous_plan))
+
+        queryset = self.filtrer(self.queryset(), parametres)
+        try:
+            lignes, suivant = pagination.paginer_valeurs(request, queryset, colonnes, limite)
+        except pagination.CurseurInvalide:
+            raise ParametreInvalide("apres : curseur invalide")
+
+        resultats = []
+        for ligne in lignes:
+            objet = {}
+            for nom, position in plan:
+                if isinstance(position, list):
+                    # Objet lié absent (clé étrangère nulle) : null
+                    lie = {champ: ligne[i] for champ, i in position}
+                    objet[nom] = lie if lie.get('id') is not None else None
+                else:
+                    objet[nom] = ligne[position]
+            resultats.append(objet)
+        return JsonResponse({'resultats': resultats, 'suivant': suivant}, encoder=DjangoJSONEncoder)
+
+
+def _entier(parametres, nom):
+    valeur = parametres.get(nom)
+    if not valeur:
+        return None
+    try:
+        return int(valeur)
+    except ValueError:
+        raise ParametreInvalide(f"{nom} : entier attendu")
+
+
+def _decimal(parametres, nom):
+    valeur = parametres.get(nom)
+    if not valeur:
+        return None
+    try:
+        nombre = Decimal(valeur)
+    except InvalidOperation:
+        raise ParametreInvalide(f"{nom} : nombre attendu")
+    if not nombre.is_finite():
+        # NaN, Infinity : acceptés par Decimal, pas par la base
+        raise ParametreInvalide(f"{nom} : nombre attendu")
+    return nombre
+
+
+def _date(parametres, nom):
+    from django.utils.dateparse import parse_date
+    valeur = parametres.get(nom)
+    if not valeur:
+        return None
+    try:
+        jour = parse_date(valeur)
+    except ValueError:
+        jour = None
+    if jour is None:
+        raise ParametreInvalide(f"{nom} : date AAAA-MM-JJ attendue")
+    return jour
+
+
+class FacturesAPI(RessourceAPI):
+    """
+    Factures.
+
+    Filtres (méthodes de FactureQuerySet):
+        statut, du / au (période d'émission), montant_min / montant_max
+        (TTC), client, categorie
+    """
+    modele = Facture
+    champs = {
+        'id': 'id',
+        'numero': 'numero',
+        'date_emission': 'date_emission',
+        'date_echeance': 'date_echeance',
+        'statut': 'statut',
+        'montant_ht': 'montant_ht',
+        'taux_tva': 'taux_tva',
+        'montant_ttc': 'montant_ttc',
+        'description': 'description',
+        'client_id': 'client_id',
+        'categorie_id': 'categorie_id',
+        'date_creation': 'date_creation',
+        'date_modification': 'date_modification',
+    }
+    embarques = {
+        'client': {'id': 'client__id', 'nom': 'client__nom', 'email': 'client__email', 'ville': 'client__ville'},
+        'categorie': {'id': 'categorie__id', 'nom': 'categorie__nom', 'couleur': 'categorie__couleur'},
+    }
+
+    def filtrer(self, queryset, parametres):
+        statut = parametres.get('statut')
+        if statut:
+            if statut not in dict(Facture.STATUT_CHOICES):
+                raise ParametreInvalide(f"statut : valeur inconnue {statut}")
+            queryset = queryset.filter(statut=statut)
+        du, au = _date(parametres, 'du'), _date(parametres, 'au')
+        if du or au:
+            queryset = queryset.par_periode(du, au)
+        montant_min = _decimal(parametres, 'montant_min')
+        if montant_min is not None:
+            queryset = queryset.avec_montant_min(montant_min)
+        montant_max = _decimal(parametres, 'montant_max')
+        if montant_max is not None:
+            queryset = queryset.avec_montant_max(montant_max)
+        client = _entier(parametres, 'client')
+        if client is not None:
+            queryset = queryset.par_client(client)
+        categorie = _entier(parametres, 'categorie')
+        if categorie is not None:
+            queryset = queryset.par_categorie(categorie)
+        return queryset
+
+
+class ClientsAPI(RessourceAPI):
+    """
+    Clients.
+
+    Filtres: est_actif (true / false), type_client
+    """
+    modele = Client
+    champs = {
+        'id': 'id',
+        'nom': 'nom',
+        'type_client': 'type_client',
+        'email': 'email',
+        'telephone': 'telephone',
+        'adresse': 'adresse',
+        'code_postal': 'code_postal',
+        'ville': 'ville',
+        'pays': 'pays',
+        'siret': 'siret',
+        'numero_tva': 'numero_tva',
+        'est_actif': 'est_actif',
+        'nb_factures': 'nb_factures',
+        'ca_paye': 'ca_paye',
+        'encours': 'encours',
+        'derniere_facture': 'derniere_facture',
+        'date_creation': 'date_creation',
+        'date_modification': 'date_modification',
+    }
+
+    def filtrer(self, queryset, parametres):
+        est_actif = parametres.get('est_actif')
+        if est_actif:
+            if est_actif not in ('true', 'false'):
+                raise ParametreInvalide("est_actif : true ou false attendu")
+            queryset = queryset.filter(est_actif=est_actif == 'true')
+        type_client = parametres.get('type_client')
+        if type_client:
+            queryset = queryset.filter(type_client=type_client)
+        return queryset
+
+
+class CategoriesAPI(RessourceAPI):
+    """Catégories de factures."""
+    modele = CategorieFacture
+    champs = {
+        'id': 'id',
+        'nom': 'nom',
+        'description': 'description',
+        'couleur': 'couleur',
+        'date_creation': 'date_creation',
+    }
+
+
+# ==========================================
+# SYNCHRONISATION INCRÉMENTALE
+# ==========================================
+
+# Flux de la synchronisation : (nom, modèle journalisé, modèle, colonnes exposées)
+FLUX_CHANGEMENTS = (
+    ('factures', 'facture', Facture, FacturesAPI.champs),
+    ('clients', 'client', Client, ClientsAPI.champs),
+)
+
+
+def _encoder_position(position):
+    """Jeton opaque de la position (identifiant du journal) atteinte."""
+    return urlsafe_base64_encode(json.dumps({'journal': position}).encode())
+
+
+def _decoder_position(jeton):
+    """
+    Décode un jeton de synchronisation.
+
+    Raises:
+        ParametreInvalide: Si le jeton est illisible
+    """
+    try:
+        position = json.loads(urlsafe_base64_decode(jeton))['journal']
+        if not isinstance(position, int) or position < 0:
+            raise ValueError(position)
+        return position
+    except Exception:
+        raise ParametreInvalide("curseur : jeton de synchronisation invalide")
+
+
+def _position_depuis(parametres):
+    """
+    Position du journal correspondant au paramètre depuis : dernière
+    entrée journalisée avant cette date-heure.
+
+    Raises:
+        ParametreInvalide: Si la date-heure est invalide
+    """
+    try:
+        depuis = parse_datetime(parametres['depuis'])
+    except ValueError:
+        # Format reconnu mais date impossible (30 février...)
+        depuis = None
+    if depuis is None:
+        raise ParametreInvalide("depuis : date-heure ISO attendue")
+    if timezone.is_naive(depuis):
+        depuis = timezone.make_aware(depuis)
+    return (
+        Changement.objects.filter(date__lt=depuis).order_by('-pk')
+        .values_list('pk', flat=True).first()
+    ) or 0
+
+
+def changements(request):
+    """
+    Construit une page de la synchronisation incrémentale.
+
+    Le curseur est une position dans le journal des changements
+    (Changement), écrit dans la transaction de chaque écriture : une
+    transaction longue (import, recalcul des TTC, tranche d'une tâche de
+    lot) apparaît à la position de son journal, quelle que soit la
+    date_modification écrite par ses lignes. Les factures et clients
+    journalisés sont relus dans leur état courant ; ceux qui n'existent
+    plus sont des suppressions.
+
+    Une transaction peut valider son journal après une transaction plus
+    récente (identifiants plus grands, déjà visibles). Le curseur ne
+    dépasse donc pas les entrées journalisées moins de FACTURES_SYNC_DELAI
+    secondes avant la requête : elles sont renvoyées à l'appel suivant,
+    une fois les transactions plus anciennes validées. Sous SQLite, les
+    écritures sont sérialisées et les identifiants suivent l'ordre des
+    commits.
+
+    Raises:
+        ParametreInvalide: Si un paramètre est invalide
+    """
+    parametres = request.GET
+    try:
+        limite = int(parametres.get('limite', LIMITE))
+    except ValueError:
+        raise ParametreInvalide("limite : entier attendu")
+    limite = max(1, min(limite, LIMITE_MAX))
+
+    position = 0
+    if parametres.get('curseur'):
+        position = _decoder_position(parametres['curseur'])
+    elif parametres.get('depuis'):
+        position = _position_depuis(parametres)
+
+    entrees = list(
+        Changement.objects.filter(pk__gt=position).order_by('pk')
+        .values_list('pk', 'modele', 'objet_id', 'date')[:limite + 1]
+    )
+    termine = len(entrees) <= limite
+    entrees = entrees[:limite]
+    borne = timezone.now() - timedelta(seconds=getattr(settings, 'FACTURES_SYNC_DELAI', 5))
+    for i, (_, _, _, date) in enumerate(entrees):
+        if date > borne:
+            entrees, termine = entrees[:i], True
+            break
+    if entrees:
+        position = entrees[-1][0]
+
+    # Dernière écriture de chaque objet, dans l'ordre du journal
+    ecritures = {}
+    for _, modele, objet_id, date in entrees:
+        ecritures.pop((modele, objet_id), None)
+        ecritures[(modele, objet_id)] = date
+
+    reponse = {}
+    suppressions = []
+    for flux, nom_modele, modele, champs in FLUX_CHANGEMENTS:
+        ids = [objet_id for nom, objet_id in ecritures if nom == nom_modele]
+        lignes = {
+            ligne[0]: ligne[1:]
+            for ligne in modele._default_manager.filter(pk__in=ids).values_list('pk', *champs.values())
+        }
+        noms = list(champs)
+        reponse[flux] = [dict(zip(noms, lignes[pk])) for pk in ids if pk in lignes]
+        suppressions += [
+            {'modele': nom_modele, 'id': pk, 'date': ecritures[(nom_modele, pk)]}
+            for pk in ids if pk not in lignes
+        ]
+
+    reponse['suppressions'] = suppressions
+    reponse['curseur'] = _encoder_position(position)
+    reponse['termine'] = termine
+    return JsonResponse(reponse, encoder=DjangoJSONEncoder)
+
+
+def _repondre(ressource, request):
+    """Page d'une ressource, erreurs de paramètres en JSON 400."""
+    try:
+        return ressource.lister(request)
+    except ParametreInvalide as exc:
+        return JsonResponse({'erreur': str(exc)}, status=400)
+
+
+def api_factures(request):
+    """Liste paginée des factures (voir FacturesAPI)."""
+    return _repondre(FacturesAPI(), request)
+
+
+def api_clients(request):
+    """Liste paginée des clients (voir ClientsAPI)."""
+    return _repondre(ClientsAPI(), request)
+
+
+def api_categories(request):
+    """Liste paginée des catégories (voir CategoriesAPI)."""
+    return _repondre(CategoriesAPI(), request)
+
+
+def api_changements(request):
+    """
+    Synchronisation incrémentale : factures et clients créés ou modifiés,
+    et suppressions, depuis un curseur.
+    
+    Paramètres GET:
+        curseur: Jeton renvoyé par l'appel précédent (prioritaire)
+        depuis: Date-heure ISO de départ (première synchronisation
+                incrémentale) ; sans curseur ni depuis, tout est renvoyé
+        limite: Nombre maximum de lignes par flux et par appel
+        
+    Format de réponse:
+        {"factures": [...], "clients": [...],
+         "suppressions": [{"modele", "id", "date"}, ...],
+         "curseur": "...", "termine": true}
+        
+    Tant que termine vaut false, rappeler avec le curseur renvoyé ; une fois
+    termine, conserver le curseur pour la synchronisation suivante.
+    """
+    try:
+        return changements(request)
+    except ParametreInvalide as exc:
+        return JsonResponse({'erreur': str(exc)}, status=400)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DjangoExo1Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'django_exo_1'
+    
+    def ready(self):
+        # Connexion des récepteurs de maintenance des données dérivées
+        from . import signals  # noqa: F401
@@ -0,0 +1,271 @@
+"""
+Autocomplétion des clients à partir d'un index en mémoire.
+
+Les formulaires et filtres ne chargent plus la liste complète des clients :
+le champ client interroge la vue clients/autocompletion/ au fil de la saisie,
+servie par un index construit une fois par processus :
+
+- trigrammes (3 caractères consécutifs) du nom, de l'email et de la ville,
+  pour les saisies d'au moins 3 caractères, y compris au milieu d'un mot ;
+- liste triée des mots, pour les saisies plus courtes (recherche par préfixe
+  par dichotomie).
+
+Les textes sont normalisés (minuscules, sans accents) à l'indexation comme à
+la recherche. Tous les mots saisis doivent correspondre.
+
+L'index est mis à jour ligne à ligne après chaque écriture d'un client
+(voir signals.py). Un numéro de génération partagé dans le cache permet aux
+autres processus de constater qu'ils n'ont pas vu une écriture : leur index
+est alors reconstruit (une requête) à la recherche suivante. Ce numéro
+n'est partagé qu'avec un backend de cache commun : l'index est donc aussi
+reconstruit quand il a plus de FACTURES_CACHE_TIMEOUT secondes.
+"""
+
+import bisect
+import threading
+import time
+import unicodedata
+
+from django.db import transaction
+
+from . import cache
+
+CLE_GENERATION = f'{cache.PREFIXE}:autocompletion:generation'
+
+# Champs indexés, dans l'ordre des tuples des entrées
+CHAMPS = ('nom', 'email', 'ville', 'est_actif')
+
+# Nombre de résultats par défaut et maximum
+LIMITE = 10
+LIMITE_MAX = 50
+
+
+def normaliser(texte):
+    """Met un texte en minuscules et retire les accents."""
+    decompose = unicodedata.normalize('NFKD', texte or '')
+    return ''.join(c for c in decompose if not unicodedata.combining(c)).lower()
+
+
+def _decouper(texte):
+    """Mots normalisés d'un texte (séparés par tout caractère non alphanumérique)."""
+    return ''.join(c if c.isalnum() else ' ' for c in normaliser(texte)).split()
+
+
+def trigrammes(mot):
+    """Ensemble des trigrammes d'un mot normalisé."""
+    return {mot[i:i + 3] for i in range(len(mot) - 2)}
+
+
+def generation():
+    """Numéro de génération partagé, incrémenté à chaque écriture de client."""
+    return cache._cache().get(CLE_GENERATION, 0)
+
+
+class IndexClients:
+    """
+    Index en mémoire des clients d'une base.
+
+    Attributs:
+        entrees: {id: (nom, email, ville, est_actif)}
+        generation: Génération partagée au moment de la dernière mise à jour
+        construit_le: Instant (time.monotonic) de la dernière construction
+    """
+
+    def __init__(self, using='default'):
+        self.using = using
+        self.verrou = threading.RLock()
+        self.entrees = None
+        self.generation = None
+        self.construit_le = None
+
+    def _vider(self):
+        self.entrees = {}
+        self._mots_client = {}
+        self._trigrammes = {}
+        self._mots = []
+
+    def construire(self):
+        """Charge tous les clients en une requête."""
+        from .models import Client
+        with self.verrou:
+            generation_courante = generation()
+            self._vider()
+            for ligne in Client.objects.using(self.using).order_by().values_list('pk', *CHAMPS):
+                self._ajouter(ligne[0], ligne[1:])
+            self.generation = generation_courante
+            self.construit_le = time.monotonic()
+
+    def _ajouter(self, pk, entree):
+        self.entrees[pk] = entree
+        mots = set()
+        for texte in entree[:3]:
+            mots.update(_decouper(texte))
+        self._mots_client[pk] = mots
+        for mot in mots:
+            bisect.insort(self._mots, (mot, pk))
+            for trigramme in trigrammes(mot):
+                self._trigrammes.setdefault(trigramme, set()).add(pk)
+
+    def _retirer(self, pk):
+        if self.entrees.pop(pk, None) is None:
+            return
+        for mot in self._mots_client.pop(pk):
+            position = bisect.bisect_left(self._mots, (mot, pk))
+            del self._mots[position]
+            for trigramme in trigrammes(mot):
+                ids = self._trigrammes[trigramme]
+                ids.discard(pk)
+                if not ids:
+                    del self._trigrammes[trigramme]
+
+    def appliquer(self, pk, entree, generation_precedente, generation_nouvelle):
+        """
+        Applique l'écriture d'un client (entree None pour une suppression).
+
+        Si l'index n'était pas à jour de la génération précédente, une autre
+        écriture lui a échappé : il est abandonné et sera reconstruit.
+        """
+        with self.verrou:
+            if self.entrees is None:
+                return
+            if self.generation != generation_precedente:
+                self.entrees = None
+                return
+            self._retirer(pk)
+            if entree is not None:
+                self._ajouter(pk, entree)
+            self.generation = generation_nouvelle
+
+    def _expire(self):
+        """Indique si l'index a dépassé sa durée de vie (FACTURES_CACHE_TIMEOUT)."""
+        timeout = cache.duree()
+        return timeout is not None and time.monotonic() - self.construit_le >= timeout
+
+    def invalider(self):
+        """Abandonne l'index (reconstruit à la recherche suivante)."""
+        with self.verrou:
+            self.entrees = None
+
+    def _candidats(self, mot):
+        """Identifiants des clients dont un mot contient (ou commence par) `mot`."""
+        if len(mot) >= 3:
+            ensembles = sorted(
+                (self._trigrammes.get(t, set()) for t in trigrammes(mot)), key=len
+            )
+            candidats = set(ensembles[0])
+            for ensemble in ensembles[1:]:
+                candidats &= ensemble
+            # Les trigrammes peuvent venir de mots différents : vérification
+            return {
+                pk for pk in candidats
+                if any(mot in mot_client for mot_client in self._mots_client[pk])
+            }
+        debut = bisect.bisect_left(self._mots, (mot,))
+        candidats = set()
+        for mot_client, pk in self._mots[debut:]:
+            if not mot_client.startswith(mot):
+                break
+            candidats.add(pk)
+        return candidats
+
+    def rechercher(self, terme, limite=LIMITE, actifs_seulement=True):
+        """
+        Retourne les clients correspondant à la saisie, les plus pertinents d'abord.
+
+        Le nom qui commence par la saisie passe avant un mot du nom qui
+        commence par elle, puis avant toute autre correspondance (email,
+        ville, milieu de mot). À pertinence égale, tri par nom.
+
+        Returns:
+            list: dicts id, nom, email, ville
+        """
+        mots = _decouper(terme)
+        if not mots:
+            return []
+        with self.verrou:
+            if self.entrees is None or self.generation != generation() or self._expire():
+                self.construire()
+            ids = None
+            for mot in mots:
+                candidats = self._candidats(mot)
+                ids = candidats if ids is None else ids & candidats
+                if not ids:
+                    return []
+            saisie = ' '.join(mots)
+            resultats = []
+            for pk in ids:
+                nom, email, ville, est_actif = self.entrees[pk]
+                if actifs_seulement and not est_actif:
+                    continue
+                nom_normalise = ' '.join(_decouper(nom))
+                if nom_normalise.startswith(saisie):
+                    rang = 0
+                elif all(any(m.startswith(mot) for m in _decouper(nom)) for mot in mots):
+                    rang = 1
+                else:
+                    rang = 2
+                resultats.append((rang, nom_normalise, pk, nom, email, ville))
+        resultats.sort()
+        return [
+            {'id': pk, 'nom': nom, 'email': email, 'ville': ville}
+            for _, _, pk, nom, email, ville in resultats[:limite]
+        ]
+
+
+_index = {}
+_verrou_index = threading.Lock()
+
+
+def index(using='default'):
+    """Retourne l'index du processus pour une base (créé au premier appel)."""
+    with _verrou_index:
+        if using not in _index:
+            _index[using] = IndexClients(using)
+        return _index[using]
+
+
+def rechercher(terme, limite=LIMITE, actifs_seulement=True, using='default'):
+    """Raccourci : recherche dans l'index de la base donnée."""
+    return index(using).rechercher(terme, limite, actifs_seulement)
+
+
+def _nouvelle_generation():
+    """Incrémente la génération partagée et retourne (précédente, nouvelle)."""
+    nouvelle = cache._incrementer(CLE_GENERATION)
+    return nouvelle - 1, nouvelle
+
+
+def client_modifie(client, using='default'):
+    """Met à jour l'index après le commit de l'écriture d'un client."""
+    pk = client.pk
+    entree = tuple(getattr(client, champ) for champ in CHAMPS)
+
+    def appliquer():
+        precedente, nouvelle = _nouvelle_generation()
+        index(using).appliquer(pk, entree, precedente, nouvelle)
+
+    transaction.on_commit(appliquer, using=using)
+
+
+def client_supprime(pk, using='default'):
+    """Retire un client de l'index après le commit de sa suppression."""
+    def appliquer():
+        precedente, nouvelle = _nouvelle_generation()
+        index(using).appliquer(pk, None, precedente, nouvelle)
+
+    transaction.on_commit(appliquer, using=using)
+
+
+def clients_modifies_en_masse(using='default'):
+    """Invalide les index de tous les processus après un QuerySet.update()."""
+    def invalider():
+        _nouvelle_generation()
+        index(using).invalider()
+
+    transaction.on_commit(invalider, using=using)
+
+
+def reinitialiser():
+    """Abandonne les index du processus (tests)."""
+    with _verrou_index:
+        _index.clear()
@@ -0,0 +1,173 @@
+"""
+Cache versionné des statistiques de l'application.
+
+Les valeurs calculées (statistiques, top clients, CA par catégorie...) sont
+stockées dans le cache Django sous une clé qui contient un numéro de version
+global. Toute écriture sur les factures, clients ou catégories incrémente ce
+numéro (voir signals.py) : les anciennes entrées ne sont plus jamais lues.
+
+Le numéro de version et les compteurs de succès/échecs sont eux-mêmes stockés
+dans le cache : avec un backend partagé (fichiers, memcached, redis...), tous
+les processus workers voient la même version. Avec LocMemCache, chaque
+processus a sa propre version et n'est pas invalidé par les écritures des
+autres : les valeurs expirent donc après FACTURES_CACHE_TIMEOUT secondes,
+ce qui borne la durée pendant laquelle une donnée périmée peut être servie.
+
+Les périodes closes des séries temporelles utilisent une version distincte
+par granularité, incrémentée uniquement quand une écriture touche une facture
+émise avant la période en cours : l'historique reste en cache pendant que
+seule la période courante est recalculée.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+# Préfixe commun à toutes les clés de ce module
+PREFIXE = 'django_exo_1:stats'
+CLE_VERSION = f'{PREFIXE}:version'
+CLE_SUCCES = f'{PREFIXE}:succes'
+CLE_ECHECS = f'{PREFIXE}:echecs'
+CLE_HISTORIQUE = f'{PREFIXE}:historique'
+
+# Durée de vie par défaut des valeurs en cache (secondes)
+TIMEOUT = 300
+
+# Valeur sentinelle pour distinguer une entrée absente d'une valeur None en cache
+_ABSENT = object()
+
+
+def _cache():
+    """Retourne le cache utilisé (alias FACTURES_CACHE_ALIAS, 'default' par défaut)."""
+    return caches[getattr(settings, 'FACTURES_CACHE_ALIAS', 'default')]
+
+
+def duree():
+    """Retourne la durée de vie des valeurs en cache (FACTURES_CACHE_TIMEOUT)."""
+    return getattr(settings, 'FACTURES_CACHE_TIMEOUT', TIMEOUT)
+
+
+def _incrementer(cle):
+    """Incrémente un compteur du cache en le créant si nécessaire."""
+    cache = _cache()
+    cache.add(cle, 0, None)
+    try:
+        return cache.incr(cle)
+    except ValueError:
+        # Entrée évincée entre add() et incr()
+        cache.set(cle, 1, None)
+        return 1
+
+
+def version():
+    """Retourne le numéro de version courant des statistiques."""
+    cache = _cache()
+    valeur = cache.get(CLE_VERSION)
+    if valeur is None:
+        cache.add(CLE_VERSION, 1, None)
+        valeur = cache.get(CLE_VERSION, 1)
+    return valeur
+
+
+def invalider(using=None):
+    """
+    Invalide toutes les statistiques en cache en incrémentant la version.
+    
+    La version est incrémentée immédiatement puis à nouveau après le commit :
+    une lecture concurrente qui aurait mis en cache des données antérieures
+    au commit sous la nouvelle version est ainsi écartée elle aussi.
+    """
+    _incrementer(CLE_VERSION)
+    transaction.on_commit(lambda: _incrementer(CLE_VERSION), using=using)
+
+
+def version_historique(granularite):
+    """Retourne la version des périodes closes pour une granularité."""
+    cache = _cache()
+    cle = f'{CLE_HISTORIQUE}:{granularite}'
+    valeur = cache.get(cle)
+    if valeur is None:
+        cache.add(cle, 1, None)
+        valeur = cache.get(cle, 1)
+    return valeur
+
+
+def invalider_historique(jours=None, using=None):
+    """
+    Invalide les périodes closes touchées par une écriture.
+    
+    Args:
+        jours: Dates d'émission (anciennes et nouvelles) des factures modifiées,
+               ou None si elles sont inconnues (toutes les granularités sont
+               alors invalidées)
+        using: Alias de la base de données de l'écriture
+    """
+    from .models import GRANULARITES, debut_periode
+    aujourd_hui = timezone.now().date()
+    for granularite in GRANULARITES:
+        limite = debut_periode(aujourd_hui, granularite)
+        if jours is None or any(jour < limite for jour in jours):
+            cle = f'{CLE_HISTORIQUE}:{granularite}'
+            _incrementer(cle)
+            transaction.on_commit(lambda cle=cle: _incrementer(cle), using=using)
+
+
+def _lire_ou_calculer(cle, calcul):
+    """Lit une clé du cache ou la calcule, en tenant les compteurs à jour."""
+    cache = _cache()
+    valeur = cache.get(cle, _ABSENT)
+    if valeur is not _ABSENT:
+        _incrementer(CLE_SUCCES)
+        return valeur
+    _incrementer(CLE_ECHECS)
+    valeur = calcul()
+    cache.set(cle, valeur, duree())
+    return valeur
+
+
+def _suffixe(parametres):
+    """Construit la partie de clé qui distingue les variantes d'une valeur."""
+    return ':'.join(str(parametre) for parametre in parametres)
+
+
+def obtenir_historique(granularite, nom, calcul, *parametres):
+    """
+    Comme obtenir(), pour une valeur qui ne porte que sur des périodes closes.
+    
+    La valeur n'est invalidée que par les écritures touchant ces périodes
+    (voir invalider_historique), et non par toute écriture.
+    """
+    cle = f'{CLE_HISTORIQUE}:{granularite}:v{version_historique(granularite)}:{nom}:{_suffixe(parametres)}'
+    return _lire_ou_calculer(cle, calcul)
+
+
+def obtenir(nom, calcul, *parametres):
+    """
+    Retourne une valeur en cache ou la calcule et la met en cache.
+    
+    Args:
+        nom: Nom de la valeur (ex: 'statistiques')
+        calcul: Fonction sans argument qui calcule la valeur
+        *parametres: Paramètres distinguant plusieurs variantes de la valeur
+        
+    Returns:
+        La valeur en cache ou fraîchement calculée
+    """
+    cle = f'{PREFIXE}:v{version()}:{nom}:{_suffixe(parametres)}'
+    return _lire_ou_calculer(cle, calcul)
+
+
+def compteurs():
+    """
+    Retourne les compteurs d'utilisation du cache (tous processus confondus).
+    
+    Returns:
+        dict: version, succes, echecs
+    """
+    cache = _cache()
+    return {
+        'version': version(),
+        'succes': cache.get(CLE_SUCCES, 0),
+        'echecs': cache.get(CLE_ECHECS, 0),
+    }
@@ -1,5 +1,6 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 from datetime import date, timedelta
 from .models import Client, Facture, CategorieFacture
 
@@ -77,6 +78,54 @@ class ClientForm(forms.ModelForm):
         }
 
 
+class AutocompletionClientWidget(forms.Widget):
+    """
+    Champ de sélection d'un client par autocomplétion.
+    
+    Remplace la liste déroulante de tous les clients : un champ texte
+    interroge la vue client_autocompletion au fil de la saisie et un champ
+    caché porte l'identifiant du client choisi. Seul le nom du client
+    sélectionné est lu en base au rendu.
+    
+    Attributs:
+        actifs_seulement: Ne proposer que les clients actifs
+        vide: Texte d'aide du champ vide
+    """
+    template_name = 'django_exo_1/widgets/autocompletion_client.html'
+    url = reverse_lazy('django_exo_1:client_autocompletion')
+    
+    def __init__(self, attrs=None, actifs_seulement=False, vide="Rechercher un client..."):
+        super().__init__(attrs)
+        self.actifs_seulement = actifs_seulement
+        self.vide = vide
+    
+    def id_for_label(self, id_):
+        # Le libellé désigne le champ de saisie visible
+        return f'{id_}_saisie' if id_ else id_
+    
+    def value_omitted_from_data(self, data, files, name):
+        return name not in data
+    
+    def format_value(self, value):
+        if value in (None, ''):
+            return None
+        return str(value)
+    
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        libelle = ''
+        valeur = context['widget']['value']
+        if valeur and valeur.isdigit():
+            libelle = Client.objects.filter(pk=valeur).values_list('nom', flat=True).first() or ''
+        context['widget'].update({
+            'libelle': libelle,
+            'url': str(self.url),
+            'tous': '' if self.actifs_seulement else '1',
+            'vide': self.vide,
+        })
+        return context
+
+
 class FactureForm(forms.ModelForm):
     """
     Formulaire pour la création et modification de factures.
@@ -118,7 +167,7 @@ class FactureForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Ex: FACT-2024-001'
             }),
-            'client': forms.Select(attrs={
+            'client': AutocompletionClientWidget(attrs={
                 'class': 'form-control'
             }),
             'montant_ht': forms.NumberInput(attrs={
@@ -0,0 +1,210 @@
+"""
+Import en masse de factures (flux JSON d'un ERP).
+
+Un lot complet est validé en mémoire à partir de tables de correspondance
+chargées une fois par lot (numéros existants, clients, catégories), au lieu
+d'une validation de formulaire et de requêtes par facture. Les factures
+valides sont insérées par FactureQuerySet.bulk_create() dans une seule
+transaction : le TTC est calculé au passage et les données dérivées
+(agrégats, compteurs clients, cache, recherche) sont mises à jour une fois
+pour tout le lot via le signal factures_creees.
+
+Les règles sont celles de FactureForm : champs du modèle (longueurs,
+montants, statut), numéro unique, échéance postérieure à l'émission,
+catégorie « Autres » par défaut.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import CategorieFacture, Client, Facture
+
+# Taille des lots des requêtes IN (correspondances) et des INSERT
+TAILLE_LOT = 500
+
+# Champs lus tels quels dans chaque élément, validés par le champ du modèle
+CHAMPS_MODELE = (
+    'numero', 'date_emission', 'date_echeance', 'montant_ht', 'taux_tva',
+    'statut', 'description', 'notes',
+)
+
+# Catégorie attribuée aux factures sans catégorie (comme FactureForm.clean_categorie)
+CATEGORIE_DEFAUT = {
+    'nom': 'Autres',
+    'description': 'Catégorie par défaut pour les factures non classées',
+    'couleur': '#6c757d',
+}
+
+
+def _existants(queryset, champ, valeurs):
+    """Valeurs de `champ` présentes en base parmi `valeurs`, lues par lots."""
+    valeurs = list(valeurs)
+    trouves = set()
+    for i in range(0, len(valeurs), TAILLE_LOT):
+        trouves.update(
+            queryset.filter(**{f'{champ}__in': valeurs[i:i + TAILLE_LOT]})
+            .values_list(champ, flat=True)
+        )
+    return trouves
+
+
+def _messages(exc):
+    return ' '.join(exc.messages)
+
+
+def _scalaire(valeur):
+    """Vrai pour une valeur JSON simple (ni liste ni objet)."""
+    return valeur is None or isinstance(valeur, (str, int, float))
+
+
+class Correspondances:
+    """
+    Tables de correspondance d'un lot, chargées en quelques requêtes.
+
+    Attributs:
+        numeros: Numéros de facture déjà en base
+        clients: Identifiants des clients existants
+        categories: {identifiant ou nom: identifiant} des catégories
+    """
+
+    def __init__(self, elements):
+        numeros = {e.get('numero') for e in elements if isinstance(e.get('numero'), str)}
+        clients = set()
+        for element in elements:
+            try:
+                clients.add(int(element.get('client')))
+            except (TypeError, ValueError):
+                pass
+        self.numeros = _existants(Facture.objects.all(), 'numero', numeros)
+        self.clients = _existants(Client.objects.all(), 'pk', clients)
+        self.categories = {}
+        for pk, nom in CategorieFacture.objects.values_list('pk', 'nom'):
+            self.categories[pk] = pk
+            self.categories[nom] = pk
+        self._categorie_defaut = None
+
+    def categorie_defaut(self):
+        """Identifiant de la catégorie par défaut, créée au besoin (une fois par lot)."""
+        if self._categorie_defaut is None:
+            categorie, _ = CategorieFacture.objects.get_or_create(
+                nom=CATEGORIE_DEFAUT['nom'], defaults=CATEGORIE_DEFAUT
+            )
+            self._categorie_defaut = categorie.pk
+        return self._categorie_defaut
+
+
+def valider(element, correspondances, numeros_du_lot):
+    """
+    Valide un élément et construit la facture (non enregistrée).
+
+    Args:
+        element: dict reçu
+        correspondances: Correspondances du lot
+        numeros_du_lot: Numéros déjà rencontrés dans le lot (complété ici)
+
+    Returns:
+        tuple: (Facture ou None, dict des erreurs par champ)
+    """
+    if not isinstance(element, dict):
+        return None, {'__all__': "Objet JSON attendu."}
+
+    erreurs = {
+        nom: "Valeur simple attendue."
+        for nom in CHAMPS_MODELE + ('client', 'categorie')
+        if not _scalaire(element.get(nom))
+    }
+    valeurs = {}
+    for nom in CHAMPS_MODELE:
+        if nom in erreurs:
+            continue
+        champ = Facture._meta.get_field(nom)
+        brut = element.get(nom)
+        if brut is None and champ.has_default():
+            brut = champ.get_default()
+        try:
+            valeurs[nom] = champ.clean(brut, None)
+        except ValidationError as exc:
+            erreurs[nom] = _messages(exc)
+        except TypeError:
+            # Type JSON inattendu pour le champ (nombre pour une date...)
+            erreurs[nom] = "Valeur invalide."
+
+    numero = valeurs.get('numero')
+    if numero and (numero in correspondances.numeros or numero in numeros_du_lot):
+        erreurs['numero'] = "Une facture avec ce numéro existe déjà."
+    if numero:
+        numeros_du_lot.add(numero)
+
+    if valeurs.get('date_emission') and valeurs.get('date_echeance'):
+        if valeurs['date_echeance'] < valeurs['date_emission']:
+            erreurs['date_echeance'] = "La date d'échéance ne peut pas être antérieure à la date d'émission."
+
+    try:
+        client_id = int(element.get('client'))
+    except (TypeError, ValueError):
+        client_id = None
+    if client_id not in correspondances.clients:
+        erreurs.setdefault('client', "Client inconnu.")
+
+    categorie = element.get('categorie')
+    if 'categorie' in erreurs or categorie in (None, ''):
+        categorie_id = None
+    else:
+        categorie_id = correspondances.categories.get(categorie)
+        if categorie_id is None:
+            erreurs['categorie'] = "Catégorie inconnue."
+
+    if 'montant_ht' in valeurs and 'taux_tva' in valeurs:
+        # Le TTC calculé doit tenir dans sa colonne
+        ttc = Facture.calculer_montant_ttc(valeurs['montant_ht'], valeurs['taux_tva'])
+        try:
+            Facture._meta.get_field('montant_ttc').run_validators(round(ttc, 2))
+        except ValidationError as exc:
+            erreurs['montant_ht'] = f"Montant TTC hors limites : {_messages(exc)}"
+
+    if erreurs:
+        return None, erreurs
+    if categorie_id is None:
+        categorie_id = correspondances.categorie_defaut()
+    return Facture(client_id=client_id, categorie_id=categorie_id, **valeurs), {}
+
+
+def importer(elements, atomique=False, using='default'):
+    """
+    Valide et insère un lot de factures.
+
+    Args:
+        elements: Liste de dicts (numero, date_emission, date_echeance,
+                  client, montant_ht, taux_tva, categorie (id ou nom),
+                  statut, description, notes)
+        atomique: Si True, rien n'est inséré dès qu'un élément est invalide
+        using: Alias de la base de données
+
+    Returns:
+        dict: creees ([{index, id, numero}]) et erreurs
+        ([{index, numero, erreurs: {champ: message}}])
+    """
+    correspondances = Correspondances([e for e in elements if isinstance(e, dict)])
+    numeros_du_lot = set()
+    factures, positions, erreurs = [], [], []
+    for index, element in enumerate(elements):
+        facture, erreurs_element = valider(element, correspondances, numeros_du_lot)
+        if erreurs_element:
+            numero = element.get('numero') if isinstance(element, dict) else None
+            erreurs.append({'index': index, 'numero': numero, 'erreurs': erreurs_element})
+        else:
+            factures.append(facture)
+            positions.append(index)
+
+    if not factures or (atomique and erreurs):
+        return {'creees': [], 'erreurs': erreurs}
+
+    with transaction.atomic(using=using):
+        creees = Facture.objects.db_manager(using).bulk_create(factures, batch_size=TAILLE_LOT)
+    return {
+        'creees': [
+            {'index': index, 'id': facture.pk, 'numero': facture.numero}
+            for index, facture in zip(positions, creees)
+        ],
+        'erreurs': erreurs,
+    }
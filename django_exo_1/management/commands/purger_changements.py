@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django_exo_1.models import Changement
+
+# Rétention par défaut du journal, en jours (réglage FACTURES_SYNC_RETENTION)
+RETENTION = 90
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacte le journal des changements de la synchronisation incrémentale : '
+        'supprime les entrées plus anciennes que la rétention, sauf la dernière de chaque objet existant'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours',
+            type=int,
+            default=getattr(settings, 'FACTURES_SYNC_RETENTION', RETENTION),
+            help='Rétention en jours (réglage FACTURES_SYNC_RETENTION par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        if options['jours'] < 0:
+            self.stderr.write(self.style.ERROR('--jours doit être positif'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('Compactage du journal des changements...'))
+
+        total = Changement.objects.purger(timezone.now() - timedelta(days=options['jours']))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Compactage terminé: {total} entrées supprimées')
+        )
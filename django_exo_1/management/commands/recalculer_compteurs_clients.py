@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django_exo_1.models import Client
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs dénormalisés des clients (nb_factures, ca_paye, encours, derniere_facture)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=500,
+            help='Nombre de clients recalculés par lot (500 par défaut)',
+        )
+        parser.add_argument(
+            '--client',
+            type=int,
+            action='append',
+            dest='clients',
+            help='Identifiant d\'un client à recalculer (option répétable, tous par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        taille_lot = options['taille_lot']
+        if taille_lot < 1:
+            self.stderr.write(self.style.ERROR('--taille-lot doit être supérieur ou égal à 1'))
+            return
+        
+        self.stdout.write(self.style.SUCCESS('Recalcul des compteurs clients...'))
+        
+        total = Client.objects.recalculer_compteurs(
+            client_ids=options['clients'], taille_lot=taille_lot
+        )
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Recalcul terminé: {total} clients mis à jour')
+        )
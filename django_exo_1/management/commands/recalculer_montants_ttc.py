@@ -0,0 +1,83 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from django_exo_1 import cache
+from django_exo_1.models import Client, Facture, StatistiqueJournaliere
+
+
+def _date(valeur):
+    jour = parse_date(valeur)
+    if jour is None:
+        raise ValueError(valeur)
+    return jour
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcule le montant TTC des factures en une seule requête UPDATE, '
+        'éventuellement avec un nouveau taux de TVA (changement de taux sur une période)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date-debut',
+            type=_date,
+            help='Date d\'émission minimale (AAAA-MM-JJ, incluse)',
+        )
+        parser.add_argument(
+            '--date-fin',
+            type=_date,
+            help='Date d\'émission maximale (AAAA-MM-JJ, incluse)',
+        )
+        parser.add_argument(
+            '--taux',
+            help='Ne recalcule que les factures à ce taux de TVA (ex. 20.00)',
+        )
+        parser.add_argument(
+            '--nouveau-taux',
+            help='Applique ce taux de TVA aux factures concernées avant le recalcul',
+        )
+        parser.add_argument(
+            '--statut',
+            action='append',
+            dest='statuts',
+            choices=[statut for statut, _ in Facture.STATUT_CHOICES],
+            help='Ne recalcule que les factures de ce statut (option répétable, tous par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            taux = Decimal(options['taux']) if options['taux'] else None
+            nouveau_taux = Decimal(options['nouveau_taux']) if options['nouveau_taux'] else None
+        except InvalidOperation:
+            self.stderr.write(self.style.ERROR('--taux et --nouveau-taux doivent être des nombres'))
+            return
+
+        factures = Facture.objects.par_periode(options['date_debut'], options['date_fin'])
+        if taux is not None:
+            factures = factures.filter(taux_tva=taux)
+        if options['statuts']:
+            factures = factures.filter(statut__in=options['statuts'])
+
+        self.stdout.write(self.style.SUCCESS('Recalcul des montants TTC...'))
+
+        with transaction.atomic():
+            # Clients relus avant la mise à jour : le filtre --taux ne
+            # correspondrait plus après un changement de taux
+            client_ids = set(factures.order_by().values_list('client_id', flat=True).distinct())
+            total = factures.recalculer_montants_ttc(taux_tva=nouveau_taux)
+
+            # Données dérivées des montants, reconstruites de façon ensembliste
+            if total:
+                StatistiqueJournaliere.objects.reconstruire(
+                    date_debut=options['date_debut'], date_fin=options['date_fin']
+                )
+                Client.objects.recalculer_compteurs(client_ids)
+                cache.invalider()
+                cache.invalider_historique(None)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Recalcul terminé: {total} factures mises à jour')
+        )
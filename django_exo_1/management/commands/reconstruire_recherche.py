@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django_exo_1.recherche import TAILLE_LOT, moteur
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit l\'index de recherche plein texte des factures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=TAILLE_LOT,
+            help=f'Nombre de factures indexées par requête ({TAILLE_LOT} par défaut)',
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Base de données à réindexer (default par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        taille_lot = options['taille_lot']
+        if taille_lot < 1:
+            self.stderr.write(self.style.ERROR('--taille-lot doit être supérieur ou égal à 1'))
+            return
+        
+        recherche = moteur(options['database'])
+        if not recherche.table:
+            self.stdout.write(self.style.WARNING('Recherche plein texte désactivée : rien à reconstruire'))
+            return
+        
+        self.stdout.write(self.style.SUCCESS('Reconstruction de l\'index de recherche...'))
+        
+        # Une seule transaction : la recherche reste servie par l'ancien index
+        with transaction.atomic(using=options['database']):
+            total = recherche.reconstruire(taille_lot=taille_lot)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Reconstruction terminée: {total} factures indexées')
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django_exo_1.models import StatistiqueJournaliere
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit entièrement la table des statistiques journalières des factures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours-par-lot',
+            type=int,
+            default=31,
+            help='Nombre de jours d\'émission agrégés par requête (31 par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        jours_par_lot = options['jours_par_lot']
+        if jours_par_lot < 1:
+            self.stderr.write(self.style.ERROR('--jours-par-lot doit être supérieur ou égal à 1'))
+            return
+        
+        self.stdout.write(self.style.SUCCESS('Reconstruction des statistiques journalières...'))
+        
+        total = StatistiqueJournaliere.objects.reconstruire(jours_par_lot=jours_par_lot)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Reconstruction terminée: {total} lignes d\'agrégats créées')
+        )
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django_exo_1 import taches
+from django_exo_1.models import TacheLot
+
+
+class Command(BaseCommand):
+    help = 'Worker des tâches de lot sur les factures (plusieurs workers peuvent tourner en parallèle)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help='Traite les tranches en attente puis s\'arrête (au lieu d\'attendre les suivantes)',
+        )
+        parser.add_argument(
+            '--attente',
+            type=float,
+            default=2.0,
+            help='Secondes entre deux consultations de la file vide (2 par défaut)',
+        )
+        parser.add_argument(
+            '--reprendre',
+            type=int,
+            action='append',
+            dest='reprises',
+            help='Identifiant d\'une tâche échouée à remettre en file (option répétable)',
+        )
+
+    def handle(self, *args, **options):
+        for pk in options['reprises'] or []:
+            tache = TacheLot.objects.filter(pk=pk).first()
+            if tache is not None and taches.reprendre(tache):
+                self.stdout.write(self.style.SUCCESS(f'Tâche {pk} remise en file'))
+            else:
+                self.stderr.write(self.style.ERROR(f'Tâche {pk} introuvable ou non échouée'))
+
+        self.stdout.write(self.style.SUCCESS('Traitement des tâches de lot...'))
+
+        traitees = 0
+        try:
+            while True:
+                try:
+                    tranche = taches.traiter_tranche_suivante()
+                except Exception as exc:
+                    # La tâche est marquée échouée : les autres restent en file
+                    self.stderr.write(self.style.ERROR(f'Échec d\'une tranche : {exc}'))
+                    if options['une_fois']:
+                        break
+                    time.sleep(options['attente'])
+                    continue
+                if tranche is None:
+                    if options['une_fois']:
+                        break
+                    time.sleep(options['attente'])
+                    continue
+                traitees += 1
+                self.stdout.write(
+                    f'Tâche {tranche.tache_id} : tranche {tranche.position + 1}/{tranche.tache.nb_tranches} traitée'
+                )
+        except KeyboardInterrupt:
+            # La tranche en cours est annulée avec sa transaction et sera reprise
+            pass
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Traitement terminé: {traitees} tranches traitées')
+        )
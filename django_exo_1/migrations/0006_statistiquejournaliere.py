@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:57
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def remplir_statistiques(apps, schema_editor):
+    """Calcule les agrégats journaliers des factures existantes."""
+    Facture = apps.get_model('django_exo_1', 'Facture')
+    StatistiqueJournaliere = apps.get_model('django_exo_1', 'StatistiqueJournaliere')
+    lignes = Facture.objects.order_by().values('date_emission', 'statut', 'categorie_id').annotate(
+        nb=models.Count('id'),
+        ht=models.Sum('montant_ht'),
+        ttc=models.Sum('montant_ttc'),
+    )
+    StatistiqueJournaliere.objects.bulk_create([
+        StatistiqueJournaliere(
+            jour=ligne['date_emission'],
+            statut=ligne['statut'],
+            categorie_id=ligne['categorie_id'],
+            nb_factures=ligne['nb'],
+            total_ht=ligne['ht'],
+            total_tva=ligne['ttc'] - ligne['ht'],
+            total_ttc=ligne['ttc'],
+        )
+        for ligne in lignes
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0005_logcreationfacture'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueJournaliere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(verbose_name='Jour')),
+                ('statut', models.CharField(choices=[('brouillon', 'Brouillon'), ('envoyee', 'Envoyée'), ('payee', 'Payée'), ('annulee', 'Annulée')], max_length=20, verbose_name='Statut')),
+                ('nb_factures', models.PositiveIntegerField(default=0, verbose_name='Nombre de factures')),
+                ('total_ht', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Total HT')),
+                ('total_tva', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Total TVA')),
+                ('total_ttc', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Total TTC')),
+                ('categorie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistiques_journalieres', to='django_exo_1.categoriefacture', verbose_name='Catégorie')),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'ordering': ['-jour', 'categorie', 'statut'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statistiquejournaliere',
+            constraint=models.UniqueConstraint(fields=('jour', 'statut', 'categorie'), name='statistique_journaliere_unique'),
+        ),
+        migrations.RunPython(remplir_statistiques, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-17 21:59
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def calculer_compteurs(apps, schema_editor):
+    """Calcule les compteurs dénormalisés des clients existants."""
+    Client = apps.get_model('django_exo_1', 'Client')
+    Facture = apps.get_model('django_exo_1', 'Facture')
+    agregats = {
+        ligne['client_id']: ligne
+        for ligne in Facture.objects.order_by().values('client_id').annotate(
+            nb=models.Count('id'),
+            ca=models.Sum('montant_ttc', filter=models.Q(statut='payee')),
+            encours=models.Sum('montant_ttc', filter=~models.Q(statut__in=['payee', 'annulee'])),
+        )
+    }
+    clients = list(Client.objects.filter(pk__in=agregats).only('pk'))
+    for client in clients:
+        ligne = agregats[client.pk]
+        client.nb_factures = ligne['nb']
+        client.ca_paye = ligne['ca'] or Decimal('0')
+        client.encours = ligne['encours'] or Decimal('0')
+    Client.objects.bulk_update(clients, ['nb_factures', 'ca_paye', 'encours'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0006_statistiquejournaliere'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='ca_paye',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=14, verbose_name="Chiffre d'affaires payé"),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='encours',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=14, verbose_name='Encours (non payé)'),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='nb_factures',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de factures'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-nb_factures', 'nom'], name='client_classement_nb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-ca_paye', 'nom'], name='client_classement_ca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-encours', 'nom'], name='client_classement_encours_idx'),
+        ),
+        migrations.RunPython(calculer_compteurs, migrations.RunPython.noop),
+    ]
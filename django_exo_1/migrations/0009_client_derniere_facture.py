@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+def calculer_derniere_facture(apps, schema_editor):
+    """Renseigne la date de la dernière facture des clients existants."""
+    Client = apps.get_model('django_exo_1', 'Client')
+    Facture = apps.get_model('django_exo_1', 'Facture')
+    dernieres = dict(
+        Facture.objects.order_by().values('client_id')
+        .annotate(derniere=models.Max('date_emission'))
+        .values_list('client_id', 'derniere')
+    )
+    clients = list(Client.objects.filter(pk__in=dernieres).only('pk'))
+    for client in clients:
+        client.derniere_facture = dernieres[client.pk]
+    Client.objects.bulk_update(clients, ['derniere_facture'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0008_facture_liste_curseur_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='derniere_facture',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Date de la dernière facture'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-derniere_facture', 'nom'], name='client_derniere_facture_idx'),
+        ),
+        migrations.RunPython(calculer_derniere_facture, migrations.RunPython.noop),
+    ]
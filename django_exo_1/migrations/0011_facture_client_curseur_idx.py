@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0010_index_requetes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['client', '-date_emission', '-numero', '-id'], name='facture_client_curseur_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:30
+
+from django.db import migrations
+
+# SQL figé à la date de la migration (le module recherche peut évoluer) :
+# table d'index plein texte et remplissage depuis les factures existantes,
+# par type de base. Les autres bases n'ont pas d'index (recherche icontains).
+SELECT_SOURCE = (
+    'SELECT f.id, f.numero, c.nom, c.email, f.description '
+    'FROM django_exo_1_facture f INNER JOIN django_exo_1_client c ON c.id = f.client_id'
+)
+
+SQL_INSTALLATION = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS django_exo_1_facture_fts USING fts5("
+        "numero, client_nom, client_email, description, "
+        "tokenize = 'unicode61 remove_diacritics 2')",
+        "INSERT INTO django_exo_1_facture_fts (rowid, numero, client_nom, client_email, description) "
+        f"{SELECT_SOURCE}",
+    ],
+    'postgresql': [
+        'CREATE EXTENSION IF NOT EXISTS unaccent',
+        'CREATE TABLE IF NOT EXISTS django_exo_1_facture_recherche ('
+        'facture_id bigint PRIMARY KEY REFERENCES django_exo_1_facture (id) ON DELETE CASCADE, '
+        'document tsvector NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS django_exo_1_facture_recherche_document_idx '
+        'ON django_exo_1_facture_recherche USING GIN (document)',
+        "INSERT INTO django_exo_1_facture_recherche (facture_id, document) "
+        "SELECT s.id, "
+        "setweight(to_tsvector('french', unaccent(coalesce(s.numero, ''))), 'A') || "
+        "setweight(to_tsvector('french', unaccent(coalesce(s.nom, '') || ' ' || coalesce(s.email, ''))), 'B') || "
+        "setweight(to_tsvector('french', unaccent(coalesce(s.description, ''))), 'C') "
+        f"FROM ({SELECT_SOURCE}) s (id, numero, nom, email, description)",
+    ],
+}
+
+SQL_DESINSTALLATION = {
+    'sqlite': ['DROP TABLE IF EXISTS django_exo_1_facture_fts'],
+    'postgresql': ['DROP TABLE IF EXISTS django_exo_1_facture_recherche'],
+}
+
+
+def _executer(schema_editor, requetes):
+    for sql in requetes.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def installer_recherche(apps, schema_editor):
+    """Crée la table d'index plein texte et y indexe les factures existantes."""
+    _executer(schema_editor, SQL_INSTALLATION)
+
+
+def desinstaller_recherche(apps, schema_editor):
+    """Supprime la table d'index plein texte."""
+    _executer(schema_editor, SQL_DESINSTALLATION)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0011_facture_client_curseur_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(installer_recherche, desinstaller_recherche),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0012_recherche_plein_texte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Suppression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(choices=[('facture', 'Facture'), ('client', 'Client')], max_length=20, verbose_name='Modèle')),
+                ('objet_id', models.BigIntegerField(verbose_name="Identifiant de l'objet")),
+                ('date_suppression', models.DateTimeField(auto_now_add=True, verbose_name='Date de suppression')),
+            ],
+            options={
+                'verbose_name': 'Suppression',
+                'verbose_name_plural': 'Suppressions',
+                'ordering': ['date_suppression', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['date_modification', 'id'], name='client_modification_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(fields=['date_modification', 'id'], name='facture_modification_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suppression',
+            index=models.Index(fields=['date_suppression', 'id'], name='suppression_curseur_idx'),
+        ),
+    ]
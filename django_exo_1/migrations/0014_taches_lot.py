@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0013_synchronisation_incrementale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TacheLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=30, verbose_name='Action')),
+                ('parametres', models.JSONField(blank=True, default=dict, verbose_name='Paramètres')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echouee', 'Échouée')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('nb_factures', models.PositiveIntegerField(default=0, verbose_name='Nombre de factures')),
+                ('nb_tranches', models.PositiveIntegerField(default=0, verbose_name='Nombre de tranches')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Début du traitement')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin du traitement')),
+            ],
+            options={
+                'verbose_name': 'Tâche de lot',
+                'verbose_name_plural': 'Tâches de lot',
+                'ordering': ['-date_creation'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrancheTache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(verbose_name='Position')),
+                ('ids', models.JSONField(default=list, verbose_name='Identifiants des factures')),
+                ('terminee', models.BooleanField(default=False, verbose_name='Traitée')),
+                ('resultats', models.JSONField(blank=True, default=dict, verbose_name='Résultats')),
+                ('contenu', models.TextField(blank=True, verbose_name='Contenu exporté')),
+                ('tache', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tranches', to='django_exo_1.tachelot', verbose_name='Tâche')),
+            ],
+            options={
+                'verbose_name': 'Tranche de tâche',
+                'verbose_name_plural': 'Tranches de tâche',
+                'ordering': ['tache', 'position'],
+                'indexes': [models.Index(fields=['terminee', 'tache', 'position'], name='tranche_a_traiter_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tranchetache',
+            constraint=models.UniqueConstraint(fields=('tache', 'position'), name='tranche_tache_position_unique'),
+        ),
+    ]
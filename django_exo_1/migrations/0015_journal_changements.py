@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:47
+
+from django.db import migrations, models
+
+
+def journaliser_existants(apps, schema_editor):
+    """
+    Journalise les clients et factures existants : une synchronisation
+    partant du début du journal les renvoie tous.
+    """
+    Changement = apps.get_model('django_exo_1', 'Changement')
+    for nom in ('client', 'facture'):
+        modele = apps.get_model('django_exo_1', nom.capitalize())
+        lot = []
+        for pk in modele.objects.order_by('date_modification', 'pk').values_list('pk', flat=True).iterator():
+            lot.append(Changement(modele=nom, objet_id=pk))
+            if len(lot) == 500:
+                Changement.objects.bulk_create(lot)
+                lot = []
+        Changement.objects.bulk_create(lot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0014_taches_lot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Changement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(choices=[('facture', 'Facture'), ('client', 'Client')], max_length=20, verbose_name='Modèle')),
+                ('objet_id', models.BigIntegerField(verbose_name="Identifiant de l'objet")),
+                ('date', models.DateTimeField(auto_now_add=True, verbose_name='Date')),
+            ],
+            options={
+                'verbose_name': 'Changement',
+                'verbose_name_plural': 'Changements',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='client',
+            name='client_modification_idx',
+        ),
+        migrations.AddIndex(
+            model_name='changement',
+            index=models.Index(fields=['date'], name='changement_date_idx'),
+        ),
+        migrations.RunPython(journaliser_existants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_exo_1', '0015_journal_changements'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Suppression',
+        ),
+        migrations.AddIndex(
+            model_name='changement',
+            index=models.Index(fields=['modele', 'objet_id', 'id'], name='changement_objet_idx'),
+        ),
+    ]
@@ -1,10 +1,80 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast, Round, TruncDay, TruncWeek, TruncMonth, TruncYear
 from django.core.validators import MinValueValidator
-from decimal import Decimal
+from decimal import ROUND_HALF_EVEN, Decimal
+from datetime import timedelta
 
 # Create your models here.
 
 
+# Granularités des séries temporelles et fonction de troncature SQL associée
+GRANULARITES = {
+    'jour': TruncDay,
+    'semaine': TruncWeek,
+    'mois': TruncMonth,
+    'annee': TruncYear,
+}
+
+
+def debut_periode(jour, granularite):
+    """
+    Retourne le premier jour de la période (granularité) contenant une date.
+    
+    Calcul identique à la troncature SQL (semaines ISO commençant le lundi).
+    """
+    if granularite == 'semaine':
+        return jour - timedelta(days=jour.weekday())
+    if granularite == 'mois':
+        return jour.replace(day=1)
+    if granularite == 'annee':
+        return jour.replace(month=1, day=1)
+    return jour
+
+
+class LigneExportFacture:
+    """
+    Ligne d'export d'une facture (profil pour_export).
+    
+    Objet léger à attributs fixes (__slots__) construit depuis un tuple de
+    values_list() : ni instance de modèle, ni état, ni dictionnaire par ligne.
+    """
+    
+    __slots__ = COLONNES = (
+        'numero', 'date_emission', 'date_echeance', 'client_nom', 'categorie_nom',
+        'montant_ht', 'taux_tva', 'montant_ttc', 'statut',
+    )
+    
+    def __init__(self, *valeurs):
+        for colonne, valeur in zip(self.COLONNES, valeurs):
+            setattr(self, colonne, valeur)
+    
+    # En-têtes des exports CSV, dans l'ordre de valeurs_csv()
+    ENTETES_CSV = (
+        'Numéro', "Date d'émission", "Date d'échéance", 'Client', 'Catégorie',
+        'Montant HT', 'Taux TVA', 'Montant TTC', 'Statut',
+    )
+    
+    def __iter__(self):
+        return (getattr(self, colonne) for colonne in self.COLONNES)
+    
+    def valeurs_csv(self, statuts):
+        """Valeurs de la ligne CSV (statuts : {code: libellé})."""
+        return [
+            self.numero, self.date_emission, self.date_echeance,
+            self.client_nom, self.categorie_nom,
+            self.montant_ht, self.taux_tva, self.montant_ttc,
+            statuts.get(self.statut, self.statut),
+        ]
+
+
+def _compter_statuts(etats):
+    """Compte des états de factures (CHAMPS_SUIVIS) par statut."""
+    nombres = {}
+    for etat in etats:
+        nombres[etat['statut']] = nombres.get(etat['statut'], 0) + 1
+    return nombres
+
+
 class FactureQuerySet(models.QuerySet):
     """
     QuerySet personnalisé pour le modèle Facture.
@@ -12,6 +82,209 @@ class FactureQuerySet(models.QuerySet):
     Fournit des méthodes de filtrage courantes pour simplifier les requêtes.
     """
     
+    # Champs relevés avant un update() en masse pour maintenir les données dérivées
+    CHAMPS_SUIVIS = ('pk', 'date_emission', 'categorie_id', 'client_id', 'statut')
+    
+    # Tranches de la balance âgée : (clé, libellé, jours de retard min, max)
+    TRANCHES_RETARD = [
+        ('retard_0_30', '0-30 jours', 1, 30),
+        ('retard_31_60', '31-60 jours', 31, 60),
+        ('retard_61_90', '61-90 jours', 61, 90),
+        ('retard_90_plus', '+90 jours', 91, None),
+    ]
+    REGROUPEMENTS_BALANCE = ('client', 'categorie')
+    
+    def update(self, **kwargs):
+        """
+        Mise à jour en masse qui notifie les données dérivées.
+        
+        QuerySet.update() ne déclenche ni save() ni les signaux post_save :
+        l'état des lignes concernées est relevé avant la mise à jour puis
+        transmis via le signal factures_mises_a_jour, dans la même transaction.
+        
+        date_modification est renseignée comme par save() (auto_now), sauf si
+        elle est fournie. Les factures sont journalisées (Changement) pour la
+        synchronisation incrémentale par le signal.
+        
+        Si montant_ht ou taux_tva change, montant_ttc est recalculé par la
+        même requête (expression_montant_ttc), comme save() le ferait : il
+        ne peut pas rester périmé, y compris via bulk_update().
+        
+        Returns:
+            int: Nombre de factures mises à jour
+        """
+        return self._mettre_a_jour(kwargs)[0]
+    
+    def update_par_statut(self, **kwargs):
+        """
+        update() qui retourne le nombre de factures mises à jour par statut.
+        
+        Les statuts sont ceux d'avant la mise à jour, relevés par update()
+        pour les données dérivées : aucune requête supplémentaire.
+        
+        Returns:
+            dict: {statut: nombre de factures}
+        """
+        return _compter_statuts(self._mettre_a_jour(kwargs)[1])
+    
+    def _mettre_a_jour(self, kwargs):
+        """Effectue update() et retourne (nombre, état relevé avant la mise à jour)."""
+        from django.utils import timezone
+        from .signals import factures_mises_a_jour
+        if kwargs.keys() & {'montant_ht', 'taux_tva'} and 'montant_ttc' not in kwargs:
+            # Les nouvelles valeurs, pas les colonnes : SET évalue l'ancienne ligne
+            kwargs['montant_ttc'] = Facture.expression_montant_ttc(
+                kwargs.get('montant_ht'), kwargs.get('taux_tva')
+            )
+        with transaction.atomic(using=self.db, savepoint=False):
+            avant = list(self.order_by().values(*self.CHAMPS_SUIVIS))
+            if not avant:
+                return 0, avant
+            nombre = super().update(**{'date_modification': timezone.now(), **kwargs})
+            factures_mises_a_jour.send(
+                sender=self.model, avant=avant, champs=frozenset(kwargs), using=self.db
+            )
+        return nombre, avant
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+        bulk_update() qui tient le TTC des instances à jour.
+        
+        Si montant_ht ou taux_tva fait partie des champs, le TTC est calculé
+        sur chaque instance et écrit avec eux.
+        
+        Returns:
+            int: Nombre de lignes mises à jour
+        """
+        fields = list(fields)
+        if set(fields) & {'montant_ht', 'taux_tva'} and 'montant_ttc' not in fields:
+            objs = list(objs)
+            for facture in objs:
+                facture.montant_ttc = facture.calculer_montant_ttc(facture.montant_ht, facture.taux_tva)
+            fields.append('montant_ttc')
+        return super().bulk_update(objs, fields, *args, **kwargs)
+    
+    def recalculer_montants_ttc(self, taux_tva=None):
+        """
+        Recalcule le TTC (en changeant éventuellement le taux) en un seul UPDATE.
+        
+        Contrairement à update(), l'état des factures n'est pas relevé avant
+        la requête (des millions de lignes peuvent être concernées) et aucun
+        signal n'est envoyé : l'appelant reconstruit les données dérivées
+        (voir la commande recalculer_montants_ttc). Les factures sont
+        journalisées (Changement) par un INSERT ... SELECT.
+        
+        Args:
+            taux_tva: Nouveau taux de TVA (taux actuel conservé si None)
+            
+        Returns:
+            int: Nombre de factures mises à jour
+        """
+        from django.utils import timezone
+        valeurs = {
+            'montant_ttc': Facture.expression_montant_ttc(taux_tva=taux_tva),
+            'date_modification': timezone.now(),
+        }
+        if taux_tva is not None:
+            valeurs['taux_tva'] = taux_tva
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Journal avant la mise à jour, par la même condition : un
+            # changement de taux ferait sortir les lignes d'un filtre sur le taux
+            Changement.objects.journaliser_requete(
+                'facture', Facture.objects.using(self.db).filter(pk__in=self.values('pk'))
+            )
+            return super().update(**valeurs)
+    
+    def supprimer_par_statut(self):
+        """
+        Suppression en masse ensembliste, sans charger les factures.
+        
+        QuerySet.delete() charge chaque facture et envoie post_delete ligne
+        par ligne. Ici, l'état des factures est relevé en une requête, les
+        logs de création (CASCADE) sont supprimés, puis les factures par un
+        seul DELETE ; les données dérivées sont mises à jour une fois via le
+        signal factures_supprimees, dans la même transaction.
+        
+        Returns:
+            dict: {statut: nombre de factures supprimées}
+        """
+        from .signals import factures_supprimees
+        with transaction.atomic(using=self.db, savepoint=False):
+            avant = list(self.order_by().values(*self.CHAMPS_SUIVIS))
+            if not avant:
+                return {}
+            pks = [etat['pk'] for etat in avant]
+            LogCreationFacture.objects.using(self.db).filter(facture_id__in=pks).delete()
+            # _raw_delete() : DELETE direct, sans collecte des instances ni signaux
+            self.model._base_manager.using(self.db).filter(pk__in=pks)._raw_delete(self.db)
+            factures_supprimees.send(sender=self.model, avant=avant, using=self.db)
+        return _compter_statuts(avant)
+    
+    def vers_statut(self, statut):
+        """
+        Filtre les factures qui peuvent passer au statut donné.
+        
+        La règle de transition (Facture.TRANSITIONS_STATUT) fait partie de la
+        clause WHERE : une mise à jour en masse ne touche que les factures
+        autorisées, sans vérification ligne à ligne en Python.
+        """
+        return self.filter(statut__in=Facture.TRANSITIONS_STATUT[statut])
+    
+    def par_tranches(self, taille=1000):
+        """
+        Découpe le QuerySet en tranches d'au plus `taille` factures.
+        
+        Les tranches sont construites à partir des identifiants existants
+        (pagination par clé : les `taille` identifiants suivant le dernier
+        traité), sans parcourir les plages vides entre des identifiants
+        épars. Chaque tranche ajoute « id >= premier AND id <= dernier » aux
+        filtres : une mise à jour par tranche ne verrouille qu'un nombre
+        borné de lignes (transaction courte), quel que soit le total.
+        
+        Les identifiants de la tranche suivante sont lus après le traitement
+        de la précédente : une facture modifiée entre-temps est revérifiée
+        par les filtres de la tranche.
+        
+        Args:
+            taille: Nombre maximum de factures par tranche
+            
+        Yields:
+            QuerySet: Factures de la tranche
+        """
+        dernier = None
+        while True:
+            identifiants = self.order_by('pk')
+            if dernier is not None:
+                identifiants = identifiants.filter(pk__gt=dernier)
+            ids = list(identifiants.values_list('pk', flat=True)[:taille])
+            if not ids:
+                return
+            yield self.filter(pk__gte=ids[0], pk__lte=ids[-1])
+            if len(ids) < taille:
+                return
+            dernier = ids[-1]
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Création en masse qui calcule le TTC et notifie les données dérivées.
+        
+        bulk_create() n'appelle ni save() ni les signaux post_save : le
+        montant TTC est calculé ici comme dans Facture.save(), puis le signal
+        factures_creees est envoyé après l'insertion, dans la même transaction.
+        
+        Returns:
+            list: Factures créées
+        """
+        from .signals import factures_creees
+        objs = list(objs)
+        for facture in objs:
+            facture.montant_ttc = facture.calculer_montant_ttc(facture.montant_ht, facture.taux_tva)
+        with transaction.atomic(using=self.db, savepoint=False):
+            creees = super().bulk_create(objs, *args, **kwargs)
+            if creees:
+                factures_creees.send(sender=self.model, factures=creees, using=self.db)
+        return creees
+    
     def payees(self):
         """Retourne les factures payées."""
         return self.filter(statut='payee')
@@ -60,28 +333,189 @@ class FactureQuerySet(models.QuerySet):
         date_limite = timezone.now().date() + timedelta(days=jours)
         return self.filter(date_echeance__lte=date_limite, statut='envoyee')
     
-    def par_periode(self, date_debut, date_fin):
-        """Filtre par période d'émission."""
-        return self.filter(date_emission__range=[date_debut, date_fin])
+    def par_periode(self, date_debut=None, date_fin=None):
+        """Filtre par période d'émission (bornes incluses et optionnelles)."""
+        queryset = self
+        if date_debut:
+            queryset = queryset.filter(date_emission__gte=date_debut)
+        if date_fin:
+            queryset = queryset.filter(date_emission__lte=date_fin)
+        return queryset
     
     def recherche(self, terme):
-        """Recherche textuelle dans numéro, client et description."""
-        return self.filter(
-            models.Q(numero__icontains=terme) |
-            models.Q(client__nom__icontains=terme) |
-            models.Q(client__email__icontains=terme) |
-            models.Q(description__icontains=terme)
-        )
+        """
+        Recherche textuelle dans numéro, client et description.
+        
+        Délègue au moteur plein texte de la base (voir recherche.py) : les
+        résultats sont triés par pertinence (annotation `pertinence`).
+        """
+        from .recherche import moteur
+        return moteur(self.db).filtrer(self, terme)
     
     def avec_relations(self):
         """Optimise les requêtes en chargeant les relations."""
         return self.select_related('client', 'categorie')
     
+    # ==========================================
+    # PROFILS DE CHARGEMENT
+    # ==========================================
+    # Chaque profil charge uniquement les colonnes affichées par son écran :
+    # les champs texte (description, notes) et les lignes complètes des
+    # clients/catégories ne sont lus que par la page de détail.
+    
+    CHAMPS_LISTE = (
+        'numero', 'date_emission', 'date_echeance', 'montant_ht', 'montant_ttc', 'statut',
+        'client', 'client__nom', 'client__email',
+        'categorie', 'categorie__nom', 'categorie__couleur',
+    )
+    CHAMPS_DASHBOARD = ('numero', 'date_echeance', 'montant_ttc', 'statut', 'client', 'client__nom')
+    # Colonnes values_list() du profil export, dans l'ordre de LigneExportFacture
+    COLONNES_EXPORT = (
+        'numero', 'date_emission', 'date_echeance', 'client__nom', 'categorie__nom',
+        'montant_ht', 'taux_tva', 'montant_ttc', 'statut',
+    )
+    
+    def pour_liste(self):
+        """Profil de la liste des factures (et de la liste de l'admin)."""
+        return self.select_related('client', 'categorie').only(*self.CHAMPS_LISTE)
+    
+    def pour_detail(self):
+        """Profil de la page de détail : facture complète, client et catégorie."""
+        return self.select_related('client', 'categorie').defer('client__notes', 'categorie__description')
+    
+    def pour_dashboard(self):
+        """Profil des lignes du dashboard (numéro, client, échéance, montant)."""
+        return self.select_related('client').only(*self.CHAMPS_DASHBOARD)
+    
+    def pour_export(self, taille_lot=2000):
+        """
+        Profil d'export : itère sur des LigneExportFacture.
+        
+        Les lignes sont lues par lots (iterator) en tuples, sans instancier
+        de modèle. Doit terminer la chaîne de filtres.
+        
+        Args:
+            taille_lot: Nombre de lignes lues par aller-retour avec la base
+            
+        Yields:
+            LigneExportFacture: Une ligne par facture
+        """
+        for ligne in self.values_list(*self.COLONNES_EXPORT).iterator(chunk_size=taille_lot):
+            yield LigneExportFacture(*ligne)
+    
+    def facette(self, nom, champ, libelle=None):
+        """
+        Nombre de factures par valeur d'un champ, au format commun des facettes.
+        
+        Les lignes (facette, valeur, libelle, nombre) ont les mêmes colonnes
+        quelle que soit la facette : plusieurs facettes se combinent avec
+        union(all=True) en une seule requête.
+        
+        Args:
+            nom: Nom de la facette, répété sur chaque ligne
+            champ: Champ de regroupement (valeur convertie en texte)
+            libelle: Champ du libellé affiché (ex: 'client__nom'), optionnel
+        """
+        return (
+            self.order_by()
+            .annotate(
+                facette=models.Value(nom, output_field=models.CharField()),
+                valeur=Cast(champ, models.CharField()),
+                libelle=models.F(libelle) if libelle else models.Value('', output_field=models.CharField()),
+            )
+            .values('facette', 'valeur', 'libelle')
+            .annotate(nombre=models.Count('pk'))
+        )
+    
     def chiffre_affaires(self):
         """Calcule le chiffre d'affaires des factures payées."""
         return self.payees().aggregate(
             total=models.Sum('montant_ttc')
         )['total'] or 0
+    
+    def statistiques(self):
+        """
+        Calcule toutes les statistiques du QuerySet en une seule requête.
+        
+        Chaque indicateur est un agrégat filtré (COUNT/SUM ... FILTER) évalué
+        sur le même parcours de la table, au lieu d'une requête par indicateur.
+        Le QuerySet peut être préfiltré (client, période, catégorie...).
+        
+        Returns:
+            dict: total, payees, en_attente, brouillons, annulees, en_retard
+                  et chiffre_affaires
+        """
+        from django.utils import timezone
+        aujourd_hui = timezone.now().date()
+        stats = self.order_by().aggregate(
+            total=models.Count('id'),
+            payees=models.Count('id', filter=models.Q(statut='payee')),
+            en_attente=models.Count('id', filter=models.Q(statut='envoyee')),
+            brouillons=models.Count('id', filter=models.Q(statut='brouillon')),
+            annulees=models.Count('id', filter=models.Q(statut='annulee')),
+            en_retard=models.Count('id', filter=models.Q(date_echeance__lt=aujourd_hui)),
+            chiffre_affaires=models.Sum('montant_ttc', filter=models.Q(statut='payee')),
+        )
+        stats['chiffre_affaires'] = stats['chiffre_affaires'] or 0
+        return stats
+    
+    def balance_agee(self, par='client'):
+        """
+        Balance âgée : encours TTC en retard réparti par tranche de retard.
+        
+        Une seule requête groupée (par client ou par catégorie) sur les
+        factures non payées dont l'échéance est passée ; chaque tranche est
+        une somme conditionnelle (CASE WHEN) sur la date d'échéance.
+        
+        Args:
+            par: 'client' ou 'categorie'
+            
+        Returns:
+            QuerySet: Dicts {groupe_id, groupe_nom, nb_factures, total,
+                      <clé de tranche>...}
+                      triés par total décroissant
+        """
+        from django.utils import timezone
+        if par not in self.REGROUPEMENTS_BALANCE:
+            raise ValueError(f"Regroupement inconnu : {par}")
+        aujourd_hui = timezone.now().date()
+        tranches = {}
+        for cle, _libelle, jours_min, jours_max in self.TRANCHES_RETARD:
+            filtre = models.Q(date_echeance__lte=aujourd_hui - timedelta(days=jours_min))
+            if jours_max is not None:
+                filtre &= models.Q(date_echeance__gte=aujourd_hui - timedelta(days=jours_max))
+            tranches[cle] = models.Sum('montant_ttc', filter=filtre, default=Decimal('0'))
+        return (
+            self.non_payees().echeance_passee().order_by()
+            .values(groupe_id=models.F(par), groupe_nom=models.F(f'{par}__nom'))
+            .annotate(nb_factures=models.Count('id'), total=models.Sum('montant_ttc'), **tranches)
+            .order_by('-total', 'groupe_nom')
+        )
+    
+    def serie(self, granularite):
+        """
+        Montants TTC facturés, payés et en attente regroupés par période.
+        
+        Le regroupement est fait par la base (troncature de date_emission et
+        GROUP BY) : aucune facture n'est chargée en mémoire.
+        
+        Args:
+            granularite: 'jour', 'semaine', 'mois' ou 'annee'
+            
+        Returns:
+            list: Dicts {periode, facture, paye, en_attente} triés par période
+        """
+        return list(
+            self.order_by()
+            .annotate(periode=GRANULARITES[granularite]('date_emission'))
+            .values('periode')
+            .annotate(
+                facture=models.Sum('montant_ttc', filter=~models.Q(statut='annulee')),
+                paye=models.Sum('montant_ttc', filter=models.Q(statut='payee')),
+                en_attente=models.Sum('montant_ttc', filter=~models.Q(statut__in=['payee', 'annulee'])),
+            )
+            .order_by('periode')
+        )
 
 
 class FactureManager(models.Manager):
@@ -119,6 +553,14 @@ class FactureManager(models.Manager):
         """Raccourci pour les factures à échéance proche."""
         return self.get_queryset().echeance_proche(jours)
     
+    def par_client(self, client):
+        """Raccourci pour le filtrage par client."""
+        return self.get_queryset().par_client(client)
+    
+    def par_periode(self, date_debut=None, date_fin=None):
+        """Raccourci pour le filtrage par période d'émission."""
+        return self.get_queryset().par_periode(date_debut, date_fin)
+    
     def recherche(self, terme):
         """Raccourci pour la recherche textuelle."""
         return self.get_queryset().recherche(terme)
@@ -127,21 +569,207 @@ class FactureManager(models.Manager):
         """Raccourci pour charger les relations."""
         return self.get_queryset().avec_relations()
     
+    def pour_liste(self):
+        """Raccourci pour le profil liste."""
+        return self.get_queryset().pour_liste()
+    
+    def pour_detail(self):
+        """Raccourci pour le profil détail."""
+        return self.get_queryset().pour_detail()
+    
+    def pour_dashboard(self):
+        """Raccourci pour le profil dashboard."""
+        return self.get_queryset().pour_dashboard()
+    
+    def pour_export(self, taille_lot=2000):
+        """Raccourci pour le profil export."""
+        return self.get_queryset().pour_export(taille_lot)
+    
     def chiffre_affaires(self):
         """Raccourci pour calculer le chiffre d'affaires."""
         return self.get_queryset().chiffre_affaires()
     
-    def statistiques(self):
-        """Retourne des statistiques globales."""
-        return {
-            'total': self.count(),
-            'payees': self.payees().count(),
-            'en_attente': self.en_attente().count(),
-            'brouillons': self.brouillons().count(),
-            'annulees': self.get_queryset().annulees().count(),
-            'en_retard': self.echeance_passee().count(),
-            'chiffre_affaires': self.chiffre_affaires(),
-        }
+    def statistiques(self, queryset=None, client=None, date_debut=None, date_fin=None,
+                     agregats=False):
+        """
+        Retourne des statistiques globales calculées en une seule requête.
+        
+        Args:
+            queryset: QuerySet de factures déjà filtré (toutes les factures par défaut)
+            client: Restreint les statistiques à un client
+            date_debut: Date d'émission minimale (incluse)
+            date_fin: Date d'émission maximale (incluse)
+            agregats: Lit les compteurs dans StatistiqueJournaliere plutôt que
+                      dans la table des factures (ignoré si queryset ou client)
+            
+        Returns:
+            dict: Statistiques (voir FactureQuerySet.statistiques)
+        """
+        if agregats and queryset is None and client is None:
+            return StatistiqueJournaliere.objects.statistiques(date_debut, date_fin)
+        queryset = self.get_queryset() if queryset is None else queryset
+        if client is not None:
+            queryset = queryset.par_client(client)
+        return queryset.par_periode(date_debut, date_fin).statistiques()
+
+
+class ClientQuerySet(models.QuerySet):
+    """
+    QuerySet personnalisé pour le modèle Client.
+    """
+    
+    # Critères de classement disponibles (champs dénormalisés indexés)
+    CRITERES_CLASSEMENT = ('nb_factures', 'ca_paye', 'encours')
+    
+    # Tris proposés par la liste des clients : chacun correspond à un index
+    TRIS = {
+        'nom': ('nom',),
+        'nb_factures': ('-nb_factures', 'nom'),
+        'ca_paye': ('-ca_paye', 'nom'),
+        'encours': ('-encours', 'nom'),
+        'derniere_facture': (models.F('derniere_facture').desc(nulls_last=True), 'nom'),
+    }
+    
+    def actifs(self):
+        """Retourne les clients actifs."""
+        return self.filter(est_actif=True)
+    
+    def trier(self, tri):
+        """
+        Trie les clients selon un des tris de la liste.
+        
+        Les agrégats par client (nombre de factures, CA payé, encours, date de
+        la dernière facture) sont des colonnes dénormalisées : ils sont lus
+        avec la page, et le tri est un parcours d'index, sans GROUP BY sur
+        les factures.
+        
+        Args:
+            tri: Clé de TRIS
+        """
+        if tri not in self.TRIS:
+            raise ValueError(f"Tri inconnu : {tri}")
+        return self.order_by(*self.TRIS[tri])
+    
+    def classement(self, par='nb_factures', limite=5):
+        """
+        Retourne les meilleurs clients selon un compteur dénormalisé.
+        
+        Le tri (compteur décroissant puis nom) correspond aux index du
+        modèle Client : la requête est un parcours d'index limité.
+        
+        Args:
+            par: Critère de classement ('nb_factures', 'ca_paye' ou 'encours')
+            limite: Nombre de clients retournés
+        """
+        if par not in self.CRITERES_CLASSEMENT:
+            raise ValueError(f"Critère de classement inconnu : {par}")
+        return self.order_by(f'-{par}', 'nom')[:limite]
+    
+    # Champs indexés par la recherche plein texte des factures
+    CHAMPS_RECHERCHE = ('nom', 'email')
+    
+    def update(self, **kwargs):
+        """
+        Mise à jour en masse qui notifie les données dérivées.
+        
+        Envoie le signal clients_mis_a_jour, QuerySet.update() ne
+        déclenchant pas les signaux post_save. Les identifiants des clients
+        sont relevés avant la mise à jour et transmis (pks).
+        
+        date_modification est renseignée comme par save() (auto_now), sauf si
+        elle est fournie.
+        
+        Returns:
+            int: Nombre de clients mis à jour
+        """
+        from django.utils import timezone
+        from .signals import clients_mis_a_jour
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.order_by().values_list('pk', flat=True))
+            if not pks:
+                return 0
+            nombre = super().update(**{'date_modification': timezone.now(), **kwargs})
+            if nombre:
+                clients_mis_a_jour.send(
+                    sender=self.model, champs=frozenset(kwargs), pks=pks, using=self.db
+                )
+        return nombre
+
+
+class ClientManager(models.Manager):
+    """
+    Manager personnalisé pour le modèle Client.
+    """
+    
+    def get_queryset(self):
+        """Retourne le QuerySet personnalisé."""
+        return ClientQuerySet(self.model, using=self._db)
+    
+    def actifs(self):
+        """Raccourci pour les clients actifs."""
+        return self.get_queryset().actifs()
+    
+    def classement(self, par='nb_factures', limite=5):
+        """Raccourci pour le classement des clients."""
+        return self.get_queryset().classement(par, limite)
+    
+    def trier(self, tri):
+        """Raccourci pour trier les clients."""
+        return self.get_queryset().trier(tri)
+    
+    def recalculer_compteurs(self, client_ids=None, taille_lot=500):
+        """
+        Recalcule les compteurs dénormalisés (nb_factures, ca_paye, encours,
+        derniere_facture).
+        
+        Les clients sont traités par lots : pour chaque lot, une requête
+        agrégée groupée par client puis une mise à jour en masse, dans une
+        transaction qui verrouille les lignes clients concernées.
+        
+        Seules les colonnes des compteurs sont écrites : la mise à jour
+        contourne ClientQuerySet.update(), date_modification (et donc l'ETag
+        des pages du client, qui inclut les compteurs) n'est pas modifiée.
+        Les clients sont journalisés pour la synchronisation incrémentale.
+        
+        Args:
+            client_ids: Identifiants des clients à recalculer (tous si None)
+            taille_lot: Nombre de clients traités par lot
+            
+        Returns:
+            int: Nombre de clients recalculés
+        """
+        if client_ids is None:
+            client_ids = self.order_by('pk').values_list('pk', flat=True)
+        client_ids = sorted(set(client_ids))
+        total = 0
+        for i in range(0, len(client_ids), taille_lot):
+            lot = client_ids[i:i + taille_lot]
+            with transaction.atomic(using=self.db):
+                clients = list(self.select_for_update().filter(pk__in=lot).only('pk'))
+                agregats = {
+                    ligne['client_id']: ligne
+                    for ligne in Facture.objects.filter(client_id__in=lot)
+                    .order_by().values('client_id').annotate(
+                        nb=models.Count('id'),
+                        ca=models.Sum('montant_ttc', filter=models.Q(statut='payee')),
+                        encours=models.Sum(
+                            'montant_ttc', filter=~models.Q(statut__in=['payee', 'annulee'])
+                        ),
+                        derniere=models.Max('date_emission'),
+                    )
+                }
+                for client in clients:
+                    ligne = agregats.get(client.pk, {})
+                    client.nb_factures = ligne.get('nb') or 0
+                    client.ca_paye = ligne.get('ca') or Decimal('0')
+                    client.encours = ligne.get('encours') or Decimal('0')
+                    client.derniere_facture = ligne.get('derniere')
+                models.QuerySet(self.model, using=self.db).bulk_update(
+                    clients, ['nb_factures', 'ca_paye', 'encours', 'derniere_facture']
+                )
+                Changement.objects.journaliser('client', [client.pk for client in clients], using=self.db)
+            total += len(clients)
+        return total
 
 
 class Client(models.Model):
@@ -164,6 +792,9 @@ class Client(models.Model):
         numero_tva (CharField): Numéro de TVA intracommunautaire (optionnel)
         est_actif (BooleanField): Indique si le client est actif
         notes (TextField): Notes libres sur le client (optionnel)
+        nb_factures (PositiveIntegerField): Nombre de factures (dénormalisé)
+        ca_paye (DecimalField): Total TTC des factures payées (dénormalisé)
+        encours (DecimalField): Total TTC des factures non payées (dénormalisé)
         date_creation (DateTimeField): Date de création automatique
         date_modification (DateTimeField): Date de modification automatique
     
@@ -205,14 +836,42 @@ class Client(models.Model):
     est_actif = models.BooleanField(default=True, verbose_name="Client actif")
     notes = models.TextField(blank=True, null=True, verbose_name="Notes sur le client")
     
+    # Compteurs dénormalisés, maintenus à chaque écriture de facture (voir signals.py)
+    nb_factures = models.PositiveIntegerField(default=0, editable=False, verbose_name="Nombre de factures")
+    ca_paye = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0'), editable=False,
+        verbose_name="Chiffre d'affaires payé"
+    )
+    encours = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0'), editable=False,
+        verbose_name="Encours (non payé)"
+    )
+    derniere_facture = models.DateField(
+        null=True, blank=True, editable=False, verbose_name="Date de la dernière facture"
+    )
+    
     # Métadonnées
     date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     date_modification = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
     
+    objects = ClientManager()  # Utilisation du manager personnalisé
+    
     class Meta:
         verbose_name = "Client"
         verbose_name_plural = "Clients"
         ordering = ['nom']
+        indexes = [
+            models.Index(fields=['-nb_factures', 'nom'], name='client_classement_nb_idx'),
+            models.Index(fields=['-ca_paye', 'nom'], name='client_classement_ca_idx'),
+            models.Index(fields=['-encours', 'nom'], name='client_classement_encours_idx'),
+            models.Index(fields=['-derniere_facture', 'nom'], name='client_derniere_facture_idx'),
+            # Tri par défaut de la liste des clients
+            models.Index(fields=['nom'], name='client_nom_idx'),
+            # Clients actifs triés par nom (listes de choix des formulaires et filtres).
+            # Index partiel : SQLite ne peut pas utiliser un index (est_actif, nom)
+            # pour la condition booléenne nue "WHERE est_actif" générée par l'ORM
+            models.Index(fields=['nom'], condition=models.Q(est_actif=True), name='client_actifs_nom_idx'),
+        ]
     
     def __str__(self):
         """
@@ -313,6 +972,13 @@ class Facture(models.Model):
         ('annulee', 'Annulée'),
     ]
     
+    # Transitions autorisées : {statut cible: statuts de départ possibles}
+    TRANSITIONS_STATUT = {
+        'envoyee': ('brouillon',),
+        'payee': ('brouillon', 'envoyee'),
+        'annulee': ('brouillon', 'envoyee'),
+    }
+    
     # Informations principales
     numero = models.CharField(max_length=50, unique=True, verbose_name="Numéro de facture")
     date_emission = models.DateField(verbose_name="Date d'émission")
@@ -373,6 +1039,22 @@ class Facture(models.Model):
         verbose_name = "Facture"
         verbose_name_plural = "Factures"
         ordering = ['-date_emission', '-numero']
+        indexes = [
+            # Pagination par curseur de la liste des factures (voir pagination.py)
+            models.Index(fields=['-date_emission', '-numero', '-id'], name='facture_liste_curseur_idx'),
+            # Filtres de FactureQuerySet (vérifiés par PlansRequetesTest)
+            # (statut, date_echeance) sert aussi echeance_proche() : un index partiel
+            # "WHERE statut = 'envoyee'" n'est pas utilisable par SQLite quand
+            # l'ORM transmet 'envoyee' en paramètre de la requête
+            models.Index(fields=['statut', 'date_echeance'], name='facture_statut_echeance_idx'),
+            models.Index(fields=['date_echeance'], name='facture_echeance_idx'),
+            models.Index(fields=['client', 'statut'], name='facture_client_statut_idx'),
+            # Factures d'un client par date décroissante (page client paginée par curseur)
+            models.Index(fields=['client', '-date_emission', '-numero', '-id'], name='facture_client_curseur_idx'),
+            models.Index(fields=['categorie', 'statut'], name='facture_categorie_statut_idx'),
+            # Factures écrites par recalculer_montants_ttc(), journalisées par leur date_modification
+            models.Index(fields=['date_modification', 'id'], name='facture_modification_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         """
@@ -387,9 +1069,72 @@ class Facture(models.Model):
             *args: Arguments positionnels passés à la méthode save() parente
             **kwargs: Arguments nommés passés à la méthode save() parente
         """
-        self.montant_ttc = self.montant_ht * (1 + self.taux_tva / 100)
+        self.montant_ttc = self.calculer_montant_ttc(self.montant_ht, self.taux_tva)
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def calculer_montant_ttc(montant_ht, taux_tva):
+        """
+        Montant TTC d'un montant HT au taux de TVA donné (en %).
+        
+        Calcul décimal exact, arrondi au centime pair à mi-chemin (arrondi
+        par défaut des DecimalField, celui des TTC déjà enregistrés) :
+        expression_montant_ttc() calcule exactement la même valeur en base.
+        """
+        return (montant_ht * (100 + taux_tva) / 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_EVEN)
+    
+    @staticmethod
+    def expression_montant_ttc(montant_ht=None, taux_tva=None):
+        """
+        Expression SQL du montant TTC, pour les mises à jour ensemblistes.
+        
+        Même résultat que calculer_montant_ttc(), évalué par la base : le TTC
+        est recalculé dans la requête UPDATE elle-même. Le calcul se fait en
+        entiers (SQLite calcule les décimaux en virgule flottante, dont
+        l'arrondi ne coïncide pas toujours avec l'arrondi décimal) :
+        
+            n = ht (centimes) * (10000 + taux (centièmes de %)), TTC en 10^-6 unité
+            q, r = n / 10000, n - q * 10000 (division entière)
+            TTC (centimes) = q + 1 si r > 5000, ou si r = 5000 et q impair
+                           = q + (r + q % 2 + 4999) / 10000
+        
+        soit un arrondi au centime pair à mi-chemin pour des montants
+        positifs. Les montants HT (2 décimales) et les taux (2 décimales)
+        sont convertis en entiers sans perte par ROUND(x * 100).
+        
+        Args:
+            montant_ht: Expression ou valeur du montant HT (colonne par défaut)
+            taux_tva: Expression ou valeur du taux de TVA (colonne par défaut)
+            
+        Returns:
+            Expression: TTC en centimes (entier) * 0.01
+        """
+        entier = models.BigIntegerField()
+        
+        def centiemes(valeur, champ):
+            if valeur is None:
+                valeur = models.F(champ)
+            elif not hasattr(valeur, 'resolve_expression'):
+                valeur = models.Value(Decimal(valeur), output_field=models.DecimalField())
+            return Cast(Round(valeur * 100), entier)
+        
+        produit = models.ExpressionWrapper(
+            centiemes(montant_ht, 'montant_ht') * (10000 + centiemes(taux_tva, 'taux_tva')),
+            output_field=entier
+        )
+        quotient = models.ExpressionWrapper(produit / 10000, output_field=entier)
+        reste = models.ExpressionWrapper(produit - quotient * 10000, output_field=entier)
+        impair = models.ExpressionWrapper(quotient - quotient / 2 * 2, output_field=entier)
+        # 1 si r + (q impair) > 5000 : au-delà de la moitié, ou moitié exacte avec q impair
+        centimes = models.ExpressionWrapper(
+            quotient + (reste + impair + 4999) / 10000,
+            output_field=entier
+        )
+        return models.ExpressionWrapper(
+            centimes * models.Value(Decimal('0.01'), output_field=models.DecimalField()),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2)
+        )
+    
     def __str__(self):
         """
         Représentation textuelle de la facture.
@@ -413,6 +1158,461 @@ class Facture(models.Model):
         return self.montant_ttc - self.montant_ht
 
 
+class StatistiqueJournaliereQuerySet(models.QuerySet):
+    """
+    QuerySet personnalisé pour le modèle StatistiqueJournaliere.
+    """
+    
+    def par_periode(self, date_debut=None, date_fin=None):
+        """Filtre les agrégats par période (bornes incluses et optionnelles)."""
+        queryset = self
+        if date_debut:
+            queryset = queryset.filter(jour__gte=date_debut)
+        if date_fin:
+            queryset = queryset.filter(jour__lte=date_fin)
+        return queryset
+    
+    def payees(self):
+        """Retourne les agrégats des factures payées."""
+        return self.filter(statut='payee')
+    
+    def serie(self, granularite):
+        """
+        Série temporelle (voir FactureQuerySet.serie) calculée sur les agrégats.
+        """
+        return list(
+            self.order_by()
+            .annotate(periode=GRANULARITES[granularite]('jour'))
+            .values('periode')
+            .annotate(
+                facture=models.Sum('total_ttc', filter=~models.Q(statut='annulee')),
+                paye=models.Sum('total_ttc', filter=models.Q(statut='payee')),
+                en_attente=models.Sum('total_ttc', filter=~models.Q(statut__in=['payee', 'annulee'])),
+            )
+            .order_by('periode')
+        )
+
+
+class StatistiqueJournaliereManager(models.Manager):
+    """
+    Manager personnalisé pour StatistiqueJournaliere.
+    
+    Maintient la table d'agrégats à partir des factures : chaque modification
+    recalcule uniquement les couples (jour, catégorie) concernés.
+    """
+    
+    # Nombre de couples (jour, catégorie) recalculés par requête
+    TAILLE_LOT_CLES = 100
+    
+    def get_queryset(self):
+        return StatistiqueJournaliereQuerySet(self.model, using=self._db)
+    
+    def par_periode(self, date_debut=None, date_fin=None):
+        return self.get_queryset().par_periode(date_debut, date_fin)
+    
+    def _agreger(self, factures):
+        """Construit les lignes d'agrégats (non sauvegardées) pour des factures."""
+        lignes = factures.order_by().values('date_emission', 'statut', 'categorie_id').annotate(
+            nb=models.Count('id'),
+            ht=models.Sum('montant_ht'),
+            ttc=models.Sum('montant_ttc'),
+        )
+        return [
+            self.model(
+                jour=ligne['date_emission'],
+                statut=ligne['statut'],
+                categorie_id=ligne['categorie_id'],
+                nb_factures=ligne['nb'],
+                total_ht=ligne['ht'],
+                total_tva=ligne['ttc'] - ligne['ht'],
+                total_ttc=ligne['ttc'],
+            )
+            for ligne in lignes
+        ]
+    
+    def recalculer(self, cles):
+        """
+        Recalcule les agrégats des couples (jour, categorie_id) donnés.
+        
+        Args:
+            cles: Itérable de tuples (jour, categorie_id)
+        """
+        cles = list(set(cles))
+        with transaction.atomic(using=self.db, savepoint=False):
+            for i in range(0, len(cles), self.TAILLE_LOT_CLES):
+                lot = cles[i:i + self.TAILLE_LOT_CLES]
+                filtre_agregats = models.Q()
+                filtre_factures = models.Q()
+                for jour, categorie_id in lot:
+                    filtre_agregats |= models.Q(jour=jour, categorie_id=categorie_id)
+                    filtre_factures |= models.Q(date_emission=jour, categorie_id=categorie_id)
+                self.filter(filtre_agregats).delete()
+                self.bulk_create(self._agreger(Facture.objects.filter(filtre_factures)))
+    
+    def reconstruire(self, jours_par_lot=31, date_debut=None, date_fin=None):
+        """
+        Reconstruit la table d'agrégats, par tranches de dates.
+        
+        Args:
+            jours_par_lot: Nombre de jours d'émission agrégés par requête
+            date_debut: Premier jour reconstruit (inclus, optionnel)
+            date_fin: Dernier jour reconstruit (inclus, optionnel)
+            
+        Returns:
+            int: Nombre de lignes d'agrégats créées
+        """
+        bornes = Facture.objects.par_periode(date_debut, date_fin).aggregate(
+            debut=models.Min('date_emission'), fin=models.Max('date_emission')
+        )
+        total = 0
+        with transaction.atomic(using=self.db):
+            self.par_periode(date_debut, date_fin).delete()
+            if bornes['debut'] is None:
+                return 0
+            debut = bornes['debut']
+            while debut <= bornes['fin']:
+                fin = debut + timedelta(days=jours_par_lot - 1)
+                lignes = self._agreger(Facture.objects.par_periode(debut, fin))
+                self.bulk_create(lignes)
+                total += len(lignes)
+                debut = fin + timedelta(days=1)
+        return total
+    
+    def statistiques(self, date_debut=None, date_fin=None):
+        """
+        Statistiques globales lues depuis les agrégats journaliers.
+        
+        Même format que FactureQuerySet.statistiques(). Seul le nombre de
+        factures en retard, qui dépend de l'échéance, est compté sur Facture.
+        """
+        agregats = self.par_periode(date_debut, date_fin)
+        stats = agregats.aggregate(
+            total=models.Sum('nb_factures'),
+            payees=models.Sum('nb_factures', filter=models.Q(statut='payee')),
+            en_attente=models.Sum('nb_factures', filter=models.Q(statut='envoyee')),
+            brouillons=models.Sum('nb_factures', filter=models.Q(statut='brouillon')),
+            annulees=models.Sum('nb_factures', filter=models.Q(statut='annulee')),
+            chiffre_affaires=models.Sum('total_ttc', filter=models.Q(statut='payee')),
+        )
+        stats = {cle: valeur or 0 for cle, valeur in stats.items()}
+        stats['en_retard'] = Facture.objects.par_periode(date_debut, date_fin).echeance_passee().count()
+        return stats
+    
+    def ca_par_categorie(self, date_debut=None, date_fin=None):
+        """
+        Chiffre d'affaires (factures payées) par catégorie, depuis les agrégats.
+        
+        Returns:
+            QuerySet: Catégories annotées avec 'ca', triées par CA décroissant
+        """
+        filtre = models.Q(statistiques_journalieres__statut='payee')
+        if date_debut:
+            filtre &= models.Q(statistiques_journalieres__jour__gte=date_debut)
+        if date_fin:
+            filtre &= models.Q(statistiques_journalieres__jour__lte=date_fin)
+        return CategorieFacture.objects.annotate(
+            ca=models.Sum('statistiques_journalieres__total_ttc', filter=filtre)
+        ).exclude(ca__isnull=True).order_by('-ca')
+
+
+class StatistiqueJournaliere(models.Model):
+    """
+    Agrégats journaliers des factures par (jour d'émission, statut, catégorie).
+    
+    Table de synthèse maintenue automatiquement (voir signals.py) : le coût
+    des tableaux de bord dépend du nombre de jours et de catégories, et non
+    plus du nombre de factures.
+    
+    Attributs:
+        jour (DateField): Date d'émission des factures agrégées
+        statut (CharField): Statut des factures agrégées
+        categorie (ForeignKey): Catégorie des factures agrégées
+        nb_factures (PositiveIntegerField): Nombre de factures
+        total_ht (DecimalField): Somme des montants HT
+        total_tva (DecimalField): Somme des montants de TVA
+        total_ttc (DecimalField): Somme des montants TTC
+    """
+    jour = models.DateField(verbose_name="Jour")
+    statut = models.CharField(max_length=20, choices=Facture.STATUT_CHOICES, verbose_name="Statut")
+    categorie = models.ForeignKey(
+        CategorieFacture,
+        on_delete=models.CASCADE,
+        verbose_name="Catégorie",
+        related_name="statistiques_journalieres"
+    )
+    nb_factures = models.PositiveIntegerField(default=0, verbose_name="Nombre de factures")
+    total_ht = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'), verbose_name="Total HT")
+    total_tva = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'), verbose_name="Total TVA")
+    total_ttc = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'), verbose_name="Total TTC")
+    
+    objects = StatistiqueJournaliereManager()
+    
+    class Meta:
+        verbose_name = "Statistique journalière"
+        verbose_name_plural = "Statistiques journalières"
+        ordering = ['-jour', 'categorie', 'statut']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['jour', 'statut', 'categorie'],
+                name='statistique_journaliere_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.jour:%d/%m/%Y} - {self.categorie.nom} - {self.get_statut_display()}"
+
+
+class ChangementManager(models.Manager):
+    """
+    Manager personnalisé pour le modèle Changement.
+    """
+    
+    # Taille des lots d'insertion du journal
+    TAILLE_LOT = 500
+    
+    def journaliser(self, modele, objet_ids, using=None):
+        """
+        Journalise des objets écrits, dans la transaction de l'écriture.
+        
+        Le journal est validé ou annulé avec les données : une écriture
+        validée ne peut pas manquer au journal.
+        
+        Args:
+            modele: 'facture' ou 'client'
+            objet_ids: Identifiants des objets créés, modifiés ou supprimés
+            using: Alias de la base de données
+        """
+        objet_ids = list(dict.fromkeys(pk for pk in objet_ids if pk is not None))
+        if objet_ids:
+            self.db_manager(using).bulk_create(
+                [self.model(modele=modele, objet_id=pk) for pk in objet_ids],
+                batch_size=self.TAILLE_LOT
+            )
+    
+    def purger(self, avant):
+        """
+        Compacte le journal : supprime les entrées antérieures à une date
+        devenues inutiles, c'est-à-dire suivies d'une entrée plus récente du
+        même objet, ou dont l'objet n'existe plus (suppression ancienne).
+        
+        La dernière entrée de chaque objet existant est conservée : une
+        synchronisation complète (sans curseur) renvoie toujours tous les
+        objets. Un client dont le curseur est antérieur à la date peut en
+        revanche manquer des suppressions et doit repartir d'une
+        synchronisation complète.
+        
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        anciennes = self.filter(date__lt=avant)
+        suivies = models.Exists(self.filter(
+            modele=models.OuterRef('modele'), objet_id=models.OuterRef('objet_id'), pk__gt=models.OuterRef('pk')
+        ))
+        total = anciennes.filter(suivies).delete()[0]
+        for modele, classe in (('facture', Facture), ('client', Client)):
+            total += anciennes.filter(modele=modele).exclude(
+                objet_id__in=classe.objects.values('pk')
+            ).delete()[0]
+        return total
+    
+    def journaliser_requete(self, modele, queryset):
+        """
+        Journalise les objets d'un QuerySet en un INSERT ... SELECT, sans
+        relire leurs identifiants (mises à jour de très nombreuses lignes).
+        
+        Le QuerySet est évalué immédiatement, dans la transaction en cours.
+        """
+        from django.db import connections
+        from django.utils import timezone
+        using = queryset.db
+        # Colonne pk en tête : l'ORM place les champs avant les expressions
+        requete = queryset.order_by('pk').values_list(
+            'pk',
+            models.Value(modele, output_field=models.CharField()),
+            models.Value(timezone.now(), output_field=models.DateTimeField()),
+        )
+        sql, parametres = requete.query.sql_with_params()
+        nom = connections[using].ops.quote_name
+        colonnes = ', '.join(nom(colonne) for colonne in ('objet_id', 'modele', 'date'))
+        with connections[using].cursor() as curseur:
+            curseur.execute(
+                f'INSERT INTO {nom(self.model._meta.db_table)} ({colonnes}) {sql}', parametres
+            )
+
+
+class Changement(models.Model):
+    """
+    Journal des écritures de factures et de clients.
+    
+    Chaque création, modification ou suppression ajoute une ligne, dans la
+    transaction de l'écriture (voir signals.py) ; la synchronisation
+    incrémentale (api/changements/) lit le journal par identifiant
+    croissant, une entrée dont l'objet n'existe plus signalant sa
+    suppression. La commande purger_changements compacte le journal. Une transaction longue (import, recalcul des TTC, tranche de
+    tâche) apparaît à la position de son écriture dans le journal, quelle
+    que soit la date_modification qu'elle a écrite.
+    
+    Attributs:
+        modele (CharField): 'facture' ou 'client'
+        objet_id (BigIntegerField): Identifiant de l'objet écrit
+        date (DateTimeField): Date de la journalisation
+    """
+    MODELES = [
+        ('facture', 'Facture'),
+        ('client', 'Client'),
+    ]
+    
+    modele = models.CharField(max_length=20, choices=MODELES, verbose_name="Modèle")
+    objet_id = models.BigIntegerField(verbose_name="Identifiant de l'objet")
+    date = models.DateTimeField(auto_now_add=True, verbose_name="Date")
+    
+    objects = ChangementManager()
+    
+    class Meta:
+        verbose_name = "Changement"
+        verbose_name_plural = "Changements"
+        ordering = ['id']
+        indexes = [
+            # Paramètre depuis de la synchronisation incrémentale
+            models.Index(fields=['date'], name='changement_date_idx'),
+            # Entrées suivantes d'un même objet (compactage, voir purger())
+            models.Index(fields=['modele', 'objet_id', 'id'], name='changement_objet_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_modele_display()} {self.objet_id} écrit le {self.date:%d/%m/%Y %H:%M}"
+
+
+class TacheLot(models.Model):
+    """
+    Action de lot sur les factures exécutée en arrière-plan.
+    
+    Au-delà d'un seuil, facture_bulk_action enregistre une tâche au lieu de
+    traiter les factures dans la requête web : la sélection est figée en
+    tranches d'identifiants (TrancheTache) que le worker (commande
+    traiter_taches) traite une à une. Aucun broker : la table des tranches
+    sert de file d'attente. Voir taches.py.
+    
+    Attributs:
+        action (CharField): Action de lot (mark_paid, cancel, export...)
+        parametres (JSONField): Paramètres de l'action (categorie, date_echeance)
+        statut (CharField): en_attente, en_cours, terminee ou echouee
+        nb_factures (PositiveIntegerField): Nombre de factures sélectionnées
+        nb_tranches (PositiveIntegerField): Nombre de tranches
+        erreur (TextField): Message de l'erreur ayant interrompu la tâche
+        date_creation, date_debut, date_fin (DateTimeField): Suivi d'exécution
+    """
+    STATUTS = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+        ('echouee', 'Échouée'),
+    ]
+    
+    action = models.CharField(max_length=30, verbose_name="Action")
+    parametres = models.JSONField(default=dict, blank=True, verbose_name="Paramètres")
+    statut = models.CharField(max_length=20, choices=STATUTS, default='en_attente', verbose_name="Statut")
+    nb_factures = models.PositiveIntegerField(default=0, verbose_name="Nombre de factures")
+    nb_tranches = models.PositiveIntegerField(default=0, verbose_name="Nombre de tranches")
+    erreur = models.TextField(blank=True, verbose_name="Erreur")
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name="Début du traitement")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin du traitement")
+    
+    class Meta:
+        verbose_name = "Tâche de lot"
+        verbose_name_plural = "Tâches de lot"
+        ordering = ['-date_creation']
+    
+    def __str__(self):
+        return f"Tâche {self.pk} ({self.action}, {self.get_statut_display()})"
+    
+    def progression(self):
+        """
+        État d'avancement, calculé depuis les tranches traitées.
+        
+        Returns:
+            dict: tranches_traitees, pourcentage, nombres ({statut: nombre}
+            de factures traitées par statut d'origine)
+        """
+        nombres = {}
+        traitees = 0
+        for resultats in self.tranches.filter(terminee=True).values_list('resultats', flat=True):
+            traitees += 1
+            for statut, nombre in resultats.items():
+                nombres[statut] = nombres.get(statut, 0) + nombre
+        return {
+            'tranches_traitees': traitees,
+            'pourcentage': round(100 * traitees / self.nb_tranches) if self.nb_tranches else 100,
+            'nombres': nombres,
+        }
+
+
+class TrancheTacheManager(models.Manager):
+    """
+    Manager personnalisé pour le modèle TrancheTache.
+    """
+    
+    def reserver(self):
+        """
+        Réserve la prochaine tranche à traiter (à appeler dans une transaction).
+        
+        select_for_update(skip_locked=True) : une tranche en cours de
+        traitement par un worker est verrouillée et ignorée par les autres,
+        qui prennent la suivante. Si le worker s'arrête, sa transaction est
+        annulée et la tranche redevient disponible.
+        
+        Returns:
+            TrancheTache ou None
+        """
+        return (
+            self.select_for_update(skip_locked=True, of=('self',))
+            .select_related('tache')
+            .filter(terminee=False, tache__statut__in=['en_attente', 'en_cours'])
+            .order_by('tache_id', 'position')
+            .first()
+        )
+
+
+class TrancheTache(models.Model):
+    """
+    Tranche de factures d'une TacheLot, traitée en une transaction.
+    
+    Attributs:
+        tache (ForeignKey): Tâche de la tranche
+        position (PositiveIntegerField): Rang de la tranche dans la tâche
+        ids (JSONField): Identifiants des factures de la tranche
+        terminee (BooleanField): Tranche traitée
+        resultats (JSONField): Nombre de factures traitées par statut
+        contenu (TextField): Lignes CSV produites (export)
+    """
+    tache = models.ForeignKey(
+        TacheLot, on_delete=models.CASCADE, related_name='tranches', verbose_name="Tâche"
+    )
+    position = models.PositiveIntegerField(verbose_name="Position")
+    ids = models.JSONField(default=list, verbose_name="Identifiants des factures")
+    terminee = models.BooleanField(default=False, verbose_name="Traitée")
+    resultats = models.JSONField(default=dict, blank=True, verbose_name="Résultats")
+    contenu = models.TextField(blank=True, verbose_name="Contenu exporté")
+    
+    objects = TrancheTacheManager()
+    
+    class Meta:
+        verbose_name = "Tranche de tâche"
+        verbose_name_plural = "Tranches de tâche"
+        ordering = ['tache', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['tache', 'position'], name='tranche_tache_position_unique'),
+        ]
+        indexes = [
+            # File d'attente des workers (TrancheTacheManager.reserver)
+            models.Index(fields=['terminee', 'tache', 'position'], name='tranche_a_traiter_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Tranche {self.position} de la tâche {self.tache_id}"
+
+
 class LogCreationFactureQuerySet(models.QuerySet):
     """
     QuerySet personnalisé pour le modèle LogCreationFacture.
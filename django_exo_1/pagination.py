@@ -0,0 +1,427 @@
+"""
+Pagination par curseur (keyset / seek) des listes.
+
+Au lieu de sauter N lignes avec OFFSET, la page suivante est sélectionnée
+par une condition sur les valeurs de tri de la dernière ligne affichée :
+
+    WHERE (date_emission, numero, id) < (:date, :numero, :id)
+    ORDER BY date_emission DESC, numero DESC, id DESC
+    LIMIT taille + 1
+
+Avec un index composite sur les mêmes colonnes, le coût d'une page ne dépend
+plus de sa position : la page 5 000 coûte autant que la page 1. Aucun
+COUNT(*) n'est exécuté, la ligne supplémentaire suffit à savoir s'il existe
+une page suivante.
+
+Le curseur transmis dans l'URL est un jeton opaque (JSON encodé en base64).
+
+Pour la pagination classique par numéro de page, PaginatorCompteCache évite
+de recompter les lignes à chaque requête : le nombre total est mis en cache
+par combinaison de filtres (invalidé par les écritures, voir cache.py), et
+peut être remplacé par une estimation tirée des statistiques de la table
+ou plafonné au-delà du seuil FACTURES_COMPTE_EXACT_MAX.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from . import cache
+
+
+class CurseurInvalide(ValueError):
+    """Jeton de curseur illisible ou ne correspondant pas aux champs de tri."""
+
+
+def encoder_curseur(objet, champs):
+    """
+    Encode les valeurs de tri d'un objet dans un jeton opaque.
+
+    Args:
+        objet: Instance de modèle (dernière ou première ligne de la page)
+        champs: Noms des champs de tri
+
+    Returns:
+        str: Jeton utilisable dans une URL
+    """
+    return encoder_valeurs([getattr(objet, champ) for champ in champs])
+
+
+def encoder_valeurs(valeurs):
+    """Encode des valeurs de tri (converties en texte) dans un jeton opaque."""
+    return urlsafe_base64_encode(json.dumps([str(valeur) for valeur in valeurs]).encode())
+
+
+def decoder_curseur(jeton, modele, champs):
+    """
+    Décode un jeton en valeurs typées selon les champs du modèle.
+
+    Raises:
+        CurseurInvalide: Si le jeton est illisible ou incohérent
+    """
+    try:
+        valeurs = json.loads(urlsafe_base64_decode(jeton))
+        if not isinstance(valeurs, list) or len(valeurs) != len(champs):
+            raise CurseurInvalide("Curseur incompatible avec le tri")
+        return [
+            modele._meta.get_field(champ).to_python(valeur)
+            for champ, valeur in zip(champs, valeurs)
+        ]
+    except CurseurInvalide:
+        raise
+    except Exception as exc:
+        raise CurseurInvalide("Curseur illisible") from exc
+
+
+def condition_seek(champs, valeurs, operateur):
+    """
+    Construit la comparaison lexicographique (a, b, c) < (x, y, z) avec des Q.
+
+    La condition redondante sur le premier champ permet au moteur de borner
+    le parcours de l'index avant d'évaluer les OR.
+    """
+    condition = Q()
+    for i, champ in enumerate(champs):
+        terme = Q(**{f'{champ}__{operateur}': valeurs[i]})
+        for champ_egal, valeur_egale in zip(champs[:i], valeurs[:i]):
+            terme &= Q(**{champ_egal: valeur_egale})
+        condition |= terme
+    return Q(**{f'{champs[0]}__{operateur}e': valeurs[0]}) & condition
+
+
+class PageCurseur:
+    """
+    Page d'une pagination par curseur.
+
+    Attributs:
+        object_list: Objets de la page, dans l'ordre d'affichage
+        curseur_suivant: Jeton de la page suivante (None si dernière page)
+        curseur_precedent: Jeton de la page précédente (None si première page)
+    """
+
+    def __init__(self, object_list, curseur_suivant, curseur_precedent):
+        self.object_list = object_list
+        self.curseur_suivant = curseur_suivant
+        self.curseur_precedent = curseur_precedent
+
+    def has_next(self):
+        return self.curseur_suivant is not None
+
+    def has_previous(self):
+        return self.curseur_precedent is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginer(queryset, champs, taille, apres=None, avant=None):
+    """
+    Retourne une page de `queryset` triée par `champs` décroissants.
+
+    Args:
+        queryset: QuerySet filtré (son tri est remplacé)
+        champs: Champs de tri, le dernier doit être unique (ex. 'id')
+        taille: Nombre d'objets par page
+        apres: Jeton de la dernière ligne de la page précédente
+        avant: Jeton de la première ligne de la page suivante
+
+    Returns:
+        PageCurseur: Page demandée
+
+    Raises:
+        CurseurInvalide: Si un jeton est invalide
+    """
+    modele = queryset.model
+    if avant:
+        # Page précédente : on remonte en ordre croissant puis on inverse
+        valeurs = decoder_curseur(avant, modele, champs)
+        lignes = list(
+            queryset.filter(condition_seek(champs, valeurs, 'gt'))
+            .order_by(*champs)[:taille + 1]
+        )
+        existe_precedente = len(lignes) > taille
+        objets = lignes[:taille][::-1]
+        existe_suivante = True
+    else:
+        if apres:
+            valeurs = decoder_curseur(apres, modele, champs)
+            queryset = queryset.filter(condition_seek(champs, valeurs, 'lt'))
+        lignes = list(queryset.order_by(*(f'-{champ}' for champ in champs))[:taille + 1])
+        existe_suivante = len(lignes) > taille
+        objets = lignes[:taille]
+        existe_precedente = bool(apres)
+
+    if not objets:
+        return PageCurseur([], None, None)
+    return PageCurseur(
+        objets,
+        encoder_curseur(objets[-1], champs) if existe_suivante else None,
+        encoder_curseur(objets[0], champs) if existe_precedente else None,
+    )
+
+
+def _lien(parametres_get, parametre, jeton, extra):
+    """URL relative (?...) avec les paramètres courants et le curseur donné."""
+    parametres = parametres_get.copy()
+    for cle in ('page', 'apres', 'avant'):
+        parametres.pop(cle, None)
+    for cle, valeur in extra.items():
+        parametres[cle] = valeur
+    parametres[parametre] = jeton
+    return f'?{parametres.urlencode()}'
+
+
+def paginer_requete(request, queryset, champs, taille, **extra):
+    """
+    Pagine par curseur selon les paramètres apres/avant de la requête.
+    
+    Les liens lien_suivant / lien_precedent de la page conservent tous les
+    autres paramètres GET (filtres), plus ceux passés dans extra.
+    
+    Raises:
+        CurseurInvalide: Si un jeton est invalide
+    """
+    page = paginer(
+        queryset, champs, taille,
+        apres=request.GET.get('apres'),
+        avant=request.GET.get('avant'),
+    )
+    page.lien_suivant = page.lien_precedent = None
+    if page.has_next():
+        page.lien_suivant = _lien(request.GET, 'apres', page.curseur_suivant, extra)
+    if page.has_previous():
+        page.lien_precedent = _lien(request.GET, 'avant', page.curseur_precedent, extra)
+    return page
+
+
+def paginer_valeurs(request, queryset, colonnes, taille):
+    """
+    Pagine par curseur croissant sur la clé primaire, en tuples (values_list).
+    
+    Variante pour les API et les synchronisations : aucune instance de
+    modèle n'est créée, et la page suivante est obtenue par pk > dernier
+    (parcours de la clé primaire, coût constant à toute profondeur).
+    
+    Args:
+        request: Requête (paramètre apres = jeton de la page précédente)
+        queryset: QuerySet filtré (son tri est remplacé)
+        colonnes: Chemins ORM lus pour chaque ligne
+        taille: Nombre de lignes par page
+        
+    Returns:
+        tuple: (lignes, lien_suivant) ; lien_suivant vaut None sur la
+        dernière page
+        
+    Raises:
+        CurseurInvalide: Si le jeton est invalide
+    """
+    apres = request.GET.get('apres')
+    if apres:
+        (dernier,) = decoder_curseur(apres, queryset.model, ('id',))
+        queryset = queryset.filter(pk__gt=dernier)
+    lignes = list(queryset.order_by('pk').values_list('pk', *colonnes)[:taille + 1])
+    lien_suivant = None
+    if len(lignes) > taille:
+        lignes = lignes[:taille]
+        lien_suivant = _lien(request.GET, 'apres', encoder_valeurs([lignes[-1][0]]), {})
+    return [ligne[1:] for ligne in lignes], lien_suivant
+
+
+# ==========================================
+# NOMBRE TOTAL DE LIGNES EN CACHE OU ESTIMÉ
+# ==========================================
+
+def estimer_nombre_lignes(modele, using='default'):
+    """
+    Estime le nombre de lignes d'une table depuis les statistiques du moteur.
+    
+    Lecture instantanée, sans parcours de la table. Les statistiques sont
+    tenues à jour par ANALYZE (SQLite, PostgreSQL) ou par le moteur (MySQL).
+    
+    Returns:
+        int | None: Estimation, ou None si le moteur n'en fournit pas
+    """
+    connexion = connections[using]
+    table = modele._meta.db_table
+    requetes = {
+        'sqlite': ("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table]),
+        'postgresql': ("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table]),
+        'mysql': (
+            "SELECT table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            [table],
+        ),
+    }
+    if connexion.vendor not in requetes:
+        return None
+    sql, parametres = requetes[connexion.vendor]
+    try:
+        # Point de sauvegarde : l'échec ne doit pas invalider la transaction en cours
+        with transaction.atomic(using=using), connexion.cursor() as curseur:
+            curseur.execute(sql, parametres)
+            ligne = curseur.fetchone()
+    except DatabaseError:
+        # sqlite_stat1 n'existe qu'après un premier ANALYZE
+        return None
+    if ligne is None or ligne[0] is None:
+        return None
+    # SQLite : "nb_lignes nb_par_valeur..." ; PostgreSQL : -1 si jamais analysée
+    estimation = int(str(ligne[0]).split()[0])
+    return estimation if estimation >= 0 else None
+
+
+def _arrondi(nombre):
+    """Formate un grand nombre de façon lisible (ex: 1,2 M)."""
+    if nombre >= 1_000_000:
+        return f"{nombre / 1_000_000:.1f} M".replace('.', ',')
+    if nombre >= 10_000:
+        return f"{nombre / 1_000:.0f} k"
+    return str(nombre)
+
+
+def empreinte_requete(queryset):
+    """Empreinte de la requête (filtres compris), indépendante du tri."""
+    return hashlib.md5(str(queryset.order_by().query).encode()).hexdigest()
+
+
+class PageApproximative(Page):
+    """
+    Page d'un PaginatorCompteCache dont le nombre de lignes n'est pas exact.
+    
+    L'existence d'une page suivante est déterminée par la ligne
+    supplémentaire lue avec la page (taille + 1), pas par le nombre de pages.
+    """
+    
+    def __init__(self, object_list, number, paginator, suivante):
+        super().__init__(object_list, number, paginator)
+        self.suivante = suivante
+    
+    def has_next(self):
+        return self.suivante
+    
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class PaginatorCompteCache(Paginator):
+    """
+    Paginator dont le nombre total de lignes est mis en cache ou estimé.
+    
+    - Le COUNT(*) exact est mis en cache par combinaison de filtres, sous la
+      version du cache incrémentée à chaque écriture (voir signals.py).
+    - Si FACTURES_COMPTE_EXACT_MAX est défini, la liste non filtrée affiche
+      l'estimation du moteur lorsqu'elle dépasse ce seuil, et les listes
+      filtrées ne comptent que jusqu'au seuil (COUNT sur une sous-requête
+      limitée).
+    
+    Attributs:
+        estime: True si count est une estimation
+        plafonne: True si le nombre réel dépasse count
+    """
+    estime = False
+    plafonne = False
+    
+    @cached_property
+    def count(self):
+        """Nombre total de lignes (exact, estimé ou plafonné)."""
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return len(queryset)
+        seuil = getattr(settings, 'FACTURES_COMPTE_EXACT_MAX', None)
+        
+        if seuil is not None and not queryset.query.has_filters():
+            estimation = estimer_nombre_lignes(queryset.model, queryset.db)
+            if estimation is not None and estimation > seuil:
+                self.estime = True
+                return estimation
+        
+        try:
+            empreinte = empreinte_requete(queryset)
+        except EmptyResultSet:
+            return 0
+        nombre, self.plafonne = cache.obtenir(
+            'compte', lambda: self._compter(queryset, seuil),
+            queryset.model._meta.label_lower, empreinte, seuil
+        )
+        return nombre
+    
+    @staticmethod
+    def _compter(queryset, seuil):
+        """Compte les lignes, au plus seuil + 1 si un seuil est défini."""
+        if seuil is None:
+            return queryset.count(), False
+        nombre = queryset[:seuil + 1].count()
+        return (seuil, True) if nombre > seuil else (nombre, False)
+    
+    @property
+    def approximatif(self):
+        """Indique que le nombre de pages n'est pas exact."""
+        self.count  # estime et plafonne sont renseignés par le calcul du nombre
+        return self.estime or self.plafonne
+    
+    def validate_number(self, number):
+        """
+        Valide un numéro de page.
+        
+        Si le nombre de pages n'est pas exact, il ne sert pas de borne : une
+        page au-delà d'une estimation trop basse ou du plafond existe
+        peut-être (vérifié par page()).
+        """
+        if not self.approximatif:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Ce numéro de page n'est pas un entier")
+        if number < 1:
+            raise EmptyPage("Ce numéro de page est inférieur à 1")
+        return number
+    
+    def page(self, number):
+        """
+        Retourne une page.
+        
+        Si le nombre de lignes n'est pas exact, la page est lue avec une
+        ligne supplémentaire (taille + 1) qui indique s'il existe une page
+        suivante ; une page vide au-delà de la première n'existe pas.
+        """
+        number = self.validate_number(number)
+        if not self.approximatif:
+            return super().page(number)
+        debut = (number - 1) * self.per_page
+        lignes = list(self.object_list[debut:debut + self.per_page + 1])
+        if not lignes and number > 1:
+            raise EmptyPage("Cette page ne contient aucun résultat")
+        return PageApproximative(lignes[:self.per_page], number, self, len(lignes) > self.per_page)
+    
+    def _libelle(self, nombre):
+        if self.estime:
+            return f"environ {_arrondi(nombre)}"
+        if self.plafonne:
+            return f"plus de {_arrondi(nombre)}"
+        return str(nombre)
+    
+    @property
+    def libelle_compte(self):
+        """Nombre de lignes à afficher (ex: 'environ 1,2 M')."""
+        return self._libelle(self.count)
+    
+    @property
+    def libelle_pages(self):
+        """Nombre de pages à afficher."""
+        return self._libelle(self.num_pages)
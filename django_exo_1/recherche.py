@@ -0,0 +1,282 @@
+"""
+Recherche plein texte des factures.
+
+FactureQuerySet.recherche() délègue à un moteur choisi selon la base :
+
+- SQLite : table virtuelle FTS5 (tokenizer unicode61 sans accents) ;
+- PostgreSQL : table tsvector (configuration 'french' + unaccent) indexée
+  par un index GIN ;
+- autres bases, ou réglage FACTURES_RECHERCHE = 'like' : filtres icontains.
+
+Les moteurs plein texte utilisent une table d'index séparée, une ligne par
+facture (numéro, nom et email du client, description), tenue à jour par les
+signaux (voir signals.py) et reconstructible par la commande
+reconstruire_recherche. Les résultats sont annotés d'une pertinence
+(`pertinence`, plus petite = plus pertinente) et triés par pertinence.
+
+Chaque mot saisi est cherché comme préfixe (« dup » trouve « Dupont ») et
+tous les mots doivent être présents.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Tables de la base utilisées par les requêtes de remplissage de l'index
+TABLE_FACTURE = 'django_exo_1_facture'
+TABLE_CLIENT = 'django_exo_1_client'
+
+# Nombre de factures indexées par requête lors d'une reconstruction
+TAILLE_LOT = 5000
+
+# Mots d'une saisie utilisateur (lettres et chiffres, accents compris)
+_MOTS = re.compile(r'\w+', re.UNICODE)
+
+
+def mots(terme):
+    """Découpe une saisie en mots (la ponctuation sert de séparateur)."""
+    return _MOTS.findall(terme or '')
+
+
+class RechercheLike:
+    """Moteur de repli : icontains sur les colonnes, sans index ni pertinence."""
+
+    table = None
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def filtrer(self, queryset, terme):
+        """Filtre les factures contenant le terme."""
+        return queryset.filter(
+            Q(numero__icontains=terme) |
+            Q(client__nom__icontains=terme) |
+            Q(client__email__icontains=terme) |
+            Q(description__icontains=terme)
+        )
+
+    def installer(self):
+        """Aucune table d'index à créer."""
+
+    def desinstaller(self):
+        """Aucune table d'index à supprimer."""
+
+    def indexer(self, facture_ids):
+        """Rien à indexer."""
+
+    def indexer_client(self, client_id):
+        """Rien à indexer."""
+
+    def supprimer(self, facture_ids):
+        """Rien à supprimer."""
+
+    def reconstruire(self, taille_lot=TAILLE_LOT):
+        """Rien à reconstruire."""
+        return 0
+
+
+class _RecherchePleinTexte(RechercheLike):
+    """
+    Base des moteurs plein texte à table d'index séparée.
+
+    Les sous-classes fournissent le SQL propre à la base : création de la
+    table, insertion depuis les tables factures/clients (sql_insertion),
+    requête de recherche.
+    """
+
+    # SELECT des colonnes indexées, complété par une condition WHERE
+    SELECT_SOURCE = (
+        f'SELECT f.id, f.numero, c.nom, c.email, f.description '
+        f'FROM {TABLE_FACTURE} f INNER JOIN {TABLE_CLIENT} c ON c.id = f.client_id'
+    )
+
+    def _executer(self, sql, parametres=()):
+        with connections[self.using].cursor() as curseur:
+            curseur.execute(sql, parametres)
+            return curseur.rowcount
+
+    def filtrer(self, queryset, terme):
+        """Filtre et trie par pertinence les factures correspondant au terme."""
+        requete = self.requete(mots(terme))
+        if requete is None:
+            # Saisie sans mot (ponctuation seule) : recherche littérale
+            return super().filtrer(queryset, terme)
+        return (
+            queryset
+            .filter(pk__in=RawSQL(self.SQL_CORRESPONDANCES, (requete,)))
+            .annotate(pertinence=RawSQL(self.SQL_PERTINENCE, (requete,)))
+            .order_by('pertinence', '-date_emission', '-numero')
+        )
+
+    def _placeholders(self, nombre):
+        return ', '.join(['%s'] * nombre)
+
+    def supprimer(self, facture_ids):
+        """Retire des factures de l'index."""
+        facture_ids = list(facture_ids)
+        for i in range(0, len(facture_ids), TAILLE_LOT):
+            lot = facture_ids[i:i + TAILLE_LOT]
+            self._executer(
+                f'DELETE FROM {self.table} WHERE {self.COLONNE_ID} IN ({self._placeholders(len(lot))})',
+                lot
+            )
+
+    def indexer(self, facture_ids):
+        """(Ré)indexe des factures (celles qui n'existent plus sont retirées)."""
+        facture_ids = list(facture_ids)
+        self.supprimer(facture_ids)
+        for i in range(0, len(facture_ids), TAILLE_LOT):
+            lot = facture_ids[i:i + TAILLE_LOT]
+            self._executer(self.sql_insertion(f'f.id IN ({self._placeholders(len(lot))})'), lot)
+
+    def indexer_client(self, client_id):
+        """Réindexe les factures d'un client (nom ou email modifié)."""
+        from .models import Facture
+        ids = Facture.objects.using(self.using).filter(client_id=client_id).order_by('pk')
+        dernier = 0
+        while True:
+            lot = list(ids.filter(pk__gt=dernier).values_list('pk', flat=True)[:TAILLE_LOT])
+            if not lot:
+                return
+            self.indexer(lot)
+            dernier = lot[-1]
+
+    def reconstruire(self, taille_lot=TAILLE_LOT):
+        """
+        Reconstruit entièrement l'index, par tranches d'identifiants.
+
+        Returns:
+            int: Nombre de factures indexées
+        """
+        self.desinstaller()
+        self.installer()
+        with connections[self.using].cursor() as curseur:
+            curseur.execute(f'SELECT MIN(id), MAX(id) FROM {TABLE_FACTURE}')
+            minimum, maximum = curseur.fetchone()
+        total = 0
+        if minimum is None:
+            return total
+        for debut in range(minimum, maximum + 1, taille_lot):
+            total += self._executer(
+                self.sql_insertion('f.id >= %s AND f.id < %s'), (debut, debut + taille_lot)
+            )
+        return total
+
+
+class RechercheSQLite(_RecherchePleinTexte):
+    """
+    Moteur SQLite : table virtuelle FTS5, rowid = id de la facture.
+
+    Le tokenizer unicode61 avec remove_diacritics 2 ignore la casse et les
+    accents, à l'indexation comme à la recherche. La pertinence est le score
+    bm25 (négatif, plus petit = meilleur), le numéro pesant le plus.
+    """
+
+    table = 'django_exo_1_facture_fts'
+    COLONNE_ID = 'rowid'
+    SQL_CORRESPONDANCES = f'SELECT rowid FROM {table} WHERE {table} MATCH %s'
+    SQL_PERTINENCE = (
+        f'SELECT bm25({table}, 10.0, 5.0, 3.0, 1.0) FROM {table} '
+        f'WHERE {table} MATCH %s AND {table}.rowid = {TABLE_FACTURE}.id'
+    )
+
+    def sql_insertion(self, condition):
+        return (
+            f'INSERT INTO {self.table} (rowid, numero, client_nom, client_email, description) '
+            f'{self.SELECT_SOURCE} WHERE {condition}'
+        )
+
+    def requete(self, liste_mots):
+        """Requête FTS5 : chaque mot comme préfixe, tous requis."""
+        if not liste_mots:
+            return None
+        return ' '.join(f'"{mot}"*' for mot in liste_mots)
+
+    def installer(self):
+        self._executer(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5('
+            f'numero, client_nom, client_email, description, '
+            f"tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def desinstaller(self):
+        self._executer(f'DROP TABLE IF EXISTS {self.table}')
+
+
+class RecherchePostgreSQL(_RecherchePleinTexte):
+    """
+    Moteur PostgreSQL : table (facture_id, document tsvector) + index GIN.
+
+    Le document est construit avec la configuration 'french' (racinisation)
+    après unaccent() ; le numéro et le client ont un poids supérieur à la
+    description. La pertinence est l'opposé de ts_rank_cd (plus petit =
+    meilleur, comme avec SQLite).
+    """
+
+    table = 'django_exo_1_facture_recherche'
+    COLONNE_ID = 'facture_id'
+    # Construit le tsvector pondéré à partir du SELECT source
+    SELECT_DOCUMENT = (
+        "SELECT s.id, "
+        "setweight(to_tsvector('french', unaccent(coalesce(s.numero, ''))), 'A') || "
+        "setweight(to_tsvector('french', unaccent(coalesce(s.nom, '') || ' ' || coalesce(s.email, ''))), 'B') || "
+        "setweight(to_tsvector('french', unaccent(coalesce(s.description, ''))), 'C') "
+    )
+    SQL_CORRESPONDANCES = (
+        f"SELECT facture_id FROM {table} "
+        f"WHERE document @@ to_tsquery('french', unaccent(%s))"
+    )
+    SQL_PERTINENCE = (
+        f"SELECT -ts_rank_cd(document, to_tsquery('french', unaccent(%s))) FROM {table} "
+        f"WHERE {table}.facture_id = {TABLE_FACTURE}.id"
+    )
+
+    def requete(self, liste_mots):
+        """Requête tsquery : chaque mot comme préfixe (:*), tous requis."""
+        if not liste_mots:
+            return None
+        return ' & '.join(f'{mot}:*' for mot in liste_mots)
+
+    def sql_insertion(self, condition):
+        return (
+            f'INSERT INTO {self.table} (facture_id, document) {self.SELECT_DOCUMENT} '
+            f'FROM ({self.SELECT_SOURCE} WHERE {condition}) s (id, numero, nom, email, description)'
+        )
+
+    def installer(self):
+        self._executer('CREATE EXTENSION IF NOT EXISTS unaccent')
+        self._executer(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            f'facture_id bigint PRIMARY KEY REFERENCES {TABLE_FACTURE} (id) ON DELETE CASCADE, '
+            f'document tsvector NOT NULL)'
+        )
+        self._executer(
+            f'CREATE INDEX IF NOT EXISTS {self.table}_document_idx ON {self.table} USING GIN (document)'
+        )
+
+    def desinstaller(self):
+        self._executer(f'DROP TABLE IF EXISTS {self.table}')
+
+
+# Moteurs plein texte disponibles, par type de base (connection.vendor)
+MOTEURS = {
+    'sqlite': RechercheSQLite,
+    'postgresql': RecherchePostgreSQL,
+}
+
+
+def moteur(using='default'):
+    """
+    Retourne le moteur de recherche de la base donnée.
+
+    Le réglage FACTURES_RECHERCHE vaut 'auto' (défaut : moteur plein texte
+    de la base s'il existe) ou 'like' (filtres icontains).
+    """
+    choix = getattr(settings, 'FACTURES_RECHERCHE', 'auto')
+    vendor = connections[using].vendor
+    if choix == 'like' or vendor not in MOTEURS:
+        return RechercheLike(using)
+    return MOTEURS[vendor](using)
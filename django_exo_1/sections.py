@@ -0,0 +1,77 @@
+"""
+Calcul concurrent des sections indépendantes d'une page (dashboard, accueil).
+
+Sous ASGI, chaque section (fonction synchrone qui interroge l'ORM) est
+exécutée dans un pool de threads borné et les sections sont attendues
+ensemble : la latence de la page est celle de la section la plus lente et
+non la somme de toutes. Chaque thread utilise sa propre connexion à la base.
+
+Sous WSGI (ou si FACTURES_SECTIONS_CONCURRENTES vaut False), les sections
+sont calculées l'une après l'autre dans le thread de la requête.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+
+# Nombre de threads par défaut du pool (réglage FACTURES_SECTIONS_MAX_THREADS)
+MAX_THREADS = 4
+
+_executeur = None
+_verrou_executeur = threading.Lock()
+
+
+def _pool():
+    """Retourne le pool de threads partagé, créé au premier appel."""
+    global _executeur
+    with _verrou_executeur:
+        if _executeur is None:
+            _executeur = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'FACTURES_SECTIONS_MAX_THREADS', MAX_THREADS),
+                thread_name_prefix='sections',
+            )
+    return _executeur
+
+
+def concurrent(request):
+    """Indique si les sections de cette requête peuvent être calculées en parallèle."""
+    return getattr(settings, 'FACTURES_SECTIONS_CONCURRENTES', True) and isinstance(request, ASGIRequest)
+
+
+def _executer(calcul):
+    """Exécute une section dans un thread du pool puis libère sa connexion."""
+    try:
+        return calcul()
+    finally:
+        close_old_connections()
+
+
+def _sequentiel(sections):
+    """Calcule les sections l'une après l'autre."""
+    return {nom: calcul() for nom, calcul in sections.items()}
+
+
+async def calculer(request, sections):
+    """
+    Calcule des sections indépendantes, en parallèle si possible.
+    
+    Args:
+        request: Requête HTTP (ASGIRequest pour le mode concurrent)
+        sections: dict {nom: fonction synchrone sans argument}
+        
+    Returns:
+        dict: {nom: résultat de la section}
+    """
+    if not concurrent(request):
+        return await sync_to_async(_sequentiel)(sections)
+    boucle = asyncio.get_running_loop()
+    resultats = await asyncio.gather(*(
+        boucle.run_in_executor(_pool(), _executer, calcul)
+        for calcul in sections.values()
+    ))
+    return dict(zip(sections, resultats))
@@ -0,0 +1,357 @@
+"""
+Signaux de maintenance des données dérivées des factures.
+
+Ce module tient à jour les données calculées à partir des factures
+(agrégats journaliers, compteurs des clients, cache versionné des
+statistiques...) quelle que soit la voie d'écriture utilisée : save(),
+delete() ou QuerySet.update().
+
+Les récepteurs sont connectés au démarrage par DjangoExo1Config.ready().
+"""
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+from . import autocompletion, cache
+from .models import (
+    CategorieFacture, Changement, Client, ClientQuerySet, Facture, FactureQuerySet, LogCreationFacture,
+    StatistiqueJournaliere,
+)
+from .recherche import moteur as moteur_recherche
+
+# Envoyé par FactureQuerySet.update() après une mise à jour en masse.
+# Arguments : avant (liste de dicts FactureQuerySet.CHAMPS_SUIVIS relevés
+# avant la mise à jour), champs (noms des champs modifiés), using (base).
+factures_mises_a_jour = Signal()
+
+# Envoyé par FactureQuerySet.bulk_create() après une création en masse.
+# Arguments : factures (instances créées ; pk peut être None si la base ne
+# renvoie pas les identifiants), using (base).
+factures_creees = Signal()
+
+# Envoyé par FactureQuerySet.supprimer_par_statut() après une suppression en
+# masse. Arguments : avant (liste de dicts FactureQuerySet.CHAMPS_SUIVIS des
+# factures supprimées), using (base).
+factures_supprimees = Signal()
+
+# Envoyé par ClientQuerySet.update() après une mise à jour en masse.
+# Arguments : champs (noms des champs modifiés), pks (identifiants des
+# clients mis à jour), using (base).
+clients_mis_a_jour = Signal()
+
+# Taille des lots de clés primaires relues après une mise à jour en masse
+TAILLE_LOT_PKS = 500
+
+
+def _cle_agregat(etat):
+    """Retourne le couple (jour, categorie_id) d'un état de facture."""
+    return (etat['date_emission'], etat['categorie_id'])
+
+
+def _etats_actuels(pks):
+    """Relit par lots l'état courant (CHAMPS_SUIVIS) des factures données."""
+    etats = []
+    for i in range(0, len(pks), TAILLE_LOT_PKS):
+        etats.extend(
+            Facture.objects.filter(pk__in=pks[i:i + TAILLE_LOT_PKS])
+            .order_by().values(*FactureQuerySet.CHAMPS_SUIVIS)
+        )
+    return etats
+
+
+@receiver(pre_save, sender=Facture)
+def memoriser_etat_precedent(sender, instance, raw=False, **kwargs):
+    """
+    Mémorise l'état en base d'une facture existante avant sa sauvegarde.
+    
+    Permet de mettre à jour aussi les données de l'ancien jour, de l'ancienne
+    catégorie ou de l'ancien client lorsque ceux-ci changent.
+    """
+    instance._etat_precedent = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._etat_precedent = (
+        sender.objects.filter(pk=instance.pk)
+        .order_by().values(*FactureQuerySet.CHAMPS_SUIVIS).first()
+    )
+
+
+def _etat_instance(instance):
+    """Retourne l'état courant (CHAMPS_SUIVIS) d'une instance de facture."""
+    return {champ: getattr(instance, champ) for champ in FactureQuerySet.CHAMPS_SUIVIS}
+
+
+@receiver(post_save, sender=Facture)
+def statistiques_apres_sauvegarde(sender, instance, raw=False, **kwargs):
+    """Recalcule les agrégats journaliers touchés par une sauvegarde."""
+    if raw:
+        return
+    cles = {_cle_agregat(_etat_instance(instance))}
+    precedent = getattr(instance, '_etat_precedent', None)
+    if precedent:
+        cles.add(_cle_agregat(precedent))
+    StatistiqueJournaliere.objects.recalculer(cles)
+
+
+@receiver(post_delete, sender=Facture)
+def statistiques_apres_suppression(sender, instance, **kwargs):
+    """Recalcule les agrégats journaliers après la suppression d'une facture."""
+    StatistiqueJournaliere.objects.recalculer({_cle_agregat(_etat_instance(instance))})
+
+
+@receiver(factures_mises_a_jour, sender=Facture)
+def statistiques_apres_mise_a_jour(sender, avant, champs, **kwargs):
+    """
+    Recalcule les agrégats journaliers après un QuerySet.update().
+    
+    Les nouvelles clés ne sont relues que si la mise à jour a pu déplacer
+    des factures vers un autre jour ou une autre catégorie.
+    """
+    cles = {_cle_agregat(etat) for etat in avant}
+    if champs & {'date_emission', 'categorie', 'categorie_id'}:
+        pks = [etat['pk'] for etat in avant]
+        cles.update(_cle_agregat(etat) for etat in _etats_actuels(pks))
+    StatistiqueJournaliere.objects.recalculer(cles)
+
+
+@receiver(factures_supprimees, sender=Facture)
+def statistiques_apres_suppression_en_masse(sender, avant, **kwargs):
+    """Recalcule les agrégats journaliers touchés par une suppression en masse."""
+    StatistiqueJournaliere.objects.recalculer({_cle_agregat(etat) for etat in avant})
+
+
+@receiver(factures_creees, sender=Facture)
+def statistiques_apres_creation(sender, factures, **kwargs):
+    """Recalcule les agrégats journaliers touchés par une création en masse."""
+    StatistiqueJournaliere.objects.recalculer(
+        {(facture.date_emission, facture.categorie_id) for facture in factures}
+    )
+
+
+@receiver(post_save, sender=Facture)
+def compteurs_clients_apres_sauvegarde(sender, instance, raw=False, **kwargs):
+    """Recalcule les compteurs du client (et de l'ancien client) de la facture."""
+    if raw:
+        return
+    client_ids = {instance.client_id}
+    precedent = getattr(instance, '_etat_precedent', None)
+    if precedent:
+        client_ids.add(precedent['client_id'])
+    Client.objects.recalculer_compteurs(client_ids)
+
+
+@receiver(post_delete, sender=Facture)
+def compteurs_clients_apres_suppression(sender, instance, **kwargs):
+    """Recalcule les compteurs du client d'une facture supprimée."""
+    Client.objects.recalculer_compteurs({instance.client_id})
+
+
+@receiver(factures_mises_a_jour, sender=Facture)
+def compteurs_clients_apres_mise_a_jour(sender, avant, champs, **kwargs):
+    """Recalcule les compteurs des clients touchés par un QuerySet.update()."""
+    client_ids = {etat['client_id'] for etat in avant}
+    if champs & {'client', 'client_id'}:
+        pks = [etat['pk'] for etat in avant]
+        client_ids.update(etat['client_id'] for etat in _etats_actuels(pks))
+    Client.objects.recalculer_compteurs(client_ids)
+
+
+@receiver(factures_supprimees, sender=Facture)
+def compteurs_clients_apres_suppression_en_masse(sender, avant, **kwargs):
+    """Recalcule les compteurs des clients des factures supprimées en masse."""
+    Client.objects.recalculer_compteurs({etat['client_id'] for etat in avant})
+
+
+@receiver(factures_creees, sender=Facture)
+def compteurs_clients_apres_creation(sender, factures, **kwargs):
+    """Recalcule les compteurs des clients des factures créées en masse."""
+    Client.objects.recalculer_compteurs({facture.client_id for facture in factures})
+
+
+@receiver(post_save, sender=Facture)
+@receiver(post_delete, sender=Facture)
+@receiver(factures_mises_a_jour, sender=Facture)
+@receiver(factures_creees, sender=Facture)
+@receiver(factures_supprimees, sender=Facture)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(clients_mis_a_jour, sender=Client)
+@receiver(post_save, sender=CategorieFacture)
+@receiver(post_delete, sender=CategorieFacture)
+@receiver(post_save, sender=LogCreationFacture)
+@receiver(post_delete, sender=LogCreationFacture)
+def invalider_cache_statistiques(sender, using=None, **kwargs):
+    """Invalide le cache des statistiques (et des nombres de lignes des listes) après toute écriture."""
+    cache.invalider(using=using)
+
+
+@receiver(post_save, sender=Facture)
+def invalider_historique_apres_sauvegarde(sender, instance, raw=False, using=None, **kwargs):
+    """Invalide les périodes closes des séries si la facture y appartient."""
+    jours = {instance.date_emission}
+    precedent = getattr(instance, '_etat_precedent', None)
+    if precedent:
+        jours.add(precedent['date_emission'])
+    cache.invalider_historique(jours, using=using)
+
+
+@receiver(post_delete, sender=Facture)
+def invalider_historique_apres_suppression(sender, instance, using=None, **kwargs):
+    """Invalide les périodes closes des séries si la facture y appartenait."""
+    cache.invalider_historique({instance.date_emission}, using=using)
+
+
+@receiver(factures_creees, sender=Facture)
+def invalider_historique_apres_creation(sender, factures, using=None, **kwargs):
+    """Invalide les périodes closes des séries touchées par une création en masse."""
+    cache.invalider_historique({facture.date_emission for facture in factures}, using=using)
+
+
+@receiver(factures_supprimees, sender=Facture)
+def invalider_historique_apres_suppression_en_masse(sender, avant, using=None, **kwargs):
+    """Invalide les périodes closes des séries touchées par une suppression en masse."""
+    cache.invalider_historique({etat['date_emission'] for etat in avant}, using=using)
+
+
+@receiver(factures_mises_a_jour, sender=Facture)
+def invalider_historique_apres_mise_a_jour(sender, avant, champs, using=None, **kwargs):
+    """
+    Invalide les périodes closes touchées par un QuerySet.update().
+    
+    Si la date d'émission elle-même est modifiée, les nouvelles dates ne sont
+    pas relues : toutes les granularités sont invalidées.
+    """
+    if 'date_emission' in champs:
+        cache.invalider_historique(None, using=using)
+    else:
+        cache.invalider_historique({etat['date_emission'] for etat in avant}, using=using)
+
+
+# Champs de facture indexés par la recherche plein texte
+CHAMPS_RECHERCHE_FACTURE = {'numero', 'description', 'client', 'client_id'}
+
+
+@receiver(post_save, sender=Facture)
+def indexer_recherche_apres_sauvegarde(sender, instance, raw=False, using=None, **kwargs):
+    """Réindexe une facture sauvegardée dans la recherche plein texte."""
+    if raw:
+        return
+    moteur_recherche(using).indexer([instance.pk])
+
+
+@receiver(post_delete, sender=Facture)
+def indexer_recherche_apres_suppression(sender, instance, using=None, **kwargs):
+    """Retire une facture supprimée de la recherche plein texte."""
+    moteur_recherche(using).supprimer([instance.pk])
+
+
+@receiver(factures_supprimees, sender=Facture)
+def indexer_recherche_apres_suppression_en_masse(sender, avant, using=None, **kwargs):
+    """Retire les factures supprimées en masse de la recherche plein texte."""
+    moteur_recherche(using).supprimer([etat['pk'] for etat in avant])
+
+
+@receiver(factures_mises_a_jour, sender=Facture)
+def indexer_recherche_apres_mise_a_jour(sender, avant, champs, using=None, **kwargs):
+    """Réindexe les factures dont un champ indexé a été modifié en masse."""
+    if champs & CHAMPS_RECHERCHE_FACTURE:
+        moteur_recherche(using).indexer([etat['pk'] for etat in avant])
+
+
+@receiver(factures_creees, sender=Facture)
+def indexer_recherche_apres_creation(sender, factures, using=None, **kwargs):
+    """Indexe les factures créées en masse (identifiants relus si la base ne les renvoie pas)."""
+    pks = [facture.pk for facture in factures if facture.pk is not None]
+    numeros = [facture.numero for facture in factures if facture.pk is None]
+    for i in range(0, len(numeros), TAILLE_LOT_PKS):
+        pks.extend(
+            Facture.objects.using(using).filter(numero__in=numeros[i:i + TAILLE_LOT_PKS])
+            .values_list('pk', flat=True)
+        )
+    moteur_recherche(using).indexer(pks)
+
+
+@receiver(pre_save, sender=Client)
+def memoriser_champs_recherche_client(sender, instance, raw=False, **kwargs):
+    """Mémorise le nom et l'email en base d'un client avant sa sauvegarde."""
+    instance._champs_recherche_precedents = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._champs_recherche_precedents = (
+        sender.objects.filter(pk=instance.pk).values_list(*ClientQuerySet.CHAMPS_RECHERCHE).first()
+    )
+
+
+@receiver(post_save, sender=Client)
+def indexer_recherche_apres_sauvegarde_client(sender, instance, created=False, raw=False, using=None, **kwargs):
+    """Réindexe les factures d'un client dont le nom ou l'email a changé."""
+    precedents = getattr(instance, '_champs_recherche_precedents', None)
+    if raw or created or precedents is None:
+        return
+    actuels = tuple(getattr(instance, champ) for champ in ClientQuerySet.CHAMPS_RECHERCHE)
+    if actuels != precedents:
+        moteur_recherche(using).indexer_client(instance.pk)
+
+
+@receiver(clients_mis_a_jour, sender=Client)
+def indexer_recherche_apres_mise_a_jour_clients(sender, champs, pks=None, using=None, **kwargs):
+    """Réindexe les factures des clients dont le nom ou l'email a été modifié en masse."""
+    if not champs & set(ClientQuerySet.CHAMPS_RECHERCHE):
+        return
+    moteur = moteur_recherche(using)
+    for pk in pks or ():
+        moteur.indexer_client(pk)
+
+
+@receiver(post_save, sender=Client)
+def autocompletion_apres_sauvegarde_client(sender, instance, raw=False, using=None, **kwargs):
+    """Met à jour l'index d'autocomplétion après la sauvegarde d'un client."""
+    autocompletion.client_modifie(instance, using=using)
+
+
+@receiver(post_delete, sender=Client)
+def autocompletion_apres_suppression_client(sender, instance, using=None, **kwargs):
+    """Retire un client supprimé de l'index d'autocomplétion."""
+    autocompletion.client_supprime(instance.pk, using=using)
+
+
+@receiver(clients_mis_a_jour, sender=Client)
+def autocompletion_apres_mise_a_jour_clients(sender, champs, using=None, **kwargs):
+    """Invalide l'index d'autocomplétion si un champ indexé a été modifié en masse."""
+    if champs & set(autocompletion.CHAMPS):
+        autocompletion.clients_modifies_en_masse(using=using)
+
+
+# Journal des changements (synchronisation incrémentale) : écrit dans la
+# transaction de l'écriture, voir ChangementManager.journaliser()
+
+@receiver(post_save, sender=Facture)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Facture)
+@receiver(post_delete, sender=Client)
+def journaliser_ecriture(sender, instance, using=None, **kwargs):
+    """Journalise la création, la modification ou la suppression d'une facture ou d'un client."""
+    Changement.objects.journaliser(sender._meta.model_name, [instance.pk], using=using)
+
+
+@receiver(factures_mises_a_jour, sender=Facture)
+@receiver(factures_supprimees, sender=Facture)
+def journaliser_factures_en_masse(sender, avant, using=None, **kwargs):
+    """Journalise les factures mises à jour ou supprimées en masse."""
+    Changement.objects.journaliser('facture', [etat['pk'] for etat in avant], using=using)
+
+
+@receiver(factures_creees, sender=Facture)
+def journaliser_creation_factures(sender, factures, using=None, **kwargs):
+    """Journalise les factures créées en masse (relues par numéro si la base ne renvoie pas les identifiants)."""
+    Changement.objects.journaliser('facture', [facture.pk for facture in factures], using=using)
+    sans_pk = [facture.numero for facture in factures if facture.pk is None]
+    if sans_pk:
+        Changement.objects.journaliser_requete(
+            'facture', Facture.objects.using(using).filter(numero__in=sans_pk)
+        )
+
+
+@receiver(clients_mis_a_jour, sender=Client)
+def journaliser_clients_en_masse(sender, pks, using=None, **kwargs):
+    """Journalise les clients mis à jour en masse."""
+    Changement.objects.journaliser('client', pks, using=using)
@@ -0,0 +1,280 @@
+"""
+Actions de lot sur les factures, dans la requête web ou en arrière-plan.
+
+Une action (changement de statut, de catégorie ou d'échéance, suppression
+des brouillons, export) est préparée par preparer_action() : ses règles
+sont ajoutées aux filtres du QuerySet, donc à la clause WHERE des UPDATE et
+DELETE. facture_bulk_action l'applique directement par tranches
+d'identifiants tant que la sélection reste sous le seuil
+FACTURES_ACTIONS_SEUIL_TACHE.
+
+Au-delà, creer_tache() fige la sélection en tranches (TrancheTache) et la
+commande traiter_taches les traite en arrière-plan, sans broker : la table
+des tranches sert de file d'attente. Chaque tranche est réservée avec
+select_for_update(skip_locked=True) et traitée dans la même transaction,
+ce qui permet plusieurs workers et la reprise après un arrêt (une tranche
+interrompue n'est pas marquée traitée et sera reprise).
+"""
+
+import csv
+import io
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import CategorieFacture, Facture, TacheLot, TrancheTache
+
+# Actions de changement de statut : {action: statut cible}
+ACTIONS_STATUT = {
+    'mark_sent': 'envoyee',
+    'mark_paid': 'payee',
+    'cancel': 'annulee',
+}
+
+# Libellés des actions de lot, pour les messages
+LIBELLES_ACTIONS = {
+    'mark_sent': 'marquée(s) comme envoyée(s)',
+    'mark_paid': 'marquée(s) comme payée(s)',
+    'cancel': 'annulée(s)',
+    'recategorize': 'recatégorisée(s)',
+    'change_due_date': 'avec une nouvelle échéance',
+    'delete_drafts': 'supprimée(s)',
+    'export': 'exportée(s)',
+}
+
+# Paramètres POST conservés avec une tâche
+PARAMETRES_ACTIONS = ('categorie', 'date_echeance')
+
+# Largeur des tranches (réglage FACTURES_ACTIONS_TRANCHE)
+TAILLE_TRANCHE = 1000
+
+# Taille de sélection au-delà de laquelle une tâche est créée
+# (réglage FACTURES_ACTIONS_SEUIL_TACHE)
+SEUIL_TACHE = 5000
+
+# Nombre de tranches créées par insertion groupée
+TAILLE_LOT_TRANCHES = 100
+
+
+def taille_tranche():
+    """Largeur des tranches d'identifiants traitées par transaction."""
+    return getattr(settings, 'FACTURES_ACTIONS_TRANCHE', TAILLE_TRANCHE)
+
+
+def seuil_tache():
+    """Taille de sélection au-delà de laquelle l'action passe en arrière-plan."""
+    return getattr(settings, 'FACTURES_ACTIONS_SEUIL_TACHE', SEUIL_TACHE)
+
+
+def preparer_action(action, factures, parametres):
+    """
+    Prépare une action de lot.
+
+    Les règles de l'action (transitions de statut, factures modifiables)
+    sont ajoutées aux filtres : elles font partie de la clause WHERE des
+    UPDATE et DELETE.
+
+    Args:
+        action: Nom de l'action
+        factures: QuerySet des factures visées
+        parametres: Paramètres de l'action (categorie, date_echeance)
+
+    Returns:
+        tuple: (QuerySet restreint, valeurs à mettre à jour ; None pour une
+        suppression ou un export)
+
+    Raises:
+        ValueError: Action inconnue ou paramètre invalide (message affichable)
+    """
+    if action in ACTIONS_STATUT:
+        statut = ACTIONS_STATUT[action]
+        return factures.vers_statut(statut), {'statut': statut}
+    if action == 'recategorize':
+        categorie_id = str(parametres.get('categorie', ''))
+        if not categorie_id.isdigit() or not CategorieFacture.objects.filter(pk=categorie_id).exists():
+            raise ValueError('Catégorie invalide.')
+        return factures.exclude(categorie_id=categorie_id), {'categorie_id': int(categorie_id)}
+    if action == 'change_due_date':
+        try:
+            echeance = parse_date(parametres.get('date_echeance', ''))
+        except ValueError:
+            echeance = None
+        if echeance is None:
+            raise ValueError("Date d'échéance invalide.")
+        # L'échéance ne peut précéder l'émission ; factures soldées exclues
+        return (
+            factures.non_payees().filter(date_emission__lte=echeance).exclude(date_echeance=echeance),
+            {'date_echeance': echeance}
+        )
+    if action == 'delete_drafts':
+        return factures.brouillons(), None
+    if action == 'export':
+        return factures, None
+    raise ValueError('Action non reconnue.')
+
+
+def appliquer(action, factures, valeurs):
+    """
+    Applique une action préparée à un QuerySet (une tranche).
+
+    Returns:
+        dict: {statut: nombre de factures traitées}
+    """
+    if action == 'delete_drafts':
+        return factures.supprimer_par_statut()
+    return factures.update_par_statut(**valeurs)
+
+
+def appliquer_par_tranches(action, factures, valeurs):
+    """
+    Applique une action préparée, une transaction par tranche d'identifiants.
+
+    Returns:
+        dict: {statut: nombre de factures traitées}
+    """
+    nombres = {}
+    for tranche in factures.par_tranches(taille_tranche()):
+        for statut, nombre in appliquer(action, tranche, valeurs).items():
+            nombres[statut] = nombres.get(statut, 0) + nombre
+    return nombres
+
+
+def lignes_csv(factures):
+    """
+    Lignes CSV (sans en-tête) des factures d'un QuerySet, dans l'ordre des factures.
+
+    Returns:
+        tuple: (texte CSV, {statut: nombre de lignes})
+    """
+    statuts = dict(Facture.STATUT_CHOICES)
+    tampon = io.StringIO()
+    writer = csv.writer(tampon, delimiter=';')
+    nombres = {}
+    for ligne in factures.pour_export():
+        writer.writerow(ligne.valeurs_csv(statuts))
+        nombres[ligne.statut] = nombres.get(ligne.statut, 0) + 1
+    return tampon.getvalue(), nombres
+
+
+def creer_tache(action, factures, parametres):
+    """
+    Enregistre une tâche de lot : la sélection est figée en tranches.
+
+    Les identifiants sont lus une fois, dans l'ordre des identifiants (ordre
+    d'affichage pour un export), et répartis en tranches de taille_tranche()
+    factures. Les règles de l'action sont réappliquées à chaque tranche au
+    moment du traitement.
+
+    Args:
+        action: Nom de l'action
+        factures: QuerySet préparé par preparer_action()
+        parametres: Paramètres de l'action (sérialisables en JSON)
+
+    Returns:
+        TacheLot: Tâche créée (terminée d'emblée si la sélection est vide)
+    """
+    ordre = Facture._meta.ordering + ['pk'] if action == 'export' else ['pk']
+    identifiants = factures.order_by(*ordre).values_list('pk', flat=True)
+    taille = taille_tranche()
+
+    with transaction.atomic():
+        tache = TacheLot.objects.create(action=action, parametres=parametres)
+        tranches, lot = [], []
+        nb_factures = nb_tranches = 0
+        for pk in identifiants.iterator(chunk_size=taille):
+            lot.append(pk)
+            if len(lot) == taille:
+                tranches.append(TrancheTache(tache=tache, position=nb_tranches, ids=lot))
+                nb_factures += len(lot)
+                nb_tranches += 1
+                lot = []
+                if len(tranches) == TAILLE_LOT_TRANCHES:
+                    TrancheTache.objects.bulk_create(tranches)
+                    tranches = []
+        if lot:
+            tranches.append(TrancheTache(tache=tache, position=nb_tranches, ids=lot))
+            nb_factures += len(lot)
+            nb_tranches += 1
+        TrancheTache.objects.bulk_create(tranches)
+
+        tache.nb_factures = nb_factures
+        tache.nb_tranches = nb_tranches
+        if not nb_tranches:
+            tache.statut = 'terminee'
+            tache.date_fin = timezone.now()
+        tache.save(update_fields=['nb_factures', 'nb_tranches', 'statut', 'date_fin'])
+    return tache
+
+
+def traiter_tranche(tranche):
+    """
+    Traite une tranche réservée (dans la transaction de la réservation).
+
+    Le résultat est enregistré avec la tranche : il n'est visible, comme les
+    modifications des factures, qu'une fois la transaction validée.
+    """
+    tache = tranche.tache
+    factures = Facture.objects.filter(pk__in=tranche.ids)
+    if tache.action == 'export':
+        tranche.contenu, tranche.resultats = lignes_csv(factures.order_by(*Facture._meta.ordering, 'pk'))
+    else:
+        factures, valeurs = preparer_action(tache.action, factures, tache.parametres)
+        tranche.resultats = appliquer(tache.action, factures, valeurs)
+    tranche.terminee = True
+    tranche.save(update_fields=['contenu', 'resultats', 'terminee'])
+
+
+def traiter_tranche_suivante():
+    """
+    Réserve et traite la prochaine tranche en attente.
+
+    Une erreur pendant le traitement annule la transaction de la tranche et
+    marque la tâche échouée (reprendre() la remet en file).
+
+    Returns:
+        TrancheTache ou None: Tranche traitée, None si la file est vide
+
+    Raises:
+        Exception: Erreur de traitement, après l'échec de la tâche enregistré
+    """
+    debut = timezone.now()
+    tranche = None
+    try:
+        with transaction.atomic():
+            tranche = TrancheTache.objects.reserver()
+            if tranche is None:
+                return None
+            traiter_tranche(tranche)
+    except Exception as exc:
+        if tranche is not None:
+            TacheLot.objects.filter(pk=tranche.tache_id).update(
+                statut='echouee', erreur=str(exc) or exc.__class__.__name__, date_fin=timezone.now()
+            )
+        raise
+
+    # Après validation : les tranches des autres workers validées avant
+    # celle-ci sont visibles, la dernière validée termine la tâche
+    TacheLot.objects.filter(pk=tranche.tache_id, statut='en_attente').update(
+        statut='en_cours', date_debut=debut
+    )
+    TacheLot.objects.filter(pk=tranche.tache_id, statut='en_cours').exclude(
+        tranches__terminee=False
+    ).update(statut='terminee', date_fin=timezone.now())
+    return tranche
+
+
+def reprendre(tache):
+    """
+    Remet une tâche échouée en file d'attente.
+
+    Les tranches déjà traitées le restent : seules les autres sont reprises.
+
+    Returns:
+        bool: True si la tâche a été remise en file
+    """
+    return bool(
+        TacheLot.objects.filter(pk=tache.pk, statut='echouee')
+        .update(statut='en_attente', erreur='', date_fin=None)
+    )
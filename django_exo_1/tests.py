@@ -1,11 +1,16 @@
-from django.test import TestCase, Client as TestClient
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client as TestClient, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.utils import timezone
 from decimal import Decimal
 from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
-from .models import Client, Facture, CategorieFacture
+from .models import Client, Facture, CategorieFacture, StatistiqueJournaliere, ClientQuerySet, Changement
 
 
 class FactureModelTest(TestCase):
@@ -549,3 +554,2393 @@ class FactureBulkActionTest(TestCase):
         # Vérification que la facture reste inchangée
         self.facture_deja_payee.refresh_from_db()
         self.assertEqual(self.facture_deja_payee.statut, 'payee')
+
+
+class FactureStatistiquesTest(TestCase):
+    """
+    Tests pour le moteur de statistiques FactureManager.statistiques().
+    
+    Teste :
+    - Le calcul de toutes les statistiques en une seule requête
+    - Le filtrage par client, période ou QuerySet préfiltré
+    """
+    
+    def setUp(self):
+        """
+        Configuration initiale : deux clients et des factures de chaque statut.
+        """
+        self.client_a = Client.objects.create(
+            nom="Client Stats A",
+            email="a@stats.com",
+            adresse="1 Rue Stats",
+            code_postal="75001",
+            ville="Paris"
+        )
+        self.client_b = Client.objects.create(
+            nom="Client Stats B",
+            email="b@stats.com",
+            adresse="2 Rue Stats",
+            code_postal="75002",
+            ville="Paris"
+        )
+        self.categorie = CategorieFacture.objects.create(nom="Stats")
+        
+        donnees = [
+            ("FAC-STAT-001", self.client_a, 'payee', Decimal('100.00'), 40),
+            ("FAC-STAT-002", self.client_a, 'envoyee', Decimal('200.00'), 10),
+            ("FAC-STAT-003", self.client_a, 'brouillon', Decimal('300.00'), 0),
+            ("FAC-STAT-004", self.client_b, 'annulee', Decimal('400.00'), 5),
+            ("FAC-STAT-005", self.client_b, 'payee', Decimal('500.00'), 60),
+        ]
+        for numero, client, statut, montant_ht, anciennete in donnees:
+            Facture.objects.create(
+                numero=numero,
+                date_emission=date.today() - timedelta(days=anciennete),
+                date_echeance=date.today() - timedelta(days=anciennete) + timedelta(days=30),
+                client=client,
+                montant_ht=montant_ht,
+                taux_tva=Decimal('20.00'),
+                categorie=self.categorie,
+                statut=statut,
+                description="Facture statistiques"
+            )
+    
+    def test_statistiques_globales_en_une_requete(self):
+        """
+        Vérifie les valeurs calculées et qu'une seule requête est exécutée.
+        """
+        with self.assertNumQueries(1):
+            stats = Facture.objects.statistiques()
+        
+        self.assertEqual(stats['total'], 5)
+        self.assertEqual(stats['payees'], 2)
+        self.assertEqual(stats['en_attente'], 1)
+        self.assertEqual(stats['brouillons'], 1)
+        self.assertEqual(stats['annulees'], 1)
+        self.assertEqual(stats['en_retard'], 2)
+        self.assertEqual(stats['chiffre_affaires'], Decimal('720.00'))
+    
+    def test_statistiques_par_client(self):
+        """
+        Vérifie le filtrage des statistiques sur un client.
+        """
+        stats = Facture.objects.statistiques(client=self.client_a)
+        
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['payees'], 1)
+        self.assertEqual(stats['chiffre_affaires'], Decimal('120.00'))
+    
+    def test_statistiques_par_periode_et_queryset(self):
+        """
+        Vérifie le filtrage par période et sur un QuerySet préfiltré.
+        """
+        stats = Facture.objects.statistiques(
+            date_debut=date.today() - timedelta(days=15),
+            date_fin=date.today()
+        )
+        self.assertEqual(stats['total'], 3)
+        
+        stats = Facture.objects.statistiques(queryset=Facture.objects.non_payees())
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['chiffre_affaires'], 0)
+
+
+class StatistiqueJournaliereTest(TestCase):
+    """
+    Tests pour la table d'agrégats StatistiqueJournaliere.
+    
+    Teste la synchronisation des agrégats lors des créations, modifications,
+    suppressions et mises à jour en masse des factures.
+    """
+    
+    def setUp(self):
+        """
+        Configuration initiale : un client, deux catégories et deux factures.
+        """
+        self.client_obj = Client.objects.create(
+            nom="Client Agrégats",
+            email="agregats@test.com",
+            adresse="3 Rue Agrégats",
+            code_postal="75003",
+            ville="Paris"
+        )
+        self.services = CategorieFacture.objects.create(nom="Agrégats Services")
+        self.produits = CategorieFacture.objects.create(nom="Agrégats Produits")
+        self.jour = date.today() - timedelta(days=3)
+        
+        self.facture1 = self._creer_facture("FAC-AGG-001", 'envoyee', Decimal('100.00'))
+        self.facture2 = self._creer_facture("FAC-AGG-002", 'brouillon', Decimal('50.00'))
+    
+    def _creer_facture(self, numero, statut, montant_ht):
+        return Facture.objects.create(
+            numero=numero,
+            date_emission=self.jour,
+            date_echeance=self.jour + timedelta(days=30),
+            client=self.client_obj,
+            montant_ht=montant_ht,
+            taux_tva=Decimal('20.00'),
+            categorie=self.services,
+            statut=statut,
+            description="Facture agrégats"
+        )
+    
+    def _agregats(self):
+        return {
+            (ligne.categorie_id, ligne.statut): (ligne.nb_factures, ligne.total_ttc)
+            for ligne in StatistiqueJournaliere.objects.filter(jour=self.jour)
+        }
+    
+    def test_creation_et_modification(self):
+        """
+        Vérifie les agrégats après création puis changement de catégorie.
+        """
+        self.assertEqual(self._agregats(), {
+            (self.services.pk, 'envoyee'): (1, Decimal('120.00')),
+            (self.services.pk, 'brouillon'): (1, Decimal('60.00')),
+        })
+        
+        self.facture1.categorie = self.produits
+        self.facture1.save()
+        
+        self.assertEqual(self._agregats(), {
+            (self.produits.pk, 'envoyee'): (1, Decimal('120.00')),
+            (self.services.pk, 'brouillon'): (1, Decimal('60.00')),
+        })
+    
+    def test_mise_a_jour_en_masse_et_suppression(self):
+        """
+        Vérifie les agrégats après un update() en masse puis une suppression.
+        """
+        Facture.objects.filter(pk__in=[self.facture1.pk, self.facture2.pk]).update(statut='payee')
+        self.assertEqual(self._agregats(), {
+            (self.services.pk, 'payee'): (2, Decimal('180.00')),
+        })
+        
+        self.facture2.delete()
+        self.assertEqual(self._agregats(), {
+            (self.services.pk, 'payee'): (1, Decimal('120.00')),
+        })
+    
+    def test_statistiques_depuis_agregats(self):
+        """
+        Vérifie que les statistiques lues depuis les agrégats sont identiques.
+        """
+        self.facture1.statut = 'payee'
+        self.facture1.save()
+        
+        self.assertEqual(
+            Facture.objects.statistiques(agregats=True),
+            Facture.objects.statistiques()
+        )
+        ca = StatistiqueJournaliere.objects.ca_par_categorie()
+        self.assertEqual([(c.pk, c.ca) for c in ca], [(self.services.pk, Decimal('120.00'))])
+    
+    def test_commande_reconstruction(self):
+        """
+        Vérifie que la commande de reconstruction recrée les mêmes agrégats.
+        """
+        from django.core.management import call_command
+        from io import StringIO
+        
+        attendu = self._agregats()
+        StatistiqueJournaliere.objects.all().delete()
+        call_command('reconstruire_statistiques', '--jours-par-lot=1', stdout=StringIO())
+        
+        self.assertEqual(self._agregats(), attendu)
+
+
+class CacheStatistiquesTest(TestCase):
+    """
+    Tests pour le cache versionné des statistiques (cache.py).
+    
+    Teste la mise en cache, l'invalidation par les écritures et les compteurs.
+    """
+    
+    def setUp(self):
+        """
+        Vide le cache et crée un client et une catégorie.
+        """
+        from django.core.cache import cache as cache_django
+        cache_django.clear()
+        
+        self.client_obj = Client.objects.create(
+            nom="Client Cache",
+            email="cache@test.com",
+            adresse="4 Rue Cache",
+            code_postal="75004",
+            ville="Paris"
+        )
+        self.categorie = CategorieFacture.objects.create(nom="Cache")
+        self.facture = Facture.objects.create(
+            numero="FAC-CACHE-001",
+            date_emission=date.today(),
+            date_echeance=date.today() + timedelta(days=30),
+            client=self.client_obj,
+            montant_ht=Decimal('100.00'),
+            categorie=self.categorie,
+            statut='envoyee',
+            description="Facture cache"
+        )
+    
+    def test_valeur_servie_depuis_le_cache(self):
+        """
+        Vérifie que le second appel ne recalcule pas et compte un succès.
+        """
+        from . import cache
+        
+        appels = []
+        calcul = lambda: appels.append(1) or len(appels)
+        
+        self.assertEqual(cache.obtenir('test', calcul), 1)
+        self.assertEqual(cache.obtenir('test', calcul), 1)
+        self.assertEqual(len(appels), 1)
+        
+        compteurs = cache.compteurs()
+        self.assertEqual(compteurs['succes'], 1)
+        self.assertEqual(compteurs['echecs'], 1)
+    
+    def test_expiration_des_valeurs(self):
+        """
+        Vérifie que les valeurs expirent après FACTURES_CACHE_TIMEOUT secondes.
+        """
+        from . import cache
+        
+        with override_settings(FACTURES_CACHE_TIMEOUT=60), \
+                patch.object(cache._cache(), 'set', wraps=cache._cache().set) as enregistrer:
+            cache.obtenir('test', lambda: 1)
+        self.assertEqual(enregistrer.call_args.args[2], 60)
+    
+    def test_invalidation_par_les_ecritures(self):
+        """
+        Vérifie que save() et update() sur factures et clients invalident le cache.
+        """
+        from . import cache
+        
+        calcul = lambda: Facture.objects.statistiques()['payees']
+        self.assertEqual(cache.obtenir('payees', calcul), 0)
+        
+        Facture.objects.filter(pk=self.facture.pk).update(statut='payee')
+        self.assertEqual(cache.obtenir('payees', calcul), 1)
+        
+        version = cache.version()
+        self.client_obj.save()
+        self.assertGreater(cache.version(), version)
+        
+        version = cache.version()
+        Client.objects.filter(pk=self.client_obj.pk).update(ville="Lyon")
+        self.assertGreater(cache.version(), version)
+    
+    def test_vue_dashboard_utilise_le_cache(self):
+        """
+        Vérifie que le deuxième affichage du dashboard exécute moins de requêtes.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        url = reverse('django_exo_1:dashboard')
+        with CaptureQueriesContext(connection) as premier:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(second), len(premier))
+        self.assertEqual(response.context['stats']['en_attente'], 1)
+
+
+class CompteursClientTest(TestCase):
+    """
+    Tests pour les compteurs dénormalisés des clients.
+    
+    Teste la maintenance de nb_factures, ca_paye et encours sur toutes les
+    voies d'écriture des factures, le classement et la commande de réparation.
+    """
+    
+    def setUp(self):
+        """
+        Configuration initiale : deux clients, une catégorie et deux factures.
+        """
+        self.client_a = Client.objects.create(
+            nom="Client Compteurs A",
+            email="compteurs-a@test.com",
+            adresse="5 Rue Compteurs",
+            code_postal="75005",
+            ville="Paris"
+        )
+        self.client_b = Client.objects.create(
+            nom="Client Compteurs B",
+            email="compteurs-b@test.com",
+            adresse="6 Rue Compteurs",
+            code_postal="75006",
+            ville="Paris"
+        )
+        self.categorie = CategorieFacture.objects.create(nom="Compteurs")
+        self.facture1 = self._creer_facture("FAC-CPT-001", 'payee', Decimal('100.00'))
+        self.facture2 = self._creer_facture("FAC-CPT-002", 'envoyee', Decimal('50.00'))
+    
+    def _creer_facture(self, numero, statut, montant_ht):
+        return Facture.objects.create(
+            numero=numero,
+            date_emission=date.today(),
+            date_echeance=date.today() + timedelta(days=30),
+            client=self.client_a,
+            montant_ht=montant_ht,
+            taux_tva=Decimal('20.00'),
+            categorie=self.categorie,
+            statut=statut,
+            description="Facture compteurs"
+        )
+    
+    def _compteurs(self, client):
+        client.refresh_from_db()
+        return (client.nb_factures, client.ca_paye, client.encours)
+    
+    def test_creation_et_changement_de_client(self):
+        """
+        Vérifie les compteurs après création puis transfert vers un autre client.
+        """
+        self.assertEqual(self._compteurs(self.client_a), (2, Decimal('120.00'), Decimal('60.00')))
+        
+        self.facture2.client = self.client_b
+        self.facture2.save()
+        
+        self.assertEqual(self._compteurs(self.client_a), (1, Decimal('120.00'), Decimal('0')))
+        self.assertEqual(self._compteurs(self.client_b), (1, Decimal('0'), Decimal('60.00')))
+    
+    def test_date_modification_du_client_inchangee(self):
+        """
+        Vérifie que le recalcul des compteurs n'écrit que les colonnes des compteurs.
+        """
+        self.client_a.refresh_from_db()
+        date_modification = self.client_a.date_modification
+        
+        self._creer_facture("FAC-CPT-003", 'brouillon', Decimal('10.00'))
+        Facture.objects.filter(numero="FAC-CPT-001").update(statut='annulee')
+        
+        self.assertEqual(self._compteurs(self.client_a), (3, Decimal('0'), Decimal('72.00')))
+        self.assertEqual(self.client_a.date_modification, date_modification)
+    
+    def test_mise_a_jour_en_masse_et_suppression(self):
+        """
+        Vérifie les compteurs après un update() en masse puis une suppression.
+        """
+        Facture.objects.filter(client=self.client_a).non_payees().update(statut='payee')
+        self.assertEqual(self._compteurs(self.client_a), (2, Decimal('180.00'), Decimal('0')))
+        
+        self.facture1.delete()
+        self.assertEqual(self._compteurs(self.client_a), (1, Decimal('60.00'), Decimal('0')))
+    
+    def test_classement(self):
+        """
+        Vérifie le classement des clients par nombre de factures et par CA.
+        """
+        self.assertEqual(list(Client.objects.classement('nb_factures', 1)), [self.client_a])
+        self.assertEqual(
+            list(Client.objects.classement('ca_paye')),
+            [self.client_a, self.client_b]
+        )
+        with self.assertRaises(ValueError):
+            Client.objects.classement('nom')
+    
+    def test_commande_recalcul(self):
+        """
+        Vérifie que la commande de réparation recalcule des compteurs faussés.
+        """
+        from django.core.management import call_command
+        from io import StringIO
+        
+        Client.objects.filter(pk=self.client_a.pk).update(nb_factures=42, encours=0)
+        call_command('recalculer_compteurs_clients', '--taille-lot=1', stdout=StringIO())
+        
+        self.assertEqual(self._compteurs(self.client_a), (2, Decimal('120.00'), Decimal('60.00')))
+
+
+class SerieChiffreAffairesTest(TestCase):
+    """
+    Tests pour l'API JSON de série temporelle du chiffre d'affaires.
+    
+    Teste le regroupement par période, les filtres et le cache des périodes closes.
+    """
+    
+    def setUp(self):
+        """
+        Configuration initiale : factures sur le mois courant et un mois passé.
+        """
+        from django.core.cache import cache as cache_django
+        cache_django.clear()
+        
+        self.client_obj = Client.objects.create(
+            nom="Client Série",
+            email="serie@test.com",
+            adresse="7 Rue Série",
+            code_postal="75007",
+            ville="Paris"
+        )
+        self.categorie = CategorieFacture.objects.create(nom="Série")
+        self.mois_courant = date.today().replace(day=1)
+        self.mois_passe = (self.mois_courant - timedelta(days=1)).replace(day=1)
+        
+        self._creer_facture("FAC-SER-001", self.mois_passe, 'payee', Decimal('100.00'))
+        self._creer_facture("FAC-SER-002", self.mois_passe, 'envoyee', Decimal('50.00'))
+        self._creer_facture("FAC-SER-003", self.mois_courant, 'annulee', Decimal('10.00'))
+        self.url = reverse('django_exo_1:serie_chiffre_affaires')
+    
+    def _creer_facture(self, numero, date_emission, statut, montant_ht):
+        return Facture.objects.create(
+            numero=numero,
+            date_emission=date_emission,
+            date_echeance=date_emission + timedelta(days=30),
+            client=self.client_obj,
+            montant_ht=montant_ht,
+            taux_tva=Decimal('20.00'),
+            categorie=self.categorie,
+            statut=statut,
+            description="Facture série"
+        )
+    
+    def _serie(self, **params):
+        params.setdefault('debut', self.mois_passe.isoformat())
+        params.setdefault('fin', date.today().isoformat())
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['series']
+    
+    def test_serie_mensuelle(self):
+        """
+        Vérifie les montants par mois, avec et sans filtre client.
+        """
+        attendu = [
+            {'periode': self.mois_passe.isoformat(), 'facture': '180.00', 'paye': '120.00', 'en_attente': '60.00'},
+            {'periode': self.mois_courant.isoformat(), 'facture': '0.00', 'paye': '0.00', 'en_attente': '0.00'},
+        ]
+        self.assertEqual(self._serie(granularite='mois'), attendu)
+        self.assertEqual(self._serie(granularite='mois', client=self.client_obj.pk), attendu)
+    
+    def test_periode_courante_recalculee_historique_conserve(self):
+        """
+        Vérifie qu'une écriture sur la période en cours ne recalcule pas l'historique.
+        """
+        from . import cache
+        
+        self._serie(granularite='mois')
+        version = cache.version_historique('mois')
+        
+        self._creer_facture("FAC-SER-004", self.mois_courant, 'payee', Decimal('10.00'))
+        series = self._serie(granularite='mois')
+        
+        self.assertEqual(cache.version_historique('mois'), version)
+        self.assertEqual(series[1]['paye'], '12.00')
+        
+        Facture.objects.filter(numero="FAC-SER-002").update(statut='payee')
+        self.assertGreater(cache.version_historique('mois'), version)
+        self.assertEqual(self._serie(granularite='mois')[0]['paye'], '180.00')
+    
+    def test_parametres_invalides(self):
+        """
+        Vérifie le rejet des granularités et dates invalides.
+        """
+        self.assertEqual(self.client.get(self.url, {'granularite': 'siecle'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'debut': 'hier'}).status_code, 400)
+        self.assertEqual(
+            self.client.get(self.url, {'debut': '2025-02-01', 'fin': '2025-01-01'}).status_code, 400
+        )
+
+
+class BalanceAgeeTest(TestCase):
+    """
+    Tests pour la balance âgée des créances (page HTML, JSON et CSV).
+    """
+    
+    def setUp(self):
+        """
+        Configuration initiale : factures en retard de 10, 45 et 120 jours.
+        """
+        self.client_obj = Client.objects.create(
+            nom="Client Balance",
+            email="balance@test.com",
+            adresse="8 Rue Balance",
+            code_postal="75008",
+            ville="Paris"
+        )
+        self.categorie = CategorieFacture.objects.create(nom="Balance")
+        
+        donnees = [
+            ("FAC-BAL-001", 'envoyee', 10, Decimal('100.00')),
+            ("FAC-BAL-002", 'envoyee', 45, Decimal('200.00')),
+            ("FAC-BAL-003", 'brouillon', 120, Decimal('300.00')),
+            ("FAC-BAL-004", 'payee', 120, Decimal('999.00')),  # Payée : exclue
+            ("FAC-BAL-005", 'envoyee', -5, Decimal('999.00')),  # Non échue : exclue
+        ]
+        for numero, statut, retard, montant_ht in donnees:
+            Facture.objects.create(
+                numero=numero,
+                date_emission=date.today() - timedelta(days=retard + 30),
+                date_echeance=date.today() - timedelta(days=retard),
+                client=self.client_obj,
+                montant_ht=montant_ht,
+                taux_tva=Decimal('20.00'),
+                categorie=self.categorie,
+                statut=statut,
+                description="Facture balance âgée"
+            )
+    
+    def test_repartition_par_tranche_en_une_requete(self):
+        """
+        Vérifie la répartition de l'encours en retard par tranche.
+        """
+        with self.assertNumQueries(1):
+            lignes = list(Facture.objects.all().balance_agee('client'))
+        
+        self.assertEqual(len(lignes), 1)
+        ligne = lignes[0]
+        self.assertEqual(ligne['groupe_id'], self.client_obj.pk)
+        self.assertEqual(ligne['nb_factures'], 3)
+        self.assertEqual(ligne['total'], Decimal('720.00'))
+        self.assertEqual(ligne['retard_0_30'], Decimal('120.00'))
+        self.assertEqual(ligne['retard_31_60'], Decimal('240.00'))
+        self.assertEqual(ligne['retard_61_90'], Decimal('0'))
+        self.assertEqual(ligne['retard_90_plus'], Decimal('360.00'))
+    
+    def test_page_json_et_csv(self):
+        """
+        Vérifie les trois formats de sortie de la balance âgée.
+        """
+        response = self.client.get(reverse('django_exo_1:balance_agee'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Client Balance")
+        
+        response = self.client.get(reverse('django_exo_1:balance_agee_json'), {'par': 'categorie'})
+        self.assertEqual(response.json()['lignes'][0]['total'], '720.00')
+        
+        response = self.client.get(reverse('django_exo_1:balance_agee_csv'))
+        contenu = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(contenu), 2)
+        self.assertIn('Client Balance;3;720.00;120.00;240.00;0.00;360.00', contenu[1])
+        
+        response = self.client.get(reverse('django_exo_1:balance_agee_json'), {'par': 'ville'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DashboardSectionsBorneesTest(TestCase):
+    """
+    Tests pour les listes bornées du dashboard (top N + nombre total).
+    """
+    
+    def setUp(self):
+        """
+        Configuration initiale : 8 factures en retard.
+        """
+        from django.core.cache import cache as cache_django
+        cache_django.clear()
+        
+        self.client_obj = Client.objects.create(
+            nom="Client Dashboard",
+            email="dashboard@test.com",
+            adresse="9 Rue Dashboard",
+            code_postal="75009",
+            ville="Paris"
+        )
+        self.categorie = CategorieFacture.objects.create(nom="Dashboard")
+        for i in range(8):
+            Facture.objects.create(
+                numero=f"FAC-DASH-{i:03d}",
+                date_emission=date.today() - timedelta(days=60),
+                date_echeance=date.today() - timedelta(days=10 + i),
+                client=self.client_obj,
+                montant_ht=Decimal('10.00'),
+                categorie=self.categorie,
+                statut='envoyee',
+                description="Facture dashboard"
+            )
+    
+    def test_section_en_retard_bornee(self):
+        """
+        Vérifie que seules N lignes sont chargées, avec le total exact.
+        """
+        response = self.client.get(reverse('django_exo_1:dashboard'))
+        section = response.context['factures_en_retard']
+        
+        self.assertEqual(len(section['factures']), 5)
+        self.assertEqual(section['total'], 8)
+        self.assertEqual(section['autres'], 3)
+        # Les plus anciennes échéances d'abord
+        self.assertEqual(section['factures'][0].numero, "FAC-DASH-007")
+        self.assertContains(response, "... et 3 autres")
+    
+    def test_limite_configurable(self):
+        """
+        Vérifie que la limite de lignes suit le réglage FACTURES_DASHBOARD_LIMITES.
+        """
+        from django.test import override_settings
+        
+        with override_settings(FACTURES_DASHBOARD_LIMITES={'en_retard': 2}):
+            response = self.client.get(reverse('django_exo_1:dashboard'))
+        
+        section = response.context['factures_en_retard']
+        self.assertEqual(len(section['factures']), 2)
+        self.assertEqual(section['autres'], 6)
+
+
+class SectionsConcurrentesTest(TransactionTestCase):
+    """
+    Tests pour le calcul concurrent des sections (voir sections.py).
+    
+    TransactionTestCase : les threads du pool utilisent leur propre connexion
+    et doivent voir des données réellement validées.
+    """
+    
+    def setUp(self):
+        from django.core.cache import cache as cache_django
+        cache_django.clear()
+        client = Client.objects.create(nom="Client Async", email="async@test.com", type_client='entreprise')
+        categorie = CategorieFacture.objects.create(nom="Async")
+        Facture.objects.create(
+            numero="FAC-ASYNC-001",
+            date_emission=date.today() - timedelta(days=40),
+            date_echeance=date.today() - timedelta(days=5),
+            client=client,
+            montant_ht=Decimal('100.00'),
+            categorie=categorie,
+            statut='envoyee',
+            description="Facture en retard"
+        )
+    
+    async def test_sections_calculees_sous_asgi(self):
+        """
+        Vérifie que le dashboard servi en ASGI rend les mêmes sections qu'en WSGI.
+        """
+        response = await self.async_client.get(reverse('django_exo_1:dashboard'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['stats']['total'], 1)
+        self.assertEqual(response.context['factures_en_retard']['total'], 1)
+        self.assertEqual(response.context['top_clients'][0].nom, "Client Async")
+    
+    async def test_accueil_sous_asgi(self):
+        """
+        Vérifie la page d'accueil servie en ASGI.
+        """
+        response = await self.async_client.get(reverse('django_exo_1:home'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_factures'], 1)
+        self.assertEqual(response.context['total_clients'], 1)
+    
+    def test_sequentiel_sous_wsgi(self):
+        """
+        Vérifie que le mode concurrent n'est utilisé que pour les requêtes ASGI.
+        """
+        from django.test import AsyncRequestFactory, RequestFactory, override_settings
+        from . import sections
+        
+        self.assertFalse(sections.concurrent(RequestFactory().get('/')))
+        self.assertTrue(sections.concurrent(AsyncRequestFactory().get('/')))
+        with override_settings(FACTURES_SECTIONS_CONCURRENTES=False):
+            self.assertFalse(sections.concurrent(AsyncRequestFactory().get('/')))
+
+
+class PaginationCurseurTest(TestCase):
+    """
+    Tests pour la pagination par curseur de FactureListView.
+    """
+    
+    def setUp(self):
+        self.client_obj = Client.objects.create(nom="Client Curseur", email="curseur@test.com", type_client='entreprise')
+        self.autre_client = Client.objects.create(nom="Autre Client", email="autre@test.com", type_client='particulier')
+        categorie = CategorieFacture.objects.create(nom="Curseur")
+        # Plusieurs factures le même jour pour tester le départage sur numéro/id
+        for i in range(25):
+            Facture.objects.create(
+                numero=f"FAC-CUR-{i:03d}",
+                date_emission=date(2024, 1, 1) + timedelta(days=i // 3),
+                date_echeance=date(2024, 3, 1),
+                client=self.client_obj if i % 5 else self.autre_client,
+                montant_ht=Decimal('10.00'),
+                categorie=categorie,
+                statut='envoyee',
+                description="Facture curseur"
+            )
+        self.url = reverse('django_exo_1:facture_list')
+    
+    def _parcourir(self, parametres):
+        """Suit les liens 'suivant' et retourne les numéros dans l'ordre d'affichage."""
+        numeros = []
+        response = self.client.get(self.url, parametres)
+        while True:
+            numeros += [f.numero for f in response.context['factures']]
+            page = response.context['page_obj']
+            if not page.has_next():
+                return numeros, response
+            response = self.client.get(self.url + page.lien_suivant)
+    
+    def test_parcours_identique_a_offset(self):
+        """
+        Vérifie que le parcours par curseur donne le même ordre que l'ordre par défaut.
+        """
+        numeros, _ = self._parcourir({'pagination': 'curseur'})
+        attendus = list(Facture.objects.order_by('-date_emission', '-numero', '-id').values_list('numero', flat=True))
+        self.assertEqual(numeros, attendus)
+    
+    def test_page_precedente(self):
+        """
+        Vérifie que le lien 'précédent' revient sur la page d'origine.
+        """
+        premiere = self.client.get(self.url, {'pagination': 'curseur'})
+        seconde = self.client.get(self.url + premiere.context['page_obj'].lien_suivant)
+        self.assertTrue(seconde.context['page_obj'].has_previous())
+        retour = self.client.get(self.url + seconde.context['page_obj'].lien_precedent)
+        
+        self.assertEqual(
+            [f.numero for f in retour.context['factures']],
+            [f.numero for f in premiere.context['factures']]
+        )
+        self.assertFalse(retour.context['page_obj'].has_previous())
+    
+    def test_filtres_conserves(self):
+        """
+        Vérifie que les liens de pagination conservent les filtres.
+        """
+        numeros, _ = self._parcourir({'pagination': 'curseur', 'client': self.client_obj.pk})
+        self.assertEqual(len(numeros), 20)
+        self.assertTrue(all(not n.endswith(('0', '5')) for n in numeros))
+    
+    def test_sans_count(self):
+        """
+        Vérifie que le mode curseur n'exécute pas de COUNT(*).
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as requetes:
+            self.client.get(self.url, {'pagination': 'curseur'})
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT COUNT(*) AS "__count" FROM "django_exo_1_facture"')
+            for q in requetes.captured_queries
+        ))
+    
+    def test_curseur_invalide(self):
+        """
+        Vérifie qu'un jeton illisible renvoie une 404.
+        """
+        response = self.client.get(self.url, {'apres': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, 404)
+
+
+class PaginatorCompteCacheTest(TestCase):
+    """
+    Tests pour le nombre total de lignes en cache ou estimé des listes.
+    """
+    
+    def setUp(self):
+        from django.core.cache import cache as cache_django
+        cache_django.clear()
+        for i in range(20):
+            Client.objects.create(
+                nom=f"Client Compte {i:02d}",
+                email=f"compte{i}@test.com",
+                type_client='entreprise' if i % 2 else 'particulier'
+            )
+        self.url = reverse('django_exo_1:client_list')
+    
+    def _requetes_count(self, parametres=None):
+        """Nombre de COUNT(*) sur la table des clients pendant une requête."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(self.url, parametres or {})
+        nombre = sum(
+            'COUNT(*)' in q['sql'] and '"django_exo_1_client"' in q['sql']
+            for q in requetes.captured_queries
+        )
+        return nombre, response
+    
+    def test_count_en_cache_par_filtres(self):
+        """
+        Vérifie que le COUNT(*) n'est exécuté qu'une fois par combinaison de filtres.
+        """
+        premier, response = self._requetes_count({'type_client': 'entreprise'})
+        second, _ = self._requetes_count({'type_client': 'entreprise', 'page': 1})
+        autre_filtre, _ = self._requetes_count({'type_client': 'particulier'})
+        
+        self.assertEqual(premier, 1)
+        self.assertEqual(second, 0)
+        self.assertEqual(autre_filtre, 1)
+        self.assertEqual(response.context['paginator'].count, 10)
+        self.assertContains(response, "10 résultats")
+    
+    def test_invalidation_par_ecriture(self):
+        """
+        Vérifie qu'une création de client invalide le nombre en cache.
+        """
+        self._requetes_count()
+        Client.objects.create(nom="Nouveau", email="nouveau@test.com", type_client='particulier')
+        nombre, response = self._requetes_count()
+        
+        self.assertEqual(nombre, 1)
+        self.assertEqual(response.context['paginator'].count, 21)
+    
+    def test_compte_plafonne(self):
+        """
+        Vérifie l'affichage "plus de N" au-delà du seuil pour une liste filtrée.
+        """
+        from django.test import override_settings
+        
+        with override_settings(FACTURES_COMPTE_EXACT_MAX=5):
+            response = self.client.get(self.url, {'type_client': 'entreprise'})
+        
+        paginator = response.context['paginator']
+        self.assertTrue(paginator.plafonne)
+        self.assertEqual(paginator.libelle_compte, "plus de 5")
+    
+    def test_estimation_liste_non_filtree(self):
+        """
+        Vérifie que la liste non filtrée affiche l'estimation issue d'ANALYZE.
+        """
+        from django.db import connection
+        from django.test import override_settings
+        
+        with connection.cursor() as curseur:
+            curseur.execute('ANALYZE')
+        with override_settings(FACTURES_COMPTE_EXACT_MAX=5):
+            nombre, response = self._requetes_count()
+        
+        paginator = response.context['paginator']
+        self.assertEqual(nombre, 0)
+        self.assertTrue(paginator.estime)
+        self.assertEqual(paginator.count, 20)
+        self.assertEqual(paginator.libelle_compte, "environ 20")
+    
+    def test_pages_au_dela_du_compte_approximatif(self):
+        """
+        Vérifie que les pages au-delà du plafond ou d'une estimation trop
+        basse restent accessibles, la page suivante étant détectée par une
+        ligne supplémentaire.
+        """
+        categorie = CategorieFacture.objects.create(nom="Pages")
+        client = Client.objects.first()
+        for i in range(60):
+            Facture.objects.create(
+                numero=f"FAC-PAGE-{i:03d}",
+                date_emission=date(2024, 1, 1) + timedelta(days=i),
+                date_echeance=date(2024, 6, 1),
+                client=client,
+                montant_ht=Decimal('10.00'),
+                categorie=categorie,
+                statut='envoyee',
+            )
+        url = reverse('django_exo_1:facture_list')
+        
+        with override_settings(FACTURES_COMPTE_EXACT_MAX=20):
+            page_3 = self.client.get(url, {'statut': 'envoyee', 'page': 3})
+            page_6 = self.client.get(url, {'statut': 'envoyee', 'page': 6})
+            page_7 = self.client.get(url, {'statut': 'envoyee', 'page': 7})
+        
+        self.assertEqual(page_3.status_code, 200)
+        self.assertEqual(len(page_3.context['factures']), 10)
+        self.assertTrue(page_3.context['page_obj'].has_next())
+        self.assertEqual(page_3.context['page_obj'].start_index(), 21)
+        self.assertEqual(page_6.status_code, 200)
+        self.assertFalse(page_6.context['page_obj'].has_next())
+        self.assertEqual(page_6.context['page_obj'].end_index(), 60)
+        self.assertEqual(page_7.status_code, 404)
+        
+        # Estimation trop basse de la liste non filtrée
+        with patch('django_exo_1.pagination.estimer_nombre_lignes', return_value=25):
+            with override_settings(FACTURES_COMPTE_EXACT_MAX=20):
+                response = self.client.get(url, {'page': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['paginator'].estime)
+        self.assertEqual(len(response.context['factures']), 10)
+
+
+class ClientListAgregatsTest(TestCase):
+    """
+    Tests pour les agrégats par client et leur tri dans la liste des clients.
+    """
+    
+    def setUp(self):
+        from django.core.cache import cache as cache_django
+        cache_django.clear()
+        categorie = CategorieFacture.objects.create(nom="Agrégats")
+        self.petit = Client.objects.create(nom="A Petit", email="petit@test.com", type_client='particulier')
+        self.gros = Client.objects.create(nom="B Gros", email="gros@test.com", type_client='entreprise')
+        self.sans_facture = Client.objects.create(nom="C Sans", email="sans@test.com", type_client='entreprise')
+        for i, (client, statut, jour) in enumerate([
+            (self.petit, 'payee', date(2024, 5, 1)),
+            (self.gros, 'payee', date(2024, 1, 1)),
+            (self.gros, 'envoyee', date(2024, 2, 1)),
+            (self.gros, 'payee', date(2024, 3, 1)),
+        ]):
+            Facture.objects.create(
+                numero=f"FAC-AGR-{i:03d}",
+                date_emission=jour,
+                date_echeance=jour + timedelta(days=30),
+                client=client,
+                montant_ht=Decimal('100.00') * (i + 1),
+                categorie=categorie,
+                statut=statut,
+                description="Facture agrégats"
+            )
+        self.url = reverse('django_exo_1:client_list')
+    
+    def _noms(self, tri):
+        response = self.client.get(self.url, {'tri': tri})
+        return [c.nom for c in response.context['clients']]
+    
+    def test_derniere_facture_maintenue(self):
+        """
+        Vérifie que la date de la dernière facture suit les écritures.
+        """
+        self.gros.refresh_from_db()
+        self.assertEqual(self.gros.derniere_facture, date(2024, 3, 1))
+        
+        Facture.objects.filter(numero="FAC-AGR-003").delete()
+        self.gros.refresh_from_db()
+        self.assertEqual(self.gros.derniere_facture, date(2024, 2, 1))
+    
+    def test_tris(self):
+        """
+        Vérifie le tri de la liste sur chaque agrégat.
+        """
+        self.assertEqual(self._noms('nom'), ["A Petit", "B Gros", "C Sans"])
+        self.assertEqual(self._noms('nb_factures'), ["B Gros", "A Petit", "C Sans"])
+        self.assertEqual(self._noms('ca_paye'), ["B Gros", "A Petit", "C Sans"])
+        self.assertEqual(self._noms('encours'), ["B Gros", "A Petit", "C Sans"])
+        self.assertEqual(self._noms('derniere_facture'), ["A Petit", "B Gros", "C Sans"])
+        # Valeur inconnue : tri par nom
+        self.assertEqual(self._noms('montant_ht; DROP'), ["A Petit", "B Gros", "C Sans"])
+    
+    def test_une_requete_pour_la_page(self):
+        """
+        Vérifie que les agrégats ne coûtent aucune requête par ligne.
+        """
+        self.client.get(self.url, {'tri': 'ca_paye'})  # nombre total mis en cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'tri': 'ca_paye'})
+        self.assertContains(response, "01/03/2024")
+
+
+class ProfilsChargementTest(TestCase):
+    """
+    Tests pour les profils de chargement de FactureQuerySet.
+    """
+    
+    def setUp(self):
+        self.client_obj = Client.objects.create(nom="Client Profil", email="profil@test.com", type_client='entreprise')
+        self.categorie = CategorieFacture.objects.create(nom="Profil")
+        for i in range(3):
+            Facture.objects.create(
+                numero=f"FAC-PRO-{i:03d}",
+                date_emission=date(2024, 1, 1),
+                date_echeance=date(2024, 2, 1),
+                client=self.client_obj,
+                montant_ht=Decimal('100.00'),
+                categorie=self.categorie,
+                statut='envoyee',
+                description="Longue description " * 50,
+                notes="Notes internes"
+            )
+    
+    def test_profil_liste_sans_champs_texte(self):
+        """
+        Vérifie que le profil liste ne lit pas les champs texte et joint les relations.
+        """
+        factures = list(Facture.objects.pour_liste())
+        deferes = factures[0].get_deferred_fields()
+        
+        self.assertIn('description', deferes)
+        self.assertIn('notes', deferes)
+        with self.assertNumQueries(0):
+            for facture in factures:
+                (facture.numero, facture.client.nom, facture.categorie.couleur, facture.montant_ttc)
+    
+    def test_liste_sans_requete_par_ligne(self):
+        """
+        Vérifie que la page de liste n'exécute pas de requête par facture.
+        """
+        self.client.get(reverse('django_exo_1:facture_list'))
+        with self.assertNumQueries(2):
+            # Catégories des filtres + page (le nombre total est en cache, les
+            # clients du filtre sont proposés par autocomplétion)
+            self.client.get(reverse('django_exo_1:facture_list'))
+    
+    def test_profil_export(self):
+        """
+        Vérifie que le profil export produit des lignes légères.
+        """
+        from .models import LigneExportFacture
+        
+        lignes = list(Facture.objects.filter(numero="FAC-PRO-001").pour_export())
+        
+        self.assertEqual(len(lignes), 1)
+        self.assertIsInstance(lignes[0], LigneExportFacture)
+        self.assertFalse(hasattr(lignes[0], '__dict__'))
+        self.assertEqual(lignes[0].client_nom, "Client Profil")
+        self.assertEqual(lignes[0].montant_ttc, Decimal('120.00'))
+    
+    def test_export_csv_filtre(self):
+        """
+        Vérifie l'export CSV avec les filtres de la liste.
+        """
+        response = self.client.get(reverse('django_exo_1:facture_export_csv'), {'search': 'FAC-PRO-002'})
+        contenu = b''.join(response.streaming_content).decode()
+        
+        self.assertEqual(len(contenu.strip().splitlines()), 2)
+        self.assertIn("FAC-PRO-002;2024-01-01;2024-02-01;Client Profil;Profil", contenu)
+        self.assertIn("Envoyée", contenu)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Plans EXPLAIN QUERY PLAN propres à SQLite")
+class PlansRequetesTest(TestCase):
+    """
+    Vérifie les plans d'exécution des principales requêtes (EXPLAIN QUERY PLAN).
+    
+    Échoue si une requête parcourt entièrement une table de l'application
+    ("SCAN table" sans index). Les parcours dans l'ordre d'un index
+    ("SCAN table USING INDEX ...") sont acceptés : ils servent un ORDER BY et
+    s'arrêtent au LIMIT. Les tables sont vides : les plans reflètent les
+    choix du planificateur sans statistiques ANALYZE.
+    """
+    
+    def requetes(self):
+        """Requêtes vérifiées, par nom."""
+        from .pagination import condition_seek
+        
+        aujourd_hui = date.today()
+        seek = condition_seek(('date_emission', 'numero', 'id'), [aujourd_hui, 'FAC-001', 1], 'lt')
+        requetes = {
+            'payees': Facture.objects.payees(),
+            'en_attente': Facture.objects.en_attente(),
+            'brouillons': Facture.objects.all().brouillons(),
+            'annulees': Facture.objects.all().annulees(),
+            'par_client': Facture.objects.par_client(1),
+            'par_client_statut': Facture.objects.par_client(1).payees(),
+            'par_categorie_statut': Facture.objects.all().par_categorie(1).en_attente(),
+            'par_periode': Facture.objects.par_periode(aujourd_hui - timedelta(days=30), aujourd_hui),
+            'echeance_proche': Facture.objects.echeance_proche(7).pour_dashboard().order_by('date_echeance', 'pk')[:5],
+            'echeance_passee': Facture.objects.echeance_passee().pour_dashboard().order_by('date_echeance', 'pk')[:5],
+            'liste': Facture.objects.pour_liste()[:10],
+            'liste_statut': Facture.objects.pour_liste().filter(statut='payee')[:10],
+            'liste_curseur': Facture.objects.pour_liste().filter(seek).order_by('-date_emission', '-numero', '-id')[:11],
+            'factures_client_curseur': Facture.objects.par_client(1).filter(seek)
+            .order_by('-date_emission', '-numero', '-id')[:11],
+            'statistiques_client': Facture.objects.par_client(1).order_by().values('statut'),
+            'clients_actifs': Client.objects.actifs().order_by('nom'),
+            'statistiques_journalieres': StatistiqueJournaliere.objects.all().par_periode(aujourd_hui, aujourd_hui),
+        }
+        for tri in ClientQuerySet.TRIS:
+            requetes[f'clients_tri_{tri}'] = Client.objects.trier(tri)[:15]
+        return requetes
+    
+    def _parcours_complets(self, plan):
+        """Tables de l'application parcourues sans index dans un plan."""
+        tables = []
+        for ligne in plan.splitlines():
+            mots = ligne.split()
+            if 'SCAN' in mots and 'USING' not in mots:
+                table = mots[mots.index('SCAN') + 1]
+                if table.startswith('django_exo_1_'):
+                    tables.append(table)
+        return tables
+    
+    def test_aucun_parcours_complet(self):
+        """
+        Vérifie qu'aucune requête principale ne parcourt une table entière.
+        """
+        for nom, queryset in self.requetes().items():
+            with self.subTest(requete=nom):
+                plan = queryset.explain()
+                self.assertEqual(self._parcours_complets(plan), [], plan)
+    
+    def test_index_utilises(self):
+        """
+        Vérifie que les filtres courants utilisent les index prévus.
+        """
+        requetes = self.requetes()
+        attendus = {
+            'payees': 'facture_statut_echeance_idx',
+            'echeance_proche': 'facture_statut_echeance_idx',
+            'echeance_passee': 'facture_echeance_idx',
+            'par_periode': 'facture_liste_curseur_idx',
+            'liste': 'facture_liste_curseur_idx',
+            'liste_curseur': 'facture_liste_curseur_idx',
+            'factures_client_curseur': 'facture_client_curseur_idx',
+            'clients_actifs': 'client_actifs_nom_idx',
+            'clients_tri_ca_paye': 'client_classement_ca_idx',
+        }
+        for nom, index in attendus.items():
+            with self.subTest(requete=nom):
+                self.assertIn(index, requetes[nom].explain())
+
+
+class ClientDetailPagineTest(TestCase):
+    """
+    Tests pour la page de détail client paginée en une passe.
+    """
+    
+    def setUp(self):
+        self.client_obj = Client.objects.create(nom="Client Détail", email="detail@test.com", type_client='entreprise')
+        categorie = CategorieFacture.objects.create(nom="Détail")
+        for i in range(25):
+            Facture.objects.create(
+                numero=f"FAC-DET-{i:03d}",
+                date_emission=date(2024, 1, 1) + timedelta(days=i),
+                date_echeance=date(2024, 6, 1),
+                client=self.client_obj,
+                montant_ht=Decimal('10.00'),
+                categorie=categorie,
+                statut='payee' if i % 2 else 'envoyee',
+                description="Facture détail"
+            )
+        self.url = reverse('django_exo_1:client_detail', kwargs={'pk': self.client_obj.pk})
+    
+    def test_nombre_de_requetes_fixe(self):
+        """
+        Vérifie que la première page et les suivantes coûtent le même nombre de requêtes.
+        """
+        with self.assertNumQueries(3):
+            # Client + statistiques agrégées + page de factures
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['factures']), 10)
+        self.assertEqual(response.context['stats']['total_factures'], 25)
+        
+        with self.assertNumQueries(3):
+            self.client.get(self.url + response.context['page_factures'].lien_suivant)
+    
+    def test_parcours_complet(self):
+        """
+        Vérifie que les pages successives couvrent toutes les factures, plus récentes d'abord.
+        """
+        numeros = []
+        response = self.client.get(self.url)
+        while True:
+            numeros += [f.numero for f in response.context['factures']]
+            page = response.context['page_factures']
+            if not page.has_next():
+                break
+            response = self.client.get(self.url + page.lien_suivant)
+        
+        self.assertEqual(numeros, [f"FAC-DET-{i:03d}" for i in range(24, -1, -1)])
+    
+    def test_filtres_statut_et_dates(self):
+        """
+        Vérifie les filtres par statut et date d'émission, conservés dans les liens.
+        """
+        response = self.client.get(self.url, {'statut': 'payee', 'du': '2024-01-05', 'au': '2024-01-20'})
+        numeros = [f.numero for f in response.context['factures']]
+        
+        self.assertEqual(numeros, [f"FAC-DET-{i:03d}" for i in (19, 17, 15, 13, 11, 9, 7, 5)])
+        self.assertFalse(response.context['page_factures'].has_next())
+        
+        response = self.client.get(self.url, {'statut': 'envoyee'})
+        lien = response.context['page_factures'].lien_suivant
+        self.assertIn('statut=envoyee', lien)
+    
+    def test_date_invalide_ignoree(self):
+        """
+        Vérifie qu'une date mal formée n'empêche pas l'affichage.
+        """
+        response = self.client.get(self.url, {'du': '2024-13-45'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['factures']), 10)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Moteur plein texte FTS5 testé sous SQLite")
+class RechercheTexteTest(TestCase):
+    """
+    Tests pour la recherche plein texte des factures (FTS5).
+    """
+    
+    def setUp(self):
+        self.categorie = CategorieFacture.objects.create(nom="Recherche")
+        self.client_a = Client.objects.create(nom="Société Générale Écologie", email="contact@eco.fr", type_client='entreprise')
+        self.client_b = Client.objects.create(nom="Dupont Frères", email="dupont@test.com", type_client='entreprise')
+        self.facture_a = self._facture("FAC-RCH-001", self.client_a, "Maintenance chaudière")
+        self.facture_b = self._facture("FAC-RCH-002", self.client_b, "Audit écologie du site")
+    
+    def _facture(self, numero, client, description):
+        return Facture.objects.create(
+            numero=numero,
+            date_emission=date(2024, 3, 1),
+            date_echeance=date(2024, 4, 1),
+            client=client,
+            montant_ht=Decimal('100.00'),
+            categorie=self.categorie,
+            description=description
+        )
+    
+    def _numeros(self, terme):
+        return [f.numero for f in Facture.objects.recherche(terme)]
+    
+    def test_insensible_aux_accents_et_a_la_casse(self):
+        """
+        Vérifie que la saisie sans accents ni majuscules trouve les textes accentués.
+        """
+        self.assertEqual(self._numeros("chaudiere"), ["FAC-RCH-001"])
+        self.assertEqual(self._numeros("SOCIETE generale"), ["FAC-RCH-001"])
+    
+    def test_prefixes_et_tous_les_mots(self):
+        """
+        Vérifie que chaque mot est cherché comme préfixe et que tous sont requis.
+        """
+        self.assertEqual(self._numeros("dup"), ["FAC-RCH-002"])
+        self.assertEqual(self._numeros("dupont chaudiere"), [])
+    
+    def test_tri_par_pertinence(self):
+        """
+        Vérifie qu'une correspondance dans le nom du client passe avant la description.
+        """
+        # « écologie » : nom du client pour A, description pour B
+        self.assertEqual(self._numeros("ecologie"), ["FAC-RCH-001", "FAC-RCH-002"])
+    
+    def test_index_suit_les_ecritures(self):
+        """
+        Vérifie la mise à jour de l'index après save(), update() et delete().
+        """
+        self.client_b.nom = "Martin"
+        self.client_b.save()
+        self.assertEqual(self._numeros("dupont"), ["FAC-RCH-002"])  # email inchangé
+        self.assertEqual(self._numeros("martin"), ["FAC-RCH-002"])
+        
+        Client.objects.filter(pk=self.client_b.pk).update(email="m@test.com")
+        self.assertEqual(self._numeros("dupont"), [])
+        
+        Facture.objects.filter(pk=self.facture_a.pk).update(description="Ramonage")
+        self.assertEqual(self._numeros("chaudiere"), [])
+        self.assertEqual(self._numeros("ramonage"), ["FAC-RCH-001"])
+        
+        self.facture_a.delete()
+        self.assertEqual(self._numeros("ramonage"), [])
+    
+    def test_commande_reconstruire(self):
+        """
+        Vérifie que la commande reconstruit l'index à partir des tables.
+        """
+        with connection.cursor() as curseur:
+            curseur.execute("DELETE FROM django_exo_1_facture_fts")
+        self.assertEqual(self._numeros("chaudiere"), [])
+        
+        sortie = StringIO()
+        call_command('reconstruire_recherche', taille_lot=1, stdout=sortie)
+        
+        self.assertIn('2 factures indexées', sortie.getvalue())
+        self.assertEqual(self._numeros("chaudiere"), ["FAC-RCH-001"])
+    
+    def test_ponctuation_et_repli_like(self):
+        """
+        Vérifie la saisie sans mot et le moteur de repli icontains.
+        """
+        self.assertEqual(len(self._numeros("--")), 0)
+        with override_settings(FACTURES_RECHERCHE='like'):
+            self.assertEqual(self._numeros("RCH-002"), ["FAC-RCH-002"])
+
+
+class AutocompletionClientTest(TestCase):
+    """
+    Tests pour l'autocomplétion des clients et son index en mémoire.
+    """
+    
+    def setUp(self):
+        from . import autocompletion
+        autocompletion.reinitialiser()
+        self.durand = Client.objects.create(nom="Durand Électricité", email="contact@durand.fr", ville="Lyon")
+        self.dupont = Client.objects.create(nom="Dupont", email="dupont@exemple.com", ville="Évry")
+        self.inactif = Client.objects.create(nom="Dumas", email="dumas@exemple.com", ville="Paris", est_actif=False)
+        self.url = reverse('django_exo_1:client_autocompletion')
+    
+    def _noms(self, terme, **parametres):
+        response = self.client.get(self.url, {'q': terme, **parametres})
+        return [client['nom'] for client in response.json()['resultats']]
+    
+    def test_prefixe_trigrammes_et_accents(self):
+        """
+        Vérifie la recherche par préfixe court, par trigramme et sans accents.
+        """
+        self.assertEqual(self._noms("du"), ["Dupont", "Durand Électricité"])
+        self.assertEqual(self._noms("electri"), ["Durand Électricité"])
+        self.assertEqual(self._noms("evry"), ["Dupont"])
+        self.assertEqual(self._noms("exemple dup"), ["Dupont"])
+        self.assertEqual(self._noms("du", tous='1'), ["Dumas", "Dupont", "Durand Électricité"])
+        self.assertEqual(self._noms(""), [])
+    
+    def test_sans_requete_une_fois_construit(self):
+        """
+        Vérifie que l'index est construit une fois puis sert sans requête SQL.
+        """
+        self._noms("du")
+        with self.assertNumQueries(0):
+            self.assertEqual(self._noms("lyon"), ["Durand Électricité"])
+    
+    def test_mise_a_jour_incrementale(self):
+        """
+        Vérifie que les écritures de clients sont appliquées à l'index sans le reconstruire.
+        """
+        from . import autocompletion
+        self._noms("du")
+        index = autocompletion.index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dupont.nom = "Martin"
+            self.dupont.save()
+            Client.objects.create(nom="Dufour", email="d@exemple.com", ville="Nice")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.durand.delete()
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(self._noms("du"), ["Dufour", "Martin"])  # Martin par l'email
+        self.assertIsNotNone(index.entrees)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.filter(pk=self.inactif.pk).update(est_actif=True)
+        self.assertEqual(self._noms("dumas"), ["Dumas"])
+    
+    def test_autre_processus_reconstruit(self):
+        """
+        Vérifie qu'un index en retard sur la génération partagée est reconstruit.
+        """
+        from . import autocompletion
+        self._noms("du")
+        autocompletion._nouvelle_generation()  # écriture vue par un autre processus
+        Client.objects.filter(pk=self.dupont.pk).update(ville="Nantes")
+        self.assertEqual(self._noms("nantes"), ["Dupont"])
+    
+    def test_index_expire(self):
+        """
+        Vérifie que l'index est reconstruit après FACTURES_CACHE_TIMEOUT secondes
+        (écriture d'un autre processus invisible avec un cache non partagé).
+        """
+        self._noms("du")
+        Client.objects.filter(pk=self.dupont.pk).update(ville="Nantes")
+        self.assertEqual(self._noms("nantes"), [])
+        with override_settings(FACTURES_CACHE_TIMEOUT=0):
+            self.assertEqual(self._noms("nantes"), ["Dupont"])
+    
+    def test_formulaire_et_filtre_sans_liste_de_clients(self):
+        """
+        Vérifie que le formulaire et les filtres n'affichent que le client sélectionné.
+        """
+        response = self.client.get(reverse('django_exo_1:facture_create'))
+        self.assertContains(response, 'name="client"')
+        self.assertNotContains(response, "Durand Électricité")
+        
+        response = self.client.get(reverse('django_exo_1:facture_list'), {'client': self.dupont.pk})
+        self.assertContains(response, 'value="Dupont"')
+        self.assertNotContains(response, "Durand Électricité")
+
+
+class FacettesFacturesTest(TestCase):
+    """
+    Tests pour les compteurs de facettes des filtres de la liste des factures.
+    """
+    
+    def setUp(self):
+        self.services = CategorieFacture.objects.create(nom="Services")
+        self.produits = CategorieFacture.objects.create(nom="Produits")
+        self.alpha = Client.objects.create(nom="Alpha", email="alpha@test.com")
+        self.beta = Client.objects.create(nom="Beta", email="beta@test.com")
+        lignes = [
+            (self.alpha, self.services, 'payee', "Audit réseau"),
+            (self.alpha, self.services, 'envoyee', "Audit sécurité"),
+            (self.alpha, self.produits, 'payee', "Licence"),
+            (self.beta, self.services, 'brouillon', "Audit cloud"),
+        ]
+        for i, (client, categorie, statut, description) in enumerate(lignes):
+            Facture.objects.create(
+                numero=f"FAC-FAC-{i:03d}",
+                date_emission=date(2024, 5, 1),
+                date_echeance=date(2024, 6, 1),
+                client=client,
+                montant_ht=Decimal('50.00'),
+                categorie=categorie,
+                statut=statut,
+                description=description
+            )
+        self.url = reverse('django_exo_1:facture_facettes_json')
+    
+    def test_chaque_facette_ignore_son_propre_filtre(self):
+        """
+        Vérifie que chaque facette est comptée avec les autres filtres seulement.
+        """
+        donnees = self.client.get(self.url, {'statut': 'payee', 'categorie': self.services.pk}).json()
+        
+        self.assertEqual(donnees['total'], 1)
+        statuts = {s['valeur']: s['nombre'] for s in donnees['statuts']}
+        self.assertEqual(statuts, {'brouillon': 1, 'envoyee': 1, 'payee': 1, 'annulee': 0})
+        self.assertEqual(donnees['categories'], [
+            {'id': self.services.pk, 'nombre': 1}, {'id': self.produits.pk, 'nombre': 1},
+        ])
+        self.assertEqual(donnees['clients'], [{'id': self.alpha.pk, 'nom': "Alpha", 'nombre': 1}])
+    
+    def test_une_seule_requete_puis_cache(self):
+        """
+        Vérifie que les trois facettes sont calculées en une requête puis servies du cache.
+        """
+        with self.assertNumQueries(1):
+            donnees = self.client.get(self.url, {'search': 'audit'}).json()
+        self.assertEqual(donnees['total'], 3)
+        self.assertEqual(
+            [(c['nom'], c['nombre']) for c in donnees['clients']], [("Alpha", 2), ("Beta", 1)]
+        )
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'search': 'audit'})
+    
+    def test_identifiants_invalides(self):
+        """
+        Vérifie qu'un client ou une catégorie non entier donne une erreur 400 en JSON.
+        """
+        for parametres in ({'client': 'abc'}, {'categorie': '1.5'}):
+            with self.subTest(parametres=parametres):
+                response = self.client.get(self.url, parametres)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('erreur', response.json())
+    
+    def test_identifiants_invalides_dans_la_liste(self):
+        """
+        Vérifie que la liste et l'export CSV répondent 400 (et non 500) à un
+        client ou une catégorie non entier.
+        """
+        for parametres in ({'client': 'abc'}, {'categorie': 'abc'}):
+            for nom in ('facture_list', 'facture_export_csv'):
+                with self.subTest(parametres=parametres, vue=nom):
+                    response = self.client.get(reverse(f'django_exo_1:{nom}'), parametres)
+                    self.assertEqual(response.status_code, 400)
+    
+    def test_compteurs_dans_la_liste(self):
+        """
+        Vérifie l'affichage des compteurs dans les filtres de la page de liste.
+        """
+        response = self.client.get(reverse('django_exo_1:facture_list'), {'client': self.beta.pk})
+        
+        self.assertContains(response, "Brouillon (1)")
+        self.assertContains(response, "Payée (0)")
+        self.assertContains(response, "Alpha (3)")
+        categories = {c.nom: c.nombre for c in response.context['categories']}
+        self.assertEqual(categories["Services"], 1)
+        self.assertEqual(categories["Produits"], 0)
+
+
+class ClientListJsonStreamingTest(TestCase):
+    """
+    Tests pour l'API JSON des clients envoyée en flux.
+    """
+    
+    def setUp(self):
+        for i in range(5):
+            Client.objects.create(
+                nom=f"Client Flux {i}", email=f"flux{i}@test.com",
+                adresse=f"{i} rue du Flux", code_postal="75001", ville="Paris"
+            )
+        Client.objects.create(nom="Inactif", email="inactif@test.com", est_actif=False)
+        self.url = reverse('django_exo_1:client_list_json')
+    
+    def _json(self, response):
+        import json
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+    
+    def test_format_par_defaut(self):
+        """
+        Vérifie que le format historique est conservé.
+        """
+        donnees = self._json(self.client.get(self.url))
+        
+        self.assertEqual(len(donnees), 5)
+        self.assertEqual(set(donnees[0]), {'id', 'nom', 'email', 'adresse_complete'})
+        self.assertEqual(donnees[0]['adresse_complete'], "0 rue du Flux\n75001 Paris\nFrance")
+    
+    def test_ecrit_par_lots(self):
+        """
+        Vérifie que le tableau est écrit en plusieurs morceaux valides.
+        """
+        from . import views
+        with patch.object(views, 'TAILLE_LOT_JSON', 2):
+            response = self.client.get(self.url, {'fields': 'id'})
+            morceaux = list(response.streaming_content)
+        
+        self.assertEqual(len(morceaux), 4)  # 2 + 2 + 1 + ']'
+        import json
+        self.assertEqual(len(json.loads(b''.join(morceaux))), 5)
+    
+    def test_selection_des_champs_et_since(self):
+        """
+        Vérifie les paramètres fields et since, et le rejet des valeurs invalides.
+        """
+        Client.objects.filter(nom="Client Flux 0").update(date_modification=timezone.now() - timedelta(days=10))
+        depuis = (timezone.now() - timedelta(days=1)).isoformat()
+        
+        donnees = self._json(self.client.get(self.url, {'fields': 'nom,ville', 'since': depuis}))
+        
+        self.assertEqual([c['nom'] for c in donnees], [f"Client Flux {i}" for i in range(1, 5)])
+        self.assertEqual(set(donnees[0]), {'nom', 'ville'})
+        self.assertEqual(self.client.get(self.url, {'fields': 'nom,notes'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'since': 'hier'}).status_code, 400)
+    
+    def test_liste_vide(self):
+        """
+        Vérifie qu'un filtre sans résultat renvoie un tableau vide valide.
+        """
+        self.assertEqual(self._json(self.client.get(self.url, {'since': '2999-01-01'})), [])
+
+
+class GetConditionnelTest(TestCase):
+    """
+    Tests pour les réponses 304 (ETag / Last-Modified) des pages de lecture.
+    """
+    
+    def setUp(self):
+        self.client_obj = Client.objects.create(nom="Client Cond", email="cond@test.com")
+        self.categorie = CategorieFacture.objects.create(nom="Cond")
+        self.facture = Facture.objects.create(
+            numero="FAC-COND-001",
+            date_emission=date(2024, 2, 1),
+            date_echeance=date(2024, 3, 1),
+            client=self.client_obj,
+            montant_ht=Decimal('10.00'),
+            categorie=self.categorie,
+            description="Facture conditionnelle"
+        )
+        self.urls = [
+            reverse('django_exo_1:facture_list') + '?statut=brouillon',
+            reverse('django_exo_1:client_list'),
+            reverse('django_exo_1:log_creation_list'),
+            reverse('django_exo_1:facture_detail', kwargs={'pk': self.facture.pk}),
+            reverse('django_exo_1:client_detail', kwargs={'pk': self.client_obj.pk}),
+            reverse('django_exo_1:client_list_json'),
+        ]
+    
+    def _revalider(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    
+    def test_304_si_inchange(self):
+        """
+        Vérifie que chaque page renvoie 304 sans rendu quand rien n'a changé.
+        """
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('ETag', response)
+                
+                revalidation = self._revalider(url, response)
+                self.assertEqual(revalidation.status_code, 304)
+                self.assertEqual(revalidation.content, b'')
+    
+    def test_304_sans_requete_de_page(self):
+        """
+        Vérifie qu'une liste inchangée n'exécute plus que la lecture de l'empreinte en cache.
+        """
+        url = self.urls[0]
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._revalider(url, response).status_code, 304)
+    
+    def test_200_apres_ecriture(self):
+        """
+        Vérifie que toute écriture, y compris par update(), change l'ETag.
+        """
+        reponses = {url: self.client.get(url) for url in self.urls}
+        Facture.objects.filter(pk=self.facture.pk).update(statut='payee')
+        for url, response in reponses.items():
+            with self.subTest(url=url):
+                self.assertEqual(self._revalider(url, response).status_code, 200)
+    
+    def test_last_modified_detail(self):
+        """
+        Vérifie Last-Modified / If-Modified-Since sur la page de détail.
+        """
+        url = self.urls[3]
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        revalidation = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidation.status_code, 304)
+    
+    def test_messages_en_attente_rendus(self):
+        """
+        Vérifie qu'une page affichant des messages flash n'est jamais servie en 304.
+        """
+        url = reverse('django_exo_1:facture_list')
+        response = self.client.get(url)
+        self.client.post(
+            reverse('django_exo_1:facture_bulk_action'), {'action': 'mark_paid', 'selected_factures': []}
+        )
+        self.assertEqual(self._revalider(url, response).status_code, 200)
+
+
+class ApiLectureTest(TestCase):
+    """
+    Tests pour l'API JSON en lecture seule (factures, clients, catégories).
+    """
+    
+    def setUp(self):
+        self.categorie = CategorieFacture.objects.create(nom="API", couleur="#123456")
+        self.client_obj = Client.objects.create(nom="Client API", email="api@test.com", ville="Lille")
+        for i in range(7):
+            Facture.objects.create(
+                numero=f"FAC-API-{i:03d}",
+                date_emission=date(2024, 1, 1) + timedelta(days=i),
+                date_echeance=date(2024, 3, 1),
+                client=self.client_obj,
+                montant_ht=Decimal('100.00') * (i + 1),
+                categorie=self.categorie,
+                statut='payee' if i % 2 else 'brouillon',
+                description="Facture API"
+            )
+        self.url = reverse('django_exo_1:api_factures')
+    
+    def _parcourir(self, url, parametres):
+        """Suit les liens suivant et retourne (lignes, nombre de pages)."""
+        lignes, pages = [], 0
+        response = self.client.get(url, parametres)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            donnees = response.json()
+            lignes += donnees['resultats']
+            pages += 1
+            if not donnees['suivant']:
+                return lignes, pages
+            response = self.client.get(url + donnees['suivant'])
+    
+    def test_parcours_par_curseur(self):
+        """
+        Vérifie que les pages successives couvrent toutes les factures une fois.
+        """
+        lignes, pages = self._parcourir(self.url, {'limite': 3, 'fields': 'numero'})
+        
+        self.assertEqual(pages, 3)
+        self.assertEqual([l['numero'] for l in lignes], [f"FAC-API-{i:03d}" for i in range(7)])
+        self.assertEqual(set(lignes[0]), {'numero'})
+    
+    def test_filtres(self):
+        """
+        Vérifie les filtres statut, période, montants, client et catégorie.
+        """
+        lignes, _ = self._parcourir(self.url, {
+            'statut': 'payee', 'du': '2024-01-02', 'au': '2024-01-06',
+            'montant_min': '300', 'montant_max': '500',
+            'client': self.client_obj.pk, 'categorie': self.categorie.pk,
+            'fields': 'numero,montant_ttc',
+        })
+        self.assertEqual([l['numero'] for l in lignes], ["FAC-API-003"])
+        self.assertEqual(lignes[0]['montant_ttc'], "480.00")
+        
+        for parametres in ({'statut': 'inconnu'}, {'du': '2024-13-01'}, {'montant_min': 'abc'},
+                           {'montant_min': 'NaN'}, {'montant_max': 'Infinity'},
+                           {'fields': 'numero,secret'}, {'embed': 'ligne'}, {'apres': 'xxx'}):
+            with self.subTest(parametres=parametres):
+                self.assertEqual(self.client.get(self.url, parametres).status_code, 400)
+    
+    def test_embarques_sans_requete_par_ligne(self):
+        """
+        Vérifie que client et catégorie embarqués sont lus dans la même requête.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'embed': 'client,categorie', 'fields': 'id'})
+        ligne = response.json()['resultats'][0]
+        self.assertEqual(ligne['client'], {
+            'id': self.client_obj.pk, 'nom': "Client API", 'email': "api@test.com", 'ville': "Lille",
+        })
+        self.assertEqual(ligne['categorie']['couleur'], "#123456")
+    
+    def test_clients_et_categories(self):
+        """
+        Vérifie les listes de clients (avec filtre) et de catégories.
+        """
+        Client.objects.create(nom="Inactif API", email="x@test.com", est_actif=False)
+        response = self.client.get(reverse('django_exo_1:api_clients'), {'est_actif': 'true', 'fields': 'nom,nb_factures'})
+        self.assertEqual(response.json()['resultats'], [{'nom': "Client API", 'nb_factures': 7}])
+        
+        response = self.client.get(reverse('django_exo_1:api_categories'))
+        self.assertEqual([c['nom'] for c in response.json()['resultats']], ["API"])
+
+
+@override_settings(FACTURES_SYNC_DELAI=0)
+class SynchronisationIncrementaleTest(TestCase):
+    """
+    Tests pour la synchronisation incrémentale (api/changements/).
+    """
+    
+    def setUp(self):
+        self.categorie = CategorieFacture.objects.create(nom="Sync")
+        self.client_obj = Client.objects.create(nom="Client Sync", email="sync@test.com")
+        self.factures = [
+            Facture.objects.create(
+                numero=f"FAC-SYNC-{i:03d}",
+                date_emission=date(2024, 4, 1),
+                date_echeance=date(2024, 5, 1),
+                client=self.client_obj,
+                montant_ht=Decimal('10.00'),
+                categorie=self.categorie,
+                description="Facture sync"
+            )
+            for i in range(5)
+        ]
+        self.url = reverse('django_exo_1:api_changements')
+    
+    def _synchroniser(self, **parametres):
+        """Appelle l'API jusqu'à termine et cumule les flux."""
+        cumul = {'factures': [], 'clients': [], 'suppressions': []}
+        while True:
+            response = self.client.get(self.url, parametres)
+            self.assertEqual(response.status_code, 200)
+            donnees = response.json()
+            for flux in cumul:
+                cumul[flux] += donnees[flux]
+            parametres = {'curseur': donnees['curseur'], 'limite': parametres.get('limite', 100)}
+            if donnees['termine']:
+                return cumul, donnees['curseur']
+    
+    def test_synchronisation_complete_puis_incrementale(self):
+        """
+        Vérifie la reprise par curseur : seules les lignes changées depuis sont renvoyées.
+        """
+        cumul, curseur = self._synchroniser(limite=2)
+        self.assertEqual([f['numero'] for f in cumul['factures']], [f"FAC-SYNC-{i:03d}" for i in range(5)])
+        # Client journalisé à chaque recalcul de ses compteurs : dernier état renvoyé en dernier
+        self.assertEqual({c['nom'] for c in cumul['clients']}, {"Client Sync"})
+        self.assertEqual(cumul['clients'][-1]['nb_factures'], 5)
+        
+        Facture.objects.filter(pk=self.factures[1].pk).update(statut='envoyee')
+        supprimee = self.factures[3].pk
+        self.factures[3].delete()
+        
+        cumul, _ = self._synchroniser(curseur=curseur)
+        self.assertEqual([f['numero'] for f in cumul['factures']], ["FAC-SYNC-001"])
+        self.assertEqual(cumul['factures'][0]['statut'], 'envoyee')
+        # Compteurs du client recalculés : le client est aussi journalisé
+        self.assertEqual([c['nb_factures'] for c in cumul['clients']], [4])
+        self.assertEqual(
+            [(s['modele'], s['id']) for s in cumul['suppressions']], [('facture', supprimee)]
+        )
+    
+    def test_ordre_de_validation(self):
+        """
+        Vérifie qu'une écriture validée après le curseur est renvoyée, quelle que soit sa date.
+        
+        Une transaction longue écrit une date_modification antérieure à son
+        commit : le journal la place à sa validation.
+        """
+        _, curseur = self._synchroniser()
+        
+        Facture.objects.filter(pk=self.factures[2].pk).update(
+            statut='envoyee', date_modification=timezone.now() - timedelta(days=1)
+        )
+        Facture.objects.filter(pk=self.factures[4].pk).recalculer_montants_ttc(taux_tva=Decimal('10.00'))
+        
+        cumul, _ = self._synchroniser(curseur=curseur)
+        self.assertEqual(
+            [(f['numero'], f['montant_ttc']) for f in cumul['factures']],
+            [("FAC-SYNC-002", '12.00'), ("FAC-SYNC-004", '11.00')]
+        )
+    
+    def test_journal_dans_la_transaction(self):
+        """
+        Vérifie que le journal est écrit et annulé avec les données.
+        """
+        from django.db import transaction
+        
+        facture = self.factures[0]
+        avant = Changement.objects.filter(modele='facture', objet_id=facture.pk).count()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Facture.objects.filter(pk=facture.pk).update(statut='envoyee')
+            raise RuntimeError
+        self.assertEqual(Changement.objects.filter(modele='facture', objet_id=facture.pk).count(), avant)
+        
+        Facture.objects.filter(pk=facture.pk).update(statut='envoyee')
+        self.assertEqual(Changement.objects.filter(modele='facture', objet_id=facture.pk).count(), avant + 1)
+    
+    def test_purge_du_journal(self):
+        """
+        Vérifie le compactage : dernière entrée de chaque objet existant conservée.
+        """
+        Facture.objects.filter(pk=self.factures[1].pk).update(statut='envoyee')
+        restantes = {facture.pk for facture in self.factures} - {self.factures[3].pk}
+        self.factures[3].delete()
+        Changement.objects.update(date=timezone.now() - timedelta(days=100))
+        
+        sortie = StringIO()
+        call_command('purger_changements', stdout=sortie)
+        
+        self.assertIn('entrées supprimées', sortie.getvalue())
+        entrees = list(Changement.objects.values_list('modele', 'objet_id'))
+        self.assertEqual(len(entrees), len(set(entrees)))
+        self.assertEqual(
+            {objet_id for modele, objet_id in entrees if modele == 'facture'}, restantes
+        )
+        cumul, _ = self._synchroniser()
+        self.assertEqual(len(cumul['factures']), 4)
+        self.assertEqual(cumul['suppressions'], [])
+    
+    def test_depuis_et_delai(self):
+        """
+        Vérifie le paramètre depuis et le délai de prise en compte des modifications.
+        """
+        depuis = (timezone.now() + timedelta(minutes=1)).isoformat()
+        cumul, _ = self._synchroniser(depuis=depuis)
+        self.assertEqual(cumul['factures'], [])
+        
+        with self.settings(FACTURES_SYNC_DELAI=3600):
+            cumul, _ = self._synchroniser()
+        self.assertEqual(cumul['factures'], [])
+    
+    def test_parametres_invalides(self):
+        """
+        Vérifie le rejet d'un curseur ou d'une date illisible.
+        """
+        self.assertEqual(self.client.get(self.url, {'curseur': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'depuis': 'hier'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'depuis': '2024-02-30T00:00:00'}).status_code, 400)
+
+
+class ImportFacturesTest(TestCase):
+    """
+    Tests pour l'import en masse de factures (JSON).
+    """
+    
+    def setUp(self):
+        self.categorie = CategorieFacture.objects.create(nom="Import")
+        self.client_obj = Client.objects.create(nom="Client Import", email="import@test.com")
+        Facture.objects.create(
+            numero="FAC-IMP-EXISTANTE",
+            date_emission=date(2024, 6, 1),
+            date_echeance=date(2024, 7, 1),
+            client=self.client_obj,
+            montant_ht=Decimal('10.00'),
+            categorie=self.categorie,
+            description="Déjà là"
+        )
+        self.url = reverse('django_exo_1:facture_import_json')
+    
+    def _element(self, numero, **valeurs):
+        element = {
+            'numero': numero,
+            'date_emission': '2024-06-10',
+            'date_echeance': '2024-07-10',
+            'client': self.client_obj.pk,
+            'montant_ht': '100.00',
+            'categorie': self.categorie.pk,
+            'description': "Import ERP",
+        }
+        element.update(valeurs)
+        return element
+    
+    def _importer(self, factures, **extra):
+        import json
+        return self.client.post(
+            self.url, json.dumps({'factures': factures, **extra}), content_type='application/json'
+        )
+    
+    def test_import_et_donnees_derivees(self):
+        """
+        Vérifie la création, le TTC et la mise à jour des données dérivées.
+        """
+        factures = [self._element(f"FAC-IMP-{i:03d}") for i in range(20)]
+        factures.append(self._element("FAC-IMP-AUTRE", categorie=None, taux_tva='5.5'))
+        
+        response = self._importer(factures)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['creees']), 21)
+        self.assertEqual(Facture.objects.get(numero="FAC-IMP-000").montant_ttc, Decimal('120.00'))
+        autre = Facture.objects.get(numero="FAC-IMP-AUTRE")
+        self.assertEqual((autre.categorie.nom, autre.montant_ttc), ("Autres", Decimal('105.50')))
+        
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.nb_factures, 22)
+        stat = StatistiqueJournaliere.objects.get(jour=date(2024, 6, 10), categorie=self.categorie)
+        self.assertEqual(stat.nb_factures, 20)
+        self.assertEqual(Facture.objects.recherche("ERP").count(), 21)
+    
+    def test_requetes_independantes_du_nombre_de_factures(self):
+        """
+        Vérifie que l'import ne fait pas de requête par facture.
+        
+        Seul le nombre d'INSERT de factures dépend du lot (limite de
+        paramètres par requête du moteur).
+        """
+        from django.test.utils import CaptureQueriesContext
+        from . import ingestion
+        
+        def compter(nombre, prefixe):
+            factures = [self._element(f"{prefixe}-{i:04d}") for i in range(nombre)]
+            with CaptureQueriesContext(connection) as requetes:
+                ingestion.importer(factures)
+            return sum(
+                1 for requete in requetes
+                if not requete['sql'].startswith('INSERT INTO "django_exo_1_facture"')
+            )
+        
+        self.assertEqual(compter(10, "A"), compter(300, "B"))
+    
+    def test_erreurs_par_element(self):
+        """
+        Vérifie les erreurs renvoyées élément par élément et le mode atomique.
+        """
+        factures = [
+            self._element("FAC-IMP-OK"),
+            self._element("FAC-IMP-EXISTANTE"),
+            self._element("FAC-IMP-OK"),
+            self._element("FAC-IMP-DATES", date_echeance='2024-01-01'),
+            self._element("FAC-IMP-CLIENT", client=999999, montant_ht='-1'),
+            self._element("FAC-IMP-STATUT", statut='inconnu', categorie="Inexistante"),
+            "pas un objet",
+        ]
+        
+        response = self._importer(factures, atomique=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Facture.objects.filter(numero="FAC-IMP-OK").exists())
+        
+        response = self._importer(factures)
+        self.assertEqual(response.status_code, 201)
+        donnees = response.json()
+        self.assertEqual([c['numero'] for c in donnees['creees']], ["FAC-IMP-OK"])
+        erreurs = {e['index']: set(e['erreurs']) for e in donnees['erreurs']}
+        self.assertEqual(erreurs, {
+            1: {'numero'}, 2: {'numero'}, 3: {'date_echeance'},
+            4: {'client', 'montant_ht'}, 5: {'statut', 'categorie'}, 6: {'__all__'},
+        })
+    
+    def test_requete_invalide(self):
+        """
+        Vérifie le rejet des corps de requête invalides.
+        """
+        self.assertEqual(self.client.post(self.url, {'factures': '[]'}).status_code, 415)
+        response = self.client.post(self.url, '{', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        with self.settings(FACTURES_IMPORT_MAX=1):
+            self.assertEqual(self._importer([self._element("A"), self._element("B")]).status_code, 400)
+        with self.settings(FACTURES_IMPORT_TAILLE_MAX=100):
+            self.assertEqual(self._importer([self._element("A")]).status_code, 413)
+    
+    def test_valeurs_non_scalaires(self):
+        """
+        Vérifie que les listes et objets sont des erreurs de champ, pas des erreurs serveur.
+        """
+        response = self._importer([
+            self._element("FAC-IMP-LISTE", categorie=[1], date_emission=[1], client={'id': 1}),
+            self._element("FAC-IMP-TYPE", date_emission=20240610),
+        ])
+        
+        self.assertEqual(response.status_code, 400)
+        erreurs = {e['index']: set(e['erreurs']) for e in response.json()['erreurs']}
+        self.assertEqual(erreurs, {0: {'categorie', 'date_emission', 'client'}, 1: {'date_emission'}})
+    
+    def test_numero_cree_par_un_import_concurrent(self):
+        """
+        Vérifie qu'un numéro inséré après la validation donne un conflit (409).
+        """
+        from . import ingestion
+        
+        existants = ingestion._existants
+        
+        def sans_numeros(queryset, champ, valeurs):
+            # Le numéro n'existe pas encore au moment de la validation
+            return set() if champ == 'numero' else existants(queryset, champ, valeurs)
+        
+        with patch.object(ingestion, '_existants', sans_numeros):
+            response = self._importer([self._element("FAC-IMP-NOUVELLE"), self._element("FAC-IMP-EXISTANTE")])
+        
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Facture.objects.filter(numero="FAC-IMP-NOUVELLE").exists())
+
+
+class ActionsLotTest(TestCase):
+    """
+    Tests pour les actions de lot ensemblistes (statuts, catégorie, échéance, suppression).
+    """
+    
+    def setUp(self):
+        self.categorie = CategorieFacture.objects.create(nom="Lot")
+        self.autre_categorie = CategorieFacture.objects.create(nom="Lot bis")
+        self.client_obj = Client.objects.create(nom="Client Lot", email="lot@test.com")
+        self.factures = {}
+        for i, statut in enumerate(['brouillon', 'brouillon', 'envoyee', 'payee', 'annulee']):
+            self.factures[i] = Facture.objects.create(
+                numero=f"FAC-LOT-{i}",
+                date_emission=date(2024, 3, 1),
+                date_echeance=date(2024, 4, 1),
+                client=self.client_obj,
+                montant_ht=Decimal('100.00'),
+                categorie=self.categorie,
+                statut=statut,
+                description="Action de lot"
+            )
+        self.url = reverse('django_exo_1:facture_bulk_action')
+    
+    def _statuts(self):
+        return dict(Facture.objects.order_by().values_list('numero', 'statut'))
+    
+    def _action(self, action, ids=None, query='', **donnees):
+        if ids is None:
+            ids = [facture.pk for facture in self.factures.values()]
+        donnees.update({'action': action, 'selected_factures': [str(pk) for pk in ids]})
+        return self.client.post(f'{self.url}{query}', donnees, follow=True)
+    
+    def test_transitions_dans_la_clause_where(self):
+        """
+        Vérifie que seules les transitions autorisées sont appliquées, comptées par statut.
+        """
+        response = self._action('cancel')
+        
+        statuts = self._statuts()
+        self.assertEqual(
+            [statuts[f"FAC-LOT-{i}"] for i in range(5)],
+            ['annulee', 'annulee', 'annulee', 'payee', 'annulee']
+        )
+        message = str(list(response.context['messages'])[0])
+        self.assertIn('3 facture(s) annulée(s)', message)
+        self.assertIn('brouillon : 2, envoyée : 1', message)
+        
+        response = self._action('mark_sent')
+        self.assertEqual(list(response.context['messages'])[0].level_tag, 'warning')
+    
+    def test_tranches_et_donnees_derivees(self):
+        """
+        Vérifie le découpage en tranches et la mise à jour des données dérivées.
+        """
+        from django.test.utils import CaptureQueriesContext
+        
+        # Trois factures éligibles d'identifiants consécutifs : deux tranches
+        with self.settings(FACTURES_ACTIONS_TRANCHE=2):
+            with CaptureQueriesContext(connection) as requetes:
+                self._action('mark_paid')
+        mises_a_jour = [
+            requete['sql'] for requete in requetes
+            if requete['sql'].startswith('UPDATE "django_exo_1_facture"')
+        ]
+        self.assertEqual(len(mises_a_jour), 2)
+        self.assertTrue(all('"statut" IN' in sql for sql in mises_a_jour))
+        
+        self.assertEqual(list(self._statuts().values()).count('payee'), 4)
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.ca_paye, Decimal('480.00'))
+        stat = StatistiqueJournaliere.objects.get(jour=date(2024, 3, 1), statut='payee')
+        self.assertEqual(stat.nb_factures, 4)
+    
+    def test_toutes_les_factures_filtrees(self):
+        """
+        Vérifie l'application à toutes les factures correspondant aux filtres.
+        """
+        response = self._action('mark_sent', ids=[], query='?statut=brouillon', portee='filtres')
+        
+        self.assertEqual(response.request['QUERY_STRING'], 'statut=brouillon')
+        self.assertEqual(Facture.objects.filter(statut='envoyee').count(), 3)
+        
+        self._action('mark_paid', ids=[], query='?search=FAC-LOT-2', portee='filtres')
+        self.assertEqual(self._statuts()['FAC-LOT-2'], 'payee')
+        self.assertEqual(Facture.objects.filter(statut='payee').count(), 2)
+    
+    def test_categorie_et_echeance(self):
+        """
+        Vérifie le changement de catégorie et d'échéance (bornée par la date d'émission).
+        """
+        self._action('recategorize', categorie=str(self.autre_categorie.pk))
+        self.assertEqual(Facture.objects.filter(categorie=self.autre_categorie).count(), 5)
+        
+        self._action('change_due_date', date_echeance='2024-05-15')
+        echeances = dict(Facture.objects.order_by().values_list('statut', 'date_echeance'))
+        self.assertEqual(echeances['envoyee'], date(2024, 5, 15))
+        self.assertEqual(echeances['payee'], date(2024, 4, 1))
+        
+        self._action('change_due_date', date_echeance='2024-01-01')
+        self.assertFalse(Facture.objects.filter(date_echeance=date(2024, 1, 1)).exists())
+        
+        response = self._action('recategorize', categorie='999999')
+        self.assertEqual(list(response.context['messages'])[0].level_tag, 'error')
+    
+    def test_suppression_des_brouillons(self):
+        """
+        Vérifie que seuls les brouillons sont supprimés, et journalisés.
+        """
+        brouillon_ids = [self.factures[0].pk, self.factures[1].pk]
+        dernier = Changement.objects.order_by('-pk').values_list('pk', flat=True).first()
+        
+        self._action('delete_drafts')
+        
+        self.assertEqual(Facture.objects.count(), 3)
+        self.assertFalse(Facture.objects.filter(statut='brouillon').exists())
+        self.assertEqual(
+            set(Changement.objects.filter(pk__gt=dernier, modele='facture').values_list('objet_id', flat=True)),
+            set(brouillon_ids)
+        )
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.nb_factures, 3)
+    
+    def test_tranches_identifiants_epars(self):
+        """
+        Vérifie que les tranches suivent les identifiants existants, sans
+        parcourir les plages vides entre des identifiants éloignés.
+        """
+        eloignee = Facture.objects.create(
+            id=3000000,
+            numero="FAC-LOT-LOIN",
+            date_emission=date(2024, 3, 1),
+            date_echeance=date(2024, 4, 1),
+            client=self.client_obj,
+            montant_ht=Decimal('100.00'),
+            categorie=self.categorie,
+            statut='brouillon',
+        )
+        factures = Facture.objects.filter(pk__in=[self.factures[0].pk, eloignee.pk])
+        
+        # Une lecture d'identifiants par tranche (plus la dernière, vide) et
+        # l'évaluation de chaque tranche : rien pour l'écart entre les deux
+        with self.assertNumQueries(5):
+            tranches = [
+                list(tranche.values_list('pk', flat=True)) for tranche in factures.par_tranches(1)
+            ]
+        self.assertEqual(tranches, [[self.factures[0].pk], [eloignee.pk]])
+        
+        with self.assertNumQueries(2):
+            tranches = [
+                sorted(tranche.values_list('pk', flat=True)) for tranche in factures.par_tranches(1000)
+            ]
+        self.assertEqual(tranches, [[self.factures[0].pk, eloignee.pk]])
+        
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as requetes:
+            self._action('mark_paid', ids=[self.factures[0].pk, eloignee.pk])
+        self.assertLess(len(requetes), 40)
+        self.assertEqual(Facture.objects.get(pk=eloignee.pk).statut, 'payee')
+
+
+@override_settings(FACTURES_ACTIONS_SEUIL_TACHE=2, FACTURES_ACTIONS_TRANCHE=2)
+class TachesLotTest(TestCase):
+    """
+    Tests pour les actions de lot confiées au worker (tâches de lot).
+    """
+    
+    def setUp(self):
+        self.categorie = CategorieFacture.objects.create(nom="Tâches")
+        self.client_obj = Client.objects.create(nom="Client Tâches", email="taches@test.com")
+        for i, statut in enumerate(['brouillon', 'brouillon', 'envoyee', 'payee', 'annulee']):
+            Facture.objects.create(
+                numero=f"FAC-TACHE-{i}",
+                date_emission=date(2024, 5, 1) + timedelta(days=i),
+                date_echeance=date(2024, 6, 1),
+                client=self.client_obj,
+                montant_ht=Decimal('100.00'),
+                categorie=self.categorie,
+                statut=statut,
+                description="Tâche de lot"
+            )
+    
+    def _lancer(self, action):
+        response = self.client.post(
+            reverse('django_exo_1:facture_bulk_action'), {'action': action, 'portee': 'filtres'}
+        )
+        from .models import TacheLot
+        tache = TacheLot.objects.get()
+        self.assertRedirects(response, reverse('django_exo_1:tache_detail', args=[tache.pk]))
+        return tache
+    
+    def _progression(self, tache):
+        return self.client.get(reverse('django_exo_1:tache_progression', args=[tache.pk])).json()
+    
+    def _traiter(self, **options):
+        call_command('traiter_taches', une_fois=True, stdout=StringIO(), stderr=StringIO(), **options)
+    
+    def test_action_en_arriere_plan(self):
+        """
+        Vérifie la création de la tâche, son traitement par le worker et l'avancement.
+        """
+        tache = self._lancer('mark_paid')
+        
+        self.assertEqual((tache.nb_factures, tache.nb_tranches), (3, 2))
+        self.assertEqual(Facture.objects.filter(statut='payee').count(), 1)
+        self.assertEqual(self._progression(tache)['statut'], 'en_attente')
+        self.assertEqual(
+            self.client.get(reverse('django_exo_1:tache_detail', args=[tache.pk])).status_code, 200
+        )
+        
+        self._traiter()
+        
+        progression = self._progression(tache)
+        self.assertEqual(progression['statut'], 'terminee')
+        self.assertEqual(progression['pourcentage'], 100)
+        self.assertEqual(progression['nombres'], {'brouillon': 2, 'envoyee': 1})
+        self.assertEqual(Facture.objects.filter(statut='payee').count(), 4)
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.ca_paye, Decimal('480.00'))
+    
+    def test_export_en_arriere_plan(self):
+        """
+        Vérifie l'export par tranches et le téléchargement du fichier, dans l'ordre de la liste.
+        """
+        tache = self._lancer('export')
+        self.assertIsNone(self._progression(tache)['export'])
+        
+        self._traiter()
+        
+        url = self._progression(tache)['export']
+        contenu = b''.join(self.client.get(url).streaming_content).decode()
+        lignes = contenu.strip().split('\r\n')
+        self.assertTrue(lignes[0].startswith('Numéro;'))
+        self.assertEqual(
+            [ligne.split(';')[0] for ligne in lignes[1:]],
+            [f"FAC-TACHE-{i}" for i in range(4, -1, -1)]
+        )
+    
+    def test_reprise_apres_echec(self):
+        """
+        Vérifie qu'une tranche en échec est annulée et reprise après remise en file.
+        """
+        tache = self._lancer('cancel')
+        
+        with patch('django_exo_1.taches.appliquer', side_effect=RuntimeError("panne")):
+            self._traiter()
+        
+        progression = self._progression(tache)
+        self.assertEqual((progression['statut'], progression['erreur']), ('echouee', 'panne'))
+        self.assertEqual(progression['tranches_traitees'], 0)
+        self.assertEqual(Facture.objects.filter(statut='annulee').count(), 1)
+        
+        self._traiter(reprises=[tache.pk])
+        
+        self.assertEqual(self._progression(tache)['statut'], 'terminee')
+        self.assertEqual(Facture.objects.filter(statut='annulee').count(), 4)
+
+
+class MontantTTCEnMasseTest(TestCase):
+    """
+    Tests pour le TTC calculé par la base dans les écritures en masse.
+    """
+    
+    def setUp(self):
+        self.categorie = CategorieFacture.objects.create(nom="TTC")
+        self.client_obj = Client.objects.create(nom="Client TTC", email="ttc@test.com")
+        self.factures = [
+            Facture.objects.create(
+                numero=f"FAC-TTC-{i}",
+                date_emission=date(2024, 1 + i, 10),
+                date_echeance=date(2024, 1 + i, 28),
+                client=self.client_obj,
+                montant_ht=Decimal('100.00'),
+                categorie=self.categorie,
+                statut='envoyee',
+                description="TTC"
+            )
+            for i in range(3)
+        ]
+    
+    def _ttc(self):
+        return list(Facture.objects.order_by('numero').values_list('taux_tva', 'montant_ttc'))
+    
+    def test_arrondi_identique_en_python_et_en_base(self):
+        """
+        Vérifie que save() et l'expression SQL arrondissent de la même façon.
+        """
+        cas = [('0.05', '10.00'), ('10.05', '5.50'), ('1.00', '20.00'), ('33.33', '19.60'), ('7', '0')]
+        for montant_ht, taux_tva in cas:
+            attendu = Facture.calculer_montant_ttc(Decimal(montant_ht), Decimal(taux_tva))
+            Facture.objects.filter(pk=self.factures[0].pk).update(
+                montant_ht=Decimal(montant_ht), taux_tva=Decimal(taux_tva)
+            )
+            self.factures[0].refresh_from_db()
+            self.assertEqual(self.factures[0].montant_ttc, attendu, (montant_ht, taux_tva))
+    
+    def test_arrondi_exact_a_mi_centime(self):
+        """
+        Vérifie que la base calcule exactement le TTC de Python, y compris à mi-centime.
+        """
+        import random
+        
+        aleatoire = random.Random(0)
+        cas = [('1.15', '10.00'), ('2.05', '10.00'), ('4.35', '10.00'), ('16.65', '10.00'), ('99999.99', '20.00')]
+        cas += [
+            (f"{aleatoire.randint(1, 9999999) / 100:.2f}", aleatoire.choice(['2.10', '5.50', '10.00', '19.60', '20.00', '8.50']))
+            for _ in range(300)
+        ]
+        Facture.objects.bulk_create([
+            Facture(
+                numero=f"FAC-TTC-A{i}",
+                date_emission=date(2024, 6, 1),
+                date_echeance=date(2024, 6, 30),
+                client=self.client_obj,
+                montant_ht=Decimal(montant_ht),
+                taux_tva=Decimal(taux_tva),
+                categorie=self.categorie,
+                statut='brouillon',
+            )
+            for i, (montant_ht, taux_tva) in enumerate(cas)
+        ])
+        factures = Facture.objects.filter(numero__startswith="FAC-TTC-A")
+        factures.update(montant_ttc=Decimal('0'))
+        factures.recalculer_montants_ttc()
+        
+        for montant_ht, taux_tva, montant_ttc in factures.values_list('montant_ht', 'taux_tva', 'montant_ttc'):
+            self.assertEqual(
+                montant_ttc, Facture.calculer_montant_ttc(montant_ht, taux_tva), (montant_ht, taux_tva)
+            )
+    
+    def test_recalcul_conserve_les_ttc_enregistres(self):
+        """
+        Vérifie l'arrondi au centime pair, celui des TTC enregistrés non arrondis
+        (DecimalField), et la journalisation d'un changement de taux.
+        """
+        cas = [('0.15', Decimal('0.16')), ('0.25', Decimal('0.28')), ('1.15', Decimal('1.26'))]
+        for facture, (montant_ht, attendu) in zip(self.factures, cas):
+            montant_ht = Decimal(montant_ht)
+            # TTC non arrondi : la base l'arrondit (comme save() avant le calcul explicite)
+            Facture.objects.filter(pk=facture.pk).update(
+                montant_ht=montant_ht, taux_tva=Decimal('10.00'),
+                montant_ttc=montant_ht * (1 + Decimal('10.00') / 100)
+            )
+        dernier = Changement.objects.order_by('-pk').values_list('pk', flat=True).first()
+        
+        Facture.objects.filter(taux_tva=Decimal('10.00')).recalculer_montants_ttc()
+        
+        self.assertEqual([ttc for _, ttc in self._ttc()], [attendu for _, attendu in cas])
+        self.assertEqual(
+            [Facture.calculer_montant_ttc(Decimal(montant_ht), Decimal('10.00')) for montant_ht, _ in cas],
+            [attendu for _, attendu in cas]
+        )
+        
+        Facture.objects.filter(taux_tva=Decimal('10.00')).recalculer_montants_ttc(taux_tva=Decimal('20.00'))
+        self.assertEqual(
+            sorted(Changement.objects.filter(pk__gt=dernier).values_list('objet_id', flat=True)),
+            sorted([facture.pk for facture in self.factures] * 2)
+        )
+    
+    def test_update_et_bulk_update(self):
+        """
+        Vérifie que update() et bulk_update() recalculent le TTC.
+        """
+        Facture.objects.filter(numero="FAC-TTC-0").update(montant_ht=Decimal('50.00'))
+        Facture.objects.filter(numero="FAC-TTC-1").update(taux_tva=Decimal('5.50'))
+        
+        self.factures[2].montant_ht = Decimal('10.00')
+        Facture.objects.bulk_update([self.factures[2]], ['montant_ht'])
+        
+        self.assertEqual(self.factures[2].montant_ttc, Decimal('12.00'))
+        self.assertEqual(
+            [ttc for _, ttc in self._ttc()], [Decimal('60.00'), Decimal('105.50'), Decimal('12.00')]
+        )
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.encours, Decimal('177.50'))
+    
+    def test_commande_changement_de_taux(self):
+        """
+        Vérifie le changement de taux sur une période en une requête UPDATE.
+        """
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as requetes:
+            call_command(
+                'recalculer_montants_ttc', date_debut='2024-02-01', date_fin='2024-12-31',
+                taux='20.00', nouveau_taux='10.00', stdout=StringIO()
+            )
+        mises_a_jour = [
+            requete for requete in requetes
+            if requete['sql'].startswith('UPDATE "django_exo_1_facture"')
+        ]
+        self.assertEqual(len(mises_a_jour), 1)
+        
+        self.assertEqual(self._ttc(), [
+            (Decimal('20.00'), Decimal('120.00')),
+            (Decimal('10.00'), Decimal('110.00')),
+            (Decimal('10.00'), Decimal('110.00')),
+        ])
+        stat = StatistiqueJournaliere.objects.get(jour=date(2024, 2, 10))
+        self.assertEqual(stat.total_ttc, Decimal('110.00'))
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.encours, Decimal('340.00'))
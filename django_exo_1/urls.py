@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'django_exo_1'
 
@@ -7,10 +7,15 @@ urlpatterns = [
     # Page d'accueil
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard_statistics, name='dashboard'),
+    path('dashboard/serie/', views.serie_chiffre_affaires, name='serie_chiffre_affaires'),
+    path('balance-agee/', views.balance_agee, name='balance_agee'),
+    path('balance-agee/json/', views.balance_agee_json, name='balance_agee_json'),
+    path('balance-agee/csv/', views.balance_agee_csv, name='balance_agee_csv'),
     
     # URLs pour les clients
     path('clients/', views.ClientListView.as_view(), name='client_list'),
     path('clients/json/', views.client_list_json, name='client_list_json'),
+    path('clients/autocompletion/', views.client_autocompletion, name='client_autocompletion'),
     path('clients/nouveau/', views.ClientCreateView.as_view(), name='client_create'),
     path('clients/<int:pk>/', views.ClientDetailView.as_view(), name='client_detail'),
     path('clients/<int:pk>/modifier/', views.ClientUpdateView.as_view(), name='client_update'),
@@ -18,6 +23,9 @@ urlpatterns = [
     
     # URLs pour les factures
     path('factures/', views.FactureListView.as_view(), name='facture_list'),
+    path('factures/export/csv/', views.facture_export_csv, name='facture_export_csv'),
+    path('factures/facettes/', views.facture_facettes_json, name='facture_facettes_json'),
+    path('factures/import/', views.facture_import_json, name='facture_import_json'),
     path('factures/action-lot/', views.facture_bulk_action, name='facture_bulk_action'),
     path('factures/logs/', views.LogCreationFactureListView.as_view(), name='log_creation_list'),
     path('factures/nouvelle/', views.FactureCreateView.as_view(), name='facture_create'),
@@ -25,6 +33,17 @@ urlpatterns = [
     path('factures/<int:pk>/modifier/', views.FactureUpdateView.as_view(), name='facture_update'),
     path('factures/<int:pk>/supprimer/', views.FactureDeleteView.as_view(), name='facture_delete'),
     
+    # Tâches de lot (actions en arrière-plan)
+    path('taches/<int:pk>/', views.TacheLotDetailView.as_view(), name='tache_detail'),
+    path('taches/<int:pk>/progression/', views.tache_progression, name='tache_progression'),
+    path('taches/<int:pk>/export/', views.tache_export_csv, name='tache_export_csv'),
+    
+    # API JSON en lecture seule
+    path('api/factures/', api.api_factures, name='api_factures'),
+    path('api/clients/', api.api_clients, name='api_clients'),
+    path('api/categories/', api.api_categories, name='api_categories'),
+    path('api/changements/', api.api_changements, name='api_changements'),
+    
     # URLs pour les catégories
     path('categories/', views.CategorieListView.as_view(), name='categorie_list'),
     path('categories/nouvelle/', views.CategorieCreateView.as_view(), name='categorie_create'),
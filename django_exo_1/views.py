@@ -1,18 +1,37 @@
+import csv
+import hashlib
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView, ListView, DetailView, UpdateView, DeleteView
+from django.core.exceptions import EmptyResultSet
 from django.db import models
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from .models import Client, Facture, CategorieFacture, LogCreationFacture
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+from asgiref.sync import sync_to_async
+from .models import Client, Facture, CategorieFacture, LogCreationFacture, StatistiqueJournaliere
+from .models import ClientQuerySet, FactureQuerySet, LigneExportFacture, TacheLot
 from .forms import ClientForm, FactureForm, CategorieFactureForm
 from .forms import ClientForm, FactureForm, CategorieFactureForm
+from .forms import AutocompletionClientWidget
+from . import autocompletion, cache, pagination, sections
 
 # Vues de l'application de gestion de factures
 
 
-def home(request):
+def _statistiques_du_jour():
+    """Statistiques globales en cache (la date fait partie de la clé : en_retard en dépend)."""
+    return cache.obtenir(
+        'statistiques', lambda: Facture.objects.statistiques(agregats=True), timezone.now().date()
+    )
+
+
+async def home(request):
     """
     Vue d'accueil avec tableau de bord et statistiques.
     
@@ -21,6 +40,9 @@ def home(request):
     - Nombre de factures payées et en attente
     - Chiffre d'affaires total (factures payées)
     
+    Vue asynchrone : sous ASGI, les statistiques et le nombre de clients
+    sont calculés en parallèle (voir sections.py).
+    
     Args:
         request (HttpRequest): Requête HTTP
         
@@ -30,18 +52,21 @@ def home(request):
     Template utilisé:
         django_exo_1/home.html
     """
-    # Calcul des statistiques principales avec le manager personnalisé
-    stats = Facture.objects.statistiques()
-    total_clients = Client.objects.count()
+    # Calcul des statistiques principales avec le manager personnalisé (mises en cache)
+    resultats = await sections.calculer(request, {
+        'stats': _statistiques_du_jour,
+        'total_clients': lambda: cache.obtenir('total_clients', Client.objects.count),
+    })
+    stats = resultats['stats']
     
     context = {
         'total_factures': stats['total'],
-        'total_clients': total_clients,
+        'total_clients': resultats['total_clients'],
         'factures_payees': stats['payees'],
         'factures_en_attente': stats['en_attente'],
         'ca_total': stats['chiffre_affaires'],
     }
-    return render(request, 'django_exo_1/home.html', context)
+    return await sync_to_async(render)(request, 'django_exo_1/home.html', context)
 
 
 # ==========================================
@@ -101,7 +126,214 @@ class FactureCreateView(CreateView):
         return super().form_invalid(form)
 
 
-class FactureListView(ListView):
+# ==========================================
+# GET CONDITIONNEL (ETag / Last-Modified)
+# ==========================================
+
+def _etag(request, *parties):
+    """
+    Calcule l'ETag d'une page à partir des données dont elle dépend.
+    
+    Toujours inclus : la version du cache (incrémentée à chaque écriture,
+    y compris les QuerySet.update() et les compteurs dénormalisés qui ne
+    touchent pas date_modification), la date du jour (échéances, retards),
+    l'utilisateur et l'URL complète (filtres, page, curseur).
+    
+    Returns:
+        str | None: ETag, ou None si la page affiche des messages en attente
+        (elle doit alors être rendue)
+    """
+    if len(messages.get_messages(request)):
+        return None
+    contenu = (
+        cache.version(), timezone.localdate(), request.user.pk, request.get_full_path(), parties
+    )
+    return hashlib.md5(repr(contenu).encode()).hexdigest()
+
+
+def _empreinte_ensemble(queryset, champ='date_modification'):
+    """
+    Empreinte d'un ensemble de lignes : (max(champ), nombre de lignes).
+    
+    Calculée en une requête agrégée, puis mise en cache par combinaison de
+    filtres jusqu'à la prochaine écriture.
+    """
+    try:
+        empreinte = pagination.empreinte_requete(queryset)
+    except EmptyResultSet:
+        return None
+    return cache.obtenir(
+        'empreinte_ensemble',
+        lambda: tuple(
+            queryset.order_by().aggregate(
+                derniere=models.Max(champ), nombre=models.Count('pk')
+            ).values()
+        ),
+        queryset.model._meta.label_lower, empreinte, champ
+    )
+
+
+class ListeConditionnelleMixin:
+    """
+    Ajoute le GET conditionnel (ETag) à une ListView.
+    
+    L'ETag dépend de l'empreinte (dernière modification, nombre de lignes)
+    de l'ensemble filtré : une liste inchangée répond 304 sans exécuter la
+    requête de la page ni rendre le template.
+    
+    Attributs:
+        champ_modification: Champ daté de la dernière écriture d'une ligne
+    """
+    champ_modification = 'date_modification'
+    
+    def get(self, request, *args, **kwargs):
+        def etag(request, *args, **kwargs):
+            return _etag(request, _empreinte_ensemble(self.get_queryset(), self.champ_modification))
+        return condition(etag_func=etag)(super().get)(request, *args, **kwargs)
+
+
+class DetailConditionnelMixin:
+    """
+    Ajoute le GET conditionnel (ETag et Last-Modified) à une DetailView.
+    
+    L'objet n'est lu qu'une fois : les validateurs sont calculés à partir
+    de self.object, puis le même objet sert au rendu si nécessaire.
+    """
+    
+    def dates_modification(self):
+        """Dates de dernière écriture des données affichées (objet et relations)."""
+        return [self.object.date_modification]
+    
+    def parties_etag(self):
+        """Valeurs supplémentaires de l'ETag (ex: compteurs dénormalisés)."""
+        return ()
+    
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        dates = self.dates_modification()
+        
+        def rendre(request, *args, **kwargs):
+            return self.render_to_response(self.get_context_data(object=self.object))
+        
+        return condition(
+            etag_func=lambda request, *args, **kwargs: _etag(request, dates, self.parties_etag()),
+            last_modified_func=lambda request, *args, **kwargs: max(dates),
+        )(rendre)(request, *args, **kwargs)
+
+
+def _filtrer_factures(queryset, parametres):
+    """
+    Applique les filtres de la liste des factures (paramètres GET).
+    
+    Args:
+        queryset: QuerySet de factures (avec son profil de chargement)
+        parametres: QueryDict des paramètres (statut, categorie, client, search)
+        
+    Returns:
+        QuerySet: Factures filtrées
+    """
+    # Filtrage par statut
+    statut = parametres.get('statut')
+    if statut:
+        queryset = queryset.filter(statut=statut)
+    
+    # Filtrage par catégorie
+    categorie = parametres.get('categorie')
+    if categorie:
+        queryset = queryset.par_categorie(categorie)
+    
+    # Filtrage par client
+    client = parametres.get('client')
+    if client:
+        queryset = queryset.par_client(client)
+    
+    # Recherche textuelle
+    search = parametres.get('search')
+    if search:
+        queryset = queryset.recherche(search)
+    
+    return queryset
+
+
+def _identifiant_invalide(parametres):
+    """
+    Retourne le nom du premier filtre par identifiant (categorie, client)
+    qui n'est pas un entier, None si tous sont valides.
+    """
+    for nom in ('categorie', 'client'):
+        valeur = parametres.get(nom)
+        if not valeur:
+            continue
+        try:
+            int(valeur)
+        except ValueError:
+            return nom
+    return None
+
+
+# Facettes de la liste : (paramètre GET, champ de regroupement, champ du libellé)
+FACETTES = (
+    ('statut', 'statut', None),
+    ('categorie', 'categorie_id', 'categorie__nom'),
+    ('client', 'client_id', 'client__nom'),
+)
+
+# Nombre de clients affichés dans la facette client
+FACETTE_CLIENTS_MAX = 10
+
+
+def _facettes_factures(parametres):
+    """
+    Compte les factures par statut, catégorie et client pour les filtres courants.
+    
+    Chaque facette est comptée avec tous les filtres sauf le sien (le compte
+    d'un statut est le nombre de résultats obtenus en choisissant ce statut).
+    Les trois regroupements sont réunis en une seule requête (UNION ALL) et
+    le résultat est mis en cache par combinaison de filtres.
+    
+    Args:
+        parametres: QueryDict des paramètres (statut, categorie, client, search)
+        
+    Returns:
+        dict: total, statuts ({statut: nombre}), categories ({id: nombre}),
+        clients (liste des plus fréquents : id, nom, nombre)
+    """
+    filtres = {cle: parametres.get(cle, '') for cle in ('statut', 'categorie', 'client', 'search')}
+    
+    def calcul():
+        requetes = []
+        for nom, champ, libelle in FACETTES:
+            autres = parametres.copy()
+            autres.pop(nom, None)
+            requetes.append(_filtrer_factures(Facture.objects.all(), autres).facette(nom, champ, libelle))
+        facettes = {'statut': {}, 'categorie': {}, 'client': []}
+        for ligne in requetes[0].union(*requetes[1:], all=True):
+            if ligne['facette'] == 'client':
+                facettes['client'].append(ligne)
+            else:
+                facettes[ligne['facette']][ligne['valeur']] = ligne['nombre']
+        
+        # Total : compte de la facette statut restreint au statut choisi
+        if filtres['statut']:
+            total = facettes['statut'].get(filtres['statut'], 0)
+        else:
+            total = sum(facettes['statut'].values())
+        clients = sorted(facettes['client'], key=lambda ligne: (-ligne['nombre'], ligne['libelle']))
+        return {
+            'total': total,
+            'statuts': facettes['statut'],
+            'categories': {int(valeur): nombre for valeur, nombre in facettes['categorie'].items()},
+            'clients': [
+                {'id': int(ligne['valeur']), 'nom': ligne['libelle'], 'nombre': ligne['nombre']}
+                for ligne in clients[:FACETTE_CLIENTS_MAX]
+            ],
+        }
+    
+    empreinte = hashlib.md5(json.dumps(filtres, sort_keys=True).encode()).hexdigest()
+    return cache.obtenir('facettes', calcul, empreinte)
+
+
+class FactureListView(ListeConditionnelleMixin, ListView):
     """
     Vue basée sur classe pour lister et filtrer les factures.
     
@@ -121,14 +353,57 @@ class FactureListView(ListView):
         - Recherche textuelle (numéro, nom client, email client)
         
     Optimisations:
-        - select_related pour éviter les requêtes N+1
-        - Pagination automatique
+        - Profil de chargement pour_liste (select_related + only) : pas de
+          requêtes N+1 et seules les colonnes affichées sont lues
+        - Pagination automatique, nombre total en cache ou estimé (PaginatorCompteCache)
         - Filtres préservés lors de la navigation
+        - Pagination par curseur optionnelle (?pagination=curseur ou réglage
+          FACTURES_PAGINATION_CURSEUR) : pas d'OFFSET ni de COUNT(*), coût
+          constant quelle que soit la profondeur de la page (voir pagination.py)
+        - GET conditionnel : réponse 304 si la liste filtrée n'a pas changé
     """
     model = Facture
     template_name = 'django_exo_1/facture_list.html'
     context_object_name = 'factures'
     paginate_by = 10
+    paginator_class = pagination.PaginatorCompteCache
+    
+    # Tri de la pagination par curseur (index facture_liste_curseur_idx)
+    champs_curseur = ('date_emission', 'numero', 'id')
+    
+    def pagination_curseur(self):
+        """Indique si la pagination par curseur est demandée."""
+        return (
+            getattr(settings, 'FACTURES_PAGINATION_CURSEUR', False)
+            or self.request.GET.get('pagination') == 'curseur'
+            or 'apres' in self.request.GET
+            or 'avant' in self.request.GET
+        )
+    
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Pagine par curseur si demandé, sinon par numéro de page (OFFSET).
+        
+        Returns:
+            tuple: (paginator, page, object_list, is_paginated) comme ListView ;
+            paginator vaut None en mode curseur (aucun COUNT(*) exécuté)
+        """
+        if not self.pagination_curseur():
+            return super().paginate_queryset(queryset, page_size)
+        try:
+            page = pagination.paginer_requete(
+                self.request, queryset, self.champs_curseur, page_size, pagination='curseur'
+            )
+        except pagination.CurseurInvalide:
+            raise Http404("Curseur de pagination invalide")
+        return (None, page, page.object_list, page.has_other_pages())
+    
+    def get(self, request, *args, **kwargs):
+        """Répond 400 si le filtre categorie ou client n'est pas un identifiant entier."""
+        invalide = _identifiant_invalide(request.GET)
+        if invalide:
+            return HttpResponseBadRequest(f"{invalide} : identifiant entier attendu")
+        return super().get(request, *args, **kwargs)
     
     def get_queryset(self):
         """
@@ -140,30 +415,8 @@ class FactureListView(ListView):
         Returns:
             QuerySet: Factures filtrées et optimisées
         """
-        # Commencer avec le queryset optimisé
-        queryset = Facture.objects.avec_relations()
-        
-        # Filtrage par statut
-        statut = self.request.GET.get('statut')
-        if statut:
-            queryset = queryset.filter(statut=statut)
-        
-        # Filtrage par catégorie
-        categorie = self.request.GET.get('categorie')
-        if categorie:
-            queryset = queryset.par_categorie(categorie)
-        
-        # Filtrage par client
-        client = self.request.GET.get('client')
-        if client:
-            queryset = queryset.par_client(client)
-        
-        # Recherche textuelle
-        search = self.request.GET.get('search')
-        if search:
-            queryset = queryset.recherche(search)
-        
-        return queryset
+        # Profil de chargement de la liste : seules les colonnes affichées sont lues
+        return _filtrer_factures(Facture.objects.pour_liste(), self.request.GET)
     
     def get_context_data(self, **kwargs):
         """
@@ -178,13 +431,25 @@ class FactureListView(ListView):
             dict: Contexte enrichi avec les données de filtrage
         """
         context = super().get_context_data(**kwargs)
+        facettes = _facettes_factures(self.request.GET)
+        context['facettes'] = facettes
         context['categories'] = CategorieFacture.objects.all()
-        context['clients'] = Client.objects.filter(est_actif=True).order_by('nom')
+        for categorie in context['categories']:
+            categorie.nombre = facettes['categories'].get(categorie.id, 0)
+        context['statuts_facettes'] = [
+            (valeur, libelle, facettes['statuts'].get(valeur, 0))
+            for valeur, libelle in Facture.STATUT_CHOICES
+        ]
+        # Champ client à autocomplétion : seul le client sélectionné est chargé
+        context['champ_client'] = AutocompletionClientWidget(
+            actifs_seulement=True, vide="Tous les clients"
+        ).render('client', self.request.GET.get('client'), attrs={'id': 'client'})
         context['statuts'] = Facture.STATUT_CHOICES
+        context['pagination_curseur'] = self.pagination_curseur()
         return context
 
 
-class FactureDetailView(DetailView):
+class FactureDetailView(DetailConditionnelMixin, DetailView):
     """
     Vue basée sur classe pour afficher le détail d'une facture.
     
@@ -201,10 +466,16 @@ class FactureDetailView(DetailView):
         - Informations client intégrées
         - Montants détaillés (HT, TVA, TTC)
         - Actions d'édition et suppression
+        - Client et catégorie chargés dans la même requête (profil pour_detail)
     """
     model = Facture
+    queryset = Facture.objects.pour_detail()
     template_name = 'django_exo_1/facture_detail.html'
     context_object_name = 'facture'
+    
+    def dates_modification(self):
+        """La page affiche aussi les coordonnées du client."""
+        return [self.object.date_modification, self.object.client.date_modification]
 
 
 class FactureUpdateView(UpdateView):
@@ -358,12 +629,14 @@ class ClientCreateView(CreateView):
         return super().form_invalid(form)
 
 
-class ClientListView(ListView):
+class ClientListView(ListeConditionnelleMixin, ListView):
     """
     Vue basée sur classe pour lister et filtrer les clients.
     
     Affiche une liste paginée des clients avec options de filtrage
-    et de recherche. Utilise prefetch_related pour optimiser les requêtes.
+    et de recherche. Les agrégats par client (nombre de factures, CA payé,
+    encours, date de la dernière facture) proviennent des compteurs
+    dénormalisés et sont lus dans la même requête que la page.
     
     Attributs:
         model: Modèle Client
@@ -375,29 +648,31 @@ class ClientListView(ListView):
         - Par type de client (particulier, entreprise, association, administration)
         - Par statut actif/inactif
         - Recherche textuelle (nom, email, ville)
+        - Tri par nom ou par agrégat (paramètre tri, voir ClientQuerySet.TRIS)
         
     Optimisations:
-        - prefetch_related pour charger les factures liées
-        - Pagination automatique
+        - Compteurs de factures dénormalisés (aucune requête par ligne, tri indexé)
+        - Pagination automatique, nombre total en cache ou estimé (PaginatorCompteCache)
         - Tri alphabétique par nom
+        - GET conditionnel : réponse 304 si la liste filtrée n'a pas changé
     """
     model = Client
     template_name = 'django_exo_1/client_list.html'
     context_object_name = 'clients'
     paginate_by = 15
+    paginator_class = pagination.PaginatorCompteCache
     
     def get_queryset(self):
         """
         Construction du queryset avec filtres et optimisations.
         
-        Applique les filtres basés sur les paramètres GET et optimise
-        les requêtes avec prefetch_related pour les factures.
+        Applique les filtres basés sur les paramètres GET.
         
         Returns:
-            QuerySet: Clients filtrés et optimisés, triés par nom
+            QuerySet: Clients filtrés et optimisés, triés selon le paramètre tri
         """
-        # Optimisation : précharge les factures liées pour éviter les requêtes N+1
-        queryset = Client.objects.prefetch_related('factures')
+        # Les compteurs de factures sont dénormalisés sur Client : aucun préchargement nécessaire
+        queryset = Client.objects.all()
         
         # Filtrage par type de client
         type_client = self.request.GET.get('type_client')
@@ -418,7 +693,12 @@ class ClientListView(ListView):
                 models.Q(ville__icontains=search)
             )
         
-        return queryset.order_by('nom')
+        return queryset.trier(self.tri())
+    
+    def tri(self):
+        """Tri demandé, 'nom' par défaut ou si la valeur est inconnue."""
+        tri = self.request.GET.get('tri')
+        return tri if tri in ClientQuerySet.TRIS else 'nom'
     
     def get_context_data(self, **kwargs):
         """
@@ -434,10 +714,25 @@ class ClientListView(ListView):
         """
         context = super().get_context_data(**kwargs)
         context['types_client'] = Client.TYPE_CHOICES
+        context['tri'] = self.tri()
+        # Paramètres courants sans tri ni page, pour les liens de tri des colonnes
+        parametres = self.request.GET.copy()
+        parametres.pop('tri', None)
+        parametres.pop('page', None)
+        context['parametres_sans_tri'] = parametres.urlencode()
         return context
 
 
-class ClientDetailView(DetailView):
+def _date_parametre(valeur):
+    """Convertit un paramètre GET AAAA-MM-JJ en date (None si absent ou invalide)."""
+    from django.utils.dateparse import parse_date
+    try:
+        return parse_date(valeur) if valeur else None
+    except ValueError:
+        return None
+
+
+class ClientDetailView(DetailConditionnelMixin, DetailView):
     """
     Vue basée sur classe pour afficher le détail d'un client avec ses statistiques.
     
@@ -451,7 +746,8 @@ class ClientDetailView(DetailView):
         
     Fonctionnalités:
         - Affichage complet des informations client
-        - Liste des factures du client
+        - Liste des factures du client, paginée par curseur et filtrable
+          par statut et date d'émission
         - Statistiques commerciales (CA, nombre de factures)
         - Actions d'édition et suppression
     """
@@ -459,12 +755,43 @@ class ClientDetailView(DetailView):
     template_name = 'django_exo_1/client_detail.html'
     context_object_name = 'client'
     
+    # Taille de la page de factures et tri par curseur (index facture_client_curseur_idx)
+    factures_par_page = 10
+    champs_curseur = ('date_emission', 'numero', 'id')
+    
+    def parties_etag(self):
+        """Les compteurs dénormalisés changent avec les factures du client."""
+        client = self.object
+        return (client.nb_factures, client.ca_paye, client.encours, client.derniere_facture)
+    
+    def get_factures(self):
+        """
+        Factures du client filtrées selon les paramètres GET.
+        
+        Paramètres GET:
+            statut: Statut des factures
+            du, au: Bornes de la date d'émission (AAAA-MM-JJ, ignorées si invalides)
+        """
+        factures = self.object.factures.only('numero', 'date_emission', 'montant_ttc', 'statut', 'client')
+        statut = self.request.GET.get('statut')
+        if statut:
+            factures = factures.filter(statut=statut)
+        du = _date_parametre(self.request.GET.get('du'))
+        if du:
+            factures = factures.filter(date_emission__gte=du)
+        au = _date_parametre(self.request.GET.get('au'))
+        if au:
+            factures = factures.filter(date_emission__lte=au)
+        return factures
+    
     def get_context_data(self, **kwargs):
         """
         Enrichissement du contexte avec les factures et statistiques du client.
         
-        Calcule les statistiques commerciales du client et récupère
-        ses factures triées par date d'émission décroissante.
+        Le client n'est lu qu'une fois (self.object). Les statistiques sont
+        calculées en une seule requête agrégée et les factures sont paginées
+        par curseur : la page coûte le même nombre de requêtes et de lignes
+        quel que soit le nombre de factures du client.
         
         Args:
             **kwargs: Arguments du contexte parent
@@ -473,21 +800,32 @@ class ClientDetailView(DetailView):
             dict: Contexte enrichi avec factures et statistiques
         """
         context = super().get_context_data(**kwargs)
-        # Récupération du client et de ses factures optimisées
-        client = self.get_object()
-        factures = client.factures.select_related('categorie').order_by('-date_emission')
-        
-        # Calcul des statistiques commerciales du client
-        from django.db.models import Sum, Count
-        stats = client.factures.aggregate(
-            total_factures=Count('id'),
-            ca_total=Sum('montant_ttc', filter=models.Q(statut='payee')),
-            factures_payees=Count('id', filter=models.Q(statut='payee')),
-            factures_en_attente=Count('id', filter=models.Q(statut='envoyee')),
-        )
+        client = self.object
+        
+        # Calcul des statistiques commerciales du client (une seule requête agrégée)
+        stats_client = Facture.objects.statistiques(client=client)
+        stats = {
+            'total_factures': stats_client['total'],
+            'ca_total': stats_client['chiffre_affaires'],
+            'factures_payees': stats_client['payees'],
+            'factures_en_attente': stats_client['en_attente'],
+        }
+        
+        # Page de factures (factures_par_page + 1 lignes lues au plus)
+        try:
+            page = pagination.paginer_requete(
+                self.request, self.get_factures(), self.champs_curseur, self.factures_par_page
+            )
+        except pagination.CurseurInvalide:
+            raise Http404("Curseur de pagination invalide")
         
-        context['factures'] = factures
+        context['factures'] = page.object_list
+        context['page_factures'] = page
         context['stats'] = stats
+        context['statuts'] = Facture.STATUT_CHOICES
+        context['filtres_factures'] = any(
+            self.request.GET.get(cle) for cle in ('statut', 'du', 'au')
+        )
         return context
 
 
@@ -652,6 +990,38 @@ class CategorieListView(ListView):
 # API ET VUES UTILITAIRES
 # ==========================================
 
+# Champs exposés par client_list_json (?fields=), adresse_complete est calculé
+CHAMPS_CLIENT_JSON = (
+    'id', 'nom', 'type_client', 'email', 'telephone', 'adresse', 'code_postal',
+    'ville', 'pays', 'siret', 'numero_tva', 'date_modification', 'adresse_complete',
+)
+CHAMPS_CLIENT_JSON_DEFAUT = ('id', 'nom', 'email', 'adresse_complete')
+CHAMPS_ADRESSE_COMPLETE = ('adresse', 'code_postal', 'ville', 'pays')
+
+# Nombre de clients lus par aller-retour avec la base et écrits par morceau
+TAILLE_LOT_JSON = 500
+
+
+def _instant_parametre(valeur):
+    """
+    Convertit un paramètre GET date ou date-heure ISO en datetime aware.
+    
+    Raises:
+        ValueError: Si la valeur n'est pas une date valide
+    """
+    from datetime import datetime, time
+    from django.utils.dateparse import parse_date, parse_datetime
+    instant = parse_datetime(valeur)
+    if instant is None:
+        jour = parse_date(valeur)
+        if jour is None:
+            raise ValueError(valeur)
+        instant = datetime.combine(jour, time.min)
+    if timezone.is_naive(instant):
+        instant = timezone.make_aware(instant)
+    return instant
+
+
 def client_list_json(request):
     """
     Vue API pour récupérer la liste des clients actifs au format JSON.
@@ -659,11 +1029,23 @@ def client_list_json(request):
     Utilisée pour les fonctionnalités AJAX, notamment pour le pré-remplissage
     automatique des informations client dans les formulaires de facture.
     
+    Le tableau JSON est écrit au fur et à mesure (StreamingHttpResponse) :
+    les clients sont lus par lots sous forme de tuples (iterator), la
+    mémoire utilisée ne dépend pas du nombre de clients.
+    
     Args:
         request (HttpRequest): Requête HTTP (généralement AJAX)
         
+    Paramètres GET:
+        fields: Champs à inclure, séparés par des virgules (défaut :
+                id,nom,email,adresse_complete ; voir CHAMPS_CLIENT_JSON)
+        since: Date ou date-heure ISO, ne renvoie que les clients modifiés
+               depuis (date_modification >= since)
+        
     Returns:
-        JsonResponse: Liste des clients actifs avec leurs informations formatées
+        StreamingHttpResponse: Liste des clients actifs triés par id,
+        JsonResponse 400 si un paramètre est invalide, ou 304 si la liste
+        n'a pas changé depuis l'ETag / la date envoyés par le client
         
     Format de réponse:
         [
@@ -680,75 +1062,369 @@ def client_list_json(request):
         - Pré-remplissage des formulaires
         - Sélection dynamique de clients
         - Intégration avec JavaScript côté client
+        - Synchronisation incrémentale (?since=)
+    """
+    from django.core.serializers.json import DjangoJSONEncoder
+    
+    champs = CHAMPS_CLIENT_JSON_DEFAUT
+    if request.GET.get('fields'):
+        champs = tuple(dict.fromkeys(c.strip() for c in request.GET['fields'].split(',') if c.strip()))
+        inconnus = [c for c in champs if c not in CHAMPS_CLIENT_JSON]
+        if inconnus or not champs:
+            return JsonResponse({'erreur': f"Champs inconnus : {', '.join(inconnus)}"}, status=400)
+    
+    clients = Client.objects.filter(est_actif=True)
+    if request.GET.get('since'):
+        try:
+            clients = clients.filter(date_modification__gte=_instant_parametre(request.GET['since']))
+        except ValueError:
+            return JsonResponse({'erreur': "Paramètre since invalide (date ISO attendue)."}, status=400)
+    
+    # Colonnes lues : champs demandés, plus ceux de l'adresse complète si besoin
+    colonnes = [c for c in champs if c != 'adresse_complete']
+    if 'adresse_complete' in champs:
+        colonnes += [c for c in CHAMPS_ADRESSE_COMPLETE if c not in colonnes]
+    index = {colonne: i for i, colonne in enumerate(colonnes)}
+    lignes_clients = clients.order_by('id').values_list(*colonnes).iterator(chunk_size=TAILLE_LOT_JSON)
+    encodeur = DjangoJSONEncoder(ensure_ascii=False)
+    
+    def objet(ligne):
+        donnees = {}
+        for champ in champs:
+            if champ == 'adresse_complete':
+                adresse, code_postal, ville, pays = (ligne[index[c]] for c in CHAMPS_ADRESSE_COMPLETE)
+                donnees[champ] = f"{adresse}\n{code_postal} {ville}\n{pays}"
+            else:
+                donnees[champ] = ligne[index[champ]]
+        return encodeur.encode(donnees)
+    
+    def morceaux():
+        # Un morceau par lot : '[' + objets séparés par des virgules + ']'
+        separateur = '['
+        lot = []
+        for ligne in lignes_clients:
+            lot.append(objet(ligne))
+            if len(lot) == TAILLE_LOT_JSON:
+                yield separateur + ','.join(lot)
+                separateur, lot = ',', []
+        if lot:
+            yield separateur + ','.join(lot)
+            separateur = ','
+        yield '[]' if separateur == '[' else ']'
+    
+    def reponse(request):
+        return StreamingHttpResponse(morceaux(), content_type='application/json')
+    
+    # Réponse 304 sans lire ni sérialiser les clients si l'ensemble est inchangé
+    empreinte = _empreinte_ensemble(clients)
+    return condition(
+        etag_func=lambda request: _etag(request, empreinte),
+        last_modified_func=lambda request: empreinte[0] if empreinte else None,
+    )(reponse)(request)
+
+
+def client_autocompletion(request):
+    """
+    Vue API d'autocomplétion des clients (nom, email, ville).
+    
+    Servie par l'index en mémoire du processus (voir autocompletion.py) :
+    aucune requête SQL une fois l'index construit.
+    
+    Paramètres GET:
+        q: Saisie de l'utilisateur
+        limite: Nombre maximum de résultats (10 par défaut, 50 au plus)
+        tous: '1' pour inclure les clients inactifs
+        
+    Returns:
+        JsonResponse: {"resultats": [{"id", "nom", "email", "ville"}, ...]}
     """
-    # Récupération des clients actifs avec les champs nécessaires
-    clients = Client.objects.filter(est_actif=True).values(
-        'id', 'nom', 'email', 'adresse', 'code_postal', 'ville', 'pays'
+    try:
+        limite = int(request.GET.get('limite', autocompletion.LIMITE))
+    except ValueError:
+        limite = autocompletion.LIMITE
+    limite = max(1, min(limite, autocompletion.LIMITE_MAX))
+    resultats = autocompletion.rechercher(
+        request.GET.get('q', ''),
+        limite=limite,
+        actifs_seulement=request.GET.get('tous') != '1',
     )
+    return JsonResponse({'resultats': resultats})
+
+
+def facture_facettes_json(request):
+    """
+    Vue API des facettes de la liste des factures, pour rafraîchir les
+    compteurs des filtres sans recharger la page.
     
-    # Formatage des données pour l'API
-    clients_data = []
-    for client in clients:
-        clients_data.append({
-            'id': client['id'],
-            'nom': client['nom'],
-            'email': client['email'],
-            'adresse_complete': f"{client['adresse']}\n{client['code_postal']} {client['ville']}\n{client['pays']}"
-        })
+    Accepte les mêmes paramètres GET que la liste (statut, categorie,
+    client, search).
     
-    return JsonResponse(clients_data, safe=False)
+    Returns:
+        JsonResponse: {"total", "statuts": [{"valeur", "libelle", "nombre"}],
+        "categories": [{"id", "nombre"}], "clients": [{"id", "nom", "nombre"}]} ;
+        400 si categorie ou client n'est pas un identifiant entier
+    """
+    invalide = _identifiant_invalide(request.GET)
+    if invalide:
+        return JsonResponse({'erreur': f"{invalide} : identifiant entier attendu"}, status=400)
+    facettes = _facettes_factures(request.GET)
+    return JsonResponse({
+        'total': facettes['total'],
+        'statuts': [
+            {'valeur': valeur, 'libelle': libelle, 'nombre': facettes['statuts'].get(valeur, 0)}
+            for valeur, libelle in Facture.STATUT_CHOICES
+        ],
+        'categories': [
+            {'id': categorie_id, 'nombre': nombre}
+            for categorie_id, nombre in sorted(facettes['categories'].items())
+        ],
+        'clients': facettes['clients'],
+    })
+
+
+# Nombre maximum de factures par requête d'import (réglage FACTURES_IMPORT_MAX)
+IMPORT_MAX = 10000
+
+# Taille maximale du corps d'une requête d'import, en octets
+# (réglage FACTURES_IMPORT_TAILLE_MAX)
+IMPORT_TAILLE_MAX = 20 * 1024 * 1024
+
+
+@csrf_exempt
+@require_POST
+def facture_import_json(request):
+    """
+    Vue API d'import en masse de factures (voir ingestion.py).
+    
+    Corps de la requête (Content-Type: application/json) :
+        {"factures": [{"numero", "date_emission", "date_echeance", "client",
+                       "montant_ht", "taux_tva", "categorie", "statut",
+                       "description", "notes"}, ...],
+         "atomique": false}
+    
+    Les factures valides sont créées en une transaction ; les erreurs sont
+    renvoyées élément par élément. Avec "atomique": true, rien n'est créé
+    si un élément est invalide.
+    
+    Le type de contenu JSON est exigé : un formulaire d'un autre site ne
+    peut pas l'envoyer sans requête préalable CORS, d'où l'exemption CSRF
+    pour les clients machine (ERP).
+    
+    Returns:
+        JsonResponse: {"creees": [{"index", "id", "numero"}], "erreurs":
+        [{"index", "numero", "erreurs": {champ: message}}]} ; 201 si des
+        factures ont été créées, 400 sinon, 413 si le corps dépasse
+        FACTURES_IMPORT_TAILLE_MAX octets, 409 si un numéro a été créé
+        entre-temps par une autre requête
+    """
+    from django.db import IntegrityError
+    from . import ingestion
+    
+    if request.content_type != 'application/json':
+        return JsonResponse({'erreur': "Content-Type application/json attendu."}, status=415)
+    
+    # Lecture du flux bornée avant l'analyse : la limite de taille
+    # DATA_UPLOAD_MAX_MEMORY_SIZE de request.body, trop basse pour un lot,
+    # est remplacée par FACTURES_IMPORT_TAILLE_MAX
+    taille_max = getattr(settings, 'FACTURES_IMPORT_TAILLE_MAX', IMPORT_TAILLE_MAX)
+    erreur_taille = JsonResponse({'erreur': f"Corps de requête limité à {taille_max} octets."}, status=413)
+    try:
+        longueur = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        longueur = 0
+    if longueur > taille_max:
+        return erreur_taille
+    corps = request.read(taille_max + 1)
+    if len(corps) > taille_max:
+        return erreur_taille
+    try:
+        donnees = json.loads(corps)
+    except ValueError:
+        return JsonResponse({'erreur': "JSON invalide."}, status=400)
+    factures = donnees.get('factures') if isinstance(donnees, dict) else None
+    if not isinstance(factures, list):
+        return JsonResponse({'erreur': "Liste 'factures' attendue."}, status=400)
+    maximum = getattr(settings, 'FACTURES_IMPORT_MAX', IMPORT_MAX)
+    if len(factures) > maximum:
+        return JsonResponse({'erreur': f"Au plus {maximum} factures par requête."}, status=400)
+    
+    try:
+        resultat = ingestion.importer(factures, atomique=bool(donnees.get('atomique')))
+    except IntegrityError:
+        # Numéro inséré par une requête concurrente après la validation :
+        # le lot est annulé avec sa transaction et peut être renvoyé
+        return JsonResponse(
+            {'erreur': "Conflit avec un import concurrent (numéro déjà utilisé), aucune facture créée."},
+            status=409
+        )
+    return JsonResponse(resultat, status=201 if resultat['creees'] else 400)
 
 
 def facture_bulk_action(request):
     """
     Vue pour traiter les actions de lot sur les factures.
     
-    Permet d'effectuer des actions sur plusieurs factures sélectionnées :
-    - Marquer comme payées
-    - Autres actions possibles à l'avenir
+    Actions : marquer comme envoyées, payées, annuler, changer de catégorie,
+    changer l'échéance, supprimer les brouillons, exporter. Elles portent sur
+    les factures cochées, ou (portee=filtres) sur toutes les factures
+    correspondant aux filtres de la liste, transmis dans la query string.
+    
+    Les factures sont traitées par UPDATE (ou DELETE) ensemblistes, par
+    tranches d'identifiants : chaque tranche est une transaction courte.
+    Les factures qui ne peuvent pas subir l'action (transition de statut
+    interdite) sont écartées par la clause WHERE (voir taches.py).
+    
+    Au-delà de FACTURES_ACTIONS_SEUIL_TACHE factures, l'action est confiée
+    au worker (tâche de lot) et l'utilisateur est redirigé vers son suivi.
     
     Args:
-        request (HttpRequest): Requête HTTP POST avec les factures sélectionnées
+        request (HttpRequest): Requête HTTP POST (action, selected_factures,
+                               portee, categorie, date_echeance)
         
     Returns:
-        HttpResponse: Redirection vers la liste des factures avec message
+        HttpResponse: Redirection vers la liste des factures (mêmes filtres)
+        avec le nombre de factures traitées par statut, export CSV, ou
+        redirection vers le suivi de la tâche créée
     """
-    if request.method == 'POST':
-        action = request.POST.get('action')
-        selected_factures = request.POST.getlist('selected_factures')
-        
+    from . import taches
+    
+    liste = reverse('django_exo_1:facture_list')
+    if request.GET:
+        liste = f'{liste}?{request.GET.urlencode()}'
+    if request.method != 'POST':
+        return redirect(liste)
+    
+    action = request.POST.get('action')
+    if request.POST.get('portee') == 'filtres':
+        invalide = _identifiant_invalide(request.GET)
+        if invalide:
+            return HttpResponseBadRequest(f"{invalide} : identifiant entier attendu")
+        factures = _filtrer_factures(Facture.objects.all(), request.GET)
+    else:
+        selected_factures = [pk for pk in request.POST.getlist('selected_factures') if pk.isdigit()]
         if not selected_factures:
             messages.error(request, 'Aucune facture sélectionnée.')
-            return redirect('django_exo_1:facture_list')
+            return redirect(liste)
+        factures = Facture.objects.filter(id__in=selected_factures)
+    
+    try:
+        factures, valeurs = taches.preparer_action(action, factures, request.POST)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect(liste)
+    
+    seuil = taches.seuil_tache()
+    if factures.order_by()[seuil:seuil + 1].exists():
+        parametres = {
+            cle: request.POST[cle] for cle in taches.PARAMETRES_ACTIONS if cle in request.POST
+        }
+        tache = taches.creer_tache(action, factures, parametres)
+        messages.info(
+            request,
+            f'{tache.nb_factures} facture(s) à traiter : l\'action se poursuit en arrière-plan.'
+        )
+        return redirect('django_exo_1:tache_detail', pk=tache.pk)
+    
+    if action == 'export':
+        return _reponse_export_csv(factures, 'factures_selection.csv')
+    
+    nombres = taches.appliquer_par_tranches(action, factures, valeurs)
+    total = sum(nombres.values())
+    if total:
+        messages.success(
+            request,
+            f'{total} facture(s) {taches.LIBELLES_ACTIONS[action]} avec succès '
+            f'({_detail_par_statut(nombres)}).'
+        )
+    else:
+        messages.warning(request, 'Aucune facture sélectionnée ne pouvait être traitée par cette action.')
+    return redirect(liste)
+
+
+def _detail_par_statut(nombres):
+    """Texte « brouillon : 2, envoyée : 1 » d'un dict {statut: nombre}."""
+    return ', '.join(
+        f'{libelle.lower()} : {nombres[statut]}'
+        for statut, libelle in Facture.STATUT_CHOICES if statut in nombres
+    )
+
+
+class TacheLotDetailView(DetailView):
+    """
+    Vue de suivi d'une tâche de lot (actualisée par tache_progression).
+    
+    Attributs:
+        model: Modèle TacheLot
+        template_name: Template de suivi
+        context_object_name: Nom de la variable dans le template
+    """
+    model = TacheLot
+    template_name = 'django_exo_1/tache_detail.html'
+    context_object_name = 'tache'
+    
+    def get_context_data(self, **kwargs):
+        """
+        Ajoute l'avancement et le libellé de l'action au contexte.
         
-        if action == 'mark_paid':
-            # Récupérer les factures sélectionnées qui ne sont pas déjà payées
-            factures = Facture.objects.filter(
-                id__in=selected_factures
-            ).non_payees()
-            
-            if not factures.exists():
-                messages.warning(request, 'Toutes les factures sélectionnées sont déjà payées.')
-                return redirect('django_exo_1:facture_list')
-            
-            # Mettre à jour le statut
-            updated_count = factures.update(statut='payee')
-            
-            if updated_count > 0:
-                messages.success(
-                    request, 
-                    f'{updated_count} facture(s) marquée(s) comme payée(s) avec succès!'
-                )
-            else:
-                messages.warning(request, 'Aucune facture n\'a pu être mise à jour.')
+        Returns:
+            dict: Contexte enrichi
+        """
+        from . import taches
         
-        else:
-            messages.error(request, 'Action non reconnue.')
+        context = super().get_context_data(**kwargs)
+        context['progression'] = self.object.progression()
+        context['libelle_action'] = taches.LIBELLES_ACTIONS.get(self.object.action, self.object.action)
+        return context
+
+
+def tache_progression(request, pk):
+    """
+    Vue API d'avancement d'une tâche de lot (interrogée périodiquement).
+    
+    Returns:
+        JsonResponse: statut, erreur, nb_factures, nb_tranches,
+        tranches_traitees, pourcentage, nombres ({statut: nombre de factures
+        traitées}), export (URL du fichier une fois un export terminé)
+    """
+    tache = get_object_or_404(TacheLot, pk=pk)
+    donnees = {
+        'id': tache.pk,
+        'action': tache.action,
+        'statut': tache.statut,
+        'erreur': tache.erreur,
+        'nb_factures': tache.nb_factures,
+        'nb_tranches': tache.nb_tranches,
+        **tache.progression(),
+        'export': None,
+    }
+    if tache.action == 'export' and tache.statut == 'terminee':
+        donnees['export'] = reverse('django_exo_1:tache_export_csv', args=[tache.pk])
+    response = JsonResponse(donnees)
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def tache_export_csv(request, pk):
+    """
+    Téléchargement du fichier CSV produit par une tâche d'export terminée.
+    
+    Les lignes de chaque tranche sont envoyées dans l'ordre des tranches
+    (StreamingHttpResponse), sans charger tout le fichier en mémoire.
+    """
+    tache = get_object_or_404(TacheLot, pk=pk, action='export', statut='terminee')
+    writer = csv.writer(_Tampon(), delimiter=';')
+    contenus = tache.tranches.order_by('position').values_list('contenu', flat=True)
     
-    return redirect('django_exo_1:facture_list')
+    def lignes():
+        yield writer.writerow(LigneExportFacture.ENTETES_CSV)
+        yield from contenus.iterator(chunk_size=10)
+    
+    response = StreamingHttpResponse(lignes(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="factures_tache_{tache.pk}.csv"'
+    return response
 
 
-class LogCreationFactureListView(ListView):
+class LogCreationFactureListView(ListeConditionnelleMixin, ListView):
     """
     Vue pour afficher la liste des logs de création de factures.
     
@@ -766,7 +1442,9 @@ class LogCreationFactureListView(ListView):
     template_name = 'django_exo_1/log_creation_list.html'
     context_object_name = 'logs'
     paginate_by = 20
+    paginator_class = pagination.PaginatorCompteCache
     ordering = ['-date_creation']
+    champ_modification = 'date_creation'
     
     def get_context_data(self, **kwargs):
         """
@@ -777,51 +1455,340 @@ class LogCreationFactureListView(ListView):
         """
         context = super().get_context_data(**kwargs)
         
-        # Statistiques sur les logs
-        total_logs = LogCreationFacture.objects.count()
-        logs_today = LogCreationFacture.objects.aujourd_hui().count()
+        # Statistiques sur les logs (le total est celui du paginator, en cache)
+        logs_today = cache.obtenir(
+            'logs_aujourd_hui', LogCreationFacture.objects.aujourd_hui().count, timezone.now().date()
+        )
         
         context.update({
-            'total_logs': total_logs,
+            'total_logs': context['paginator'].libelle_compte,
             'logs_today': logs_today,
         })
         
         return context
 
 
-def dashboard_statistics(request):
+# Nombre de lignes affichées par section du dashboard (surchargeable par
+# le réglage FACTURES_DASHBOARD_LIMITES)
+DASHBOARD_LIMITES = {
+    'en_retard': 5,
+    'echeance_proche': 5,
+    'top_clients': 5,
+}
+
+
+def _dashboard_limites():
+    """Retourne les limites de lignes des sections du dashboard."""
+    return {**DASHBOARD_LIMITES, **getattr(settings, 'FACTURES_DASHBOARD_LIMITES', {})}
+
+
+def _section_bornee(queryset, limite, total=None):
+    """
+    Construit une section de liste bornée du dashboard.
+    
+    Seules les `limite` premières lignes sont chargées ; le nombre total
+    provient d'un COUNT séparé (ou de `total` s'il est déjà connu).
+    
+    Returns:
+        dict: factures (liste), total, autres (lignes non affichées)
+    """
+    factures = list(queryset[:limite])
+    if total is None:
+        total = len(factures) if len(factures) < limite else queryset.count()
+    return {'factures': factures, 'total': total, 'autres': total - len(factures)}
+
+
+async def dashboard_statistics(request):
     """
     Vue pour afficher un dashboard détaillé avec les managers personnalisés.
     
     Démontre l'utilisation des managers et QuerySets pour simplifier le code.
+    Les listes de factures sont bornées (top N + nombre total) pour que le coût
+    de la page ne dépende pas du volume de factures en retard.
+    
+    Vue asynchrone : sous ASGI, les sections indépendantes sont calculées en
+    parallèle dans un pool de threads borné (voir sections.py) ; sous WSGI,
+    elles sont calculées séquentiellement.
+    """
+    limites = _dashboard_limites()
+    
+    context = await sections.calculer(request, {
+        # Utilisation des managers personnalisés (lecture depuis les agrégats journaliers)
+        # Les sections coûteuses sont servies par le cache versionné (voir cache.py)
+        'stats': _statistiques_du_jour,
+        
+        # Factures à échéance proche (7 jours), les plus urgentes d'abord
+        'factures_echeance_proche': lambda: _section_bornee(
+            Facture.objects.echeance_proche(7).pour_dashboard().order_by('date_echeance', 'pk'),
+            limites['echeance_proche']
+        ),
+        
+        # Factures en retard, les plus anciennes d'abord
+        'factures_en_retard': lambda: _section_bornee(
+            Facture.objects.echeance_passee().pour_dashboard().order_by('date_echeance', 'pk'),
+            limites['en_retard']
+        ),
+        
+        # Top des clients (par nombre de factures), lu sur l'index des compteurs dénormalisés
+        'top_clients': lambda: cache.obtenir(
+            'top_clients',
+            lambda: list(Client.objects.classement('nb_factures', limites['top_clients'])),
+            limites['top_clients']
+        ),
+        
+        # Chiffre d'affaires par catégorie
+        'ca_par_categorie': lambda: cache.obtenir(
+            'ca_par_categorie', lambda: list(StatistiqueJournaliere.objects.ca_par_categorie())
+        ),
+        
+        'cache_compteurs': cache.compteurs,
+    })
+    context['limites'] = limites
+    
+    return await sync_to_async(render)(request, 'django_exo_1/dashboard.html', context)
+
+
+def _montant_json(valeur):
+    """Formate un montant (éventuellement None) en chaîne à deux décimales."""
+    from decimal import Decimal
+    return str(Decimal(valeur or 0).quantize(Decimal('0.01')))
+
+
+def serie_chiffre_affaires(request):
+    """
+    API JSON : montants facturés, payés et en attente par période.
+    
+    Les montants sont regroupés par la base de données (troncature de la date
+    d'émission et GROUP BY). Sans filtre client, la série est lue sur les
+    agrégats journaliers. Les périodes closes sont mises en cache séparément
+    de la période en cours, seule recalculée après une écriture récente.
+    
+    Paramètres GET:
+        debut (YYYY-MM-DD): Début de la période (défaut: un an avant fin)
+        fin (YYYY-MM-DD): Fin de la période (défaut: aujourd'hui)
+        granularite: jour, semaine, mois (défaut) ou annee
+        categorie: Identifiant de catégorie (optionnel)
+        client: Identifiant de client (optionnel)
+        
+    Returns:
+        JsonResponse: {granularite, debut, fin, series: [{periode, facture, paye, en_attente}]}
+        ou une erreur 400 si les paramètres sont invalides
+    """
+    from datetime import timedelta
+    from django.utils.dateparse import parse_date
+    from .models import GRANULARITES, debut_periode
+    
+    granularite = request.GET.get('granularite', 'mois')
+    if granularite not in GRANULARITES:
+        return JsonResponse({'erreur': f"Granularité inconnue : {granularite}"}, status=400)
+    
+    try:
+        fin = parse_date(request.GET['fin']) if request.GET.get('fin') else timezone.now().date()
+        debut = parse_date(request.GET['debut']) if request.GET.get('debut') else fin - timedelta(days=365)
+        categorie = int(request.GET['categorie']) if request.GET.get('categorie') else None
+        client = int(request.GET['client']) if request.GET.get('client') else None
+    except ValueError:
+        debut = fin = None
+    if debut is None or fin is None or debut > fin:
+        return JsonResponse({'erreur': "Paramètres de période ou de filtre invalides."}, status=400)
+    
+    def calculer(date_debut, date_fin):
+        if client is None:
+            queryset = StatistiqueJournaliere.objects.par_periode(date_debut, date_fin)
+        else:
+            queryset = Facture.objects.par_client(client).par_periode(date_debut, date_fin)
+        if categorie is not None:
+            queryset = queryset.filter(categorie_id=categorie)
+        return queryset.serie(granularite)
+    
+    # Découpage : périodes closes (cache historique) / période en cours (cache courant)
+    debut_courant = debut_periode(timezone.now().date(), granularite)
+    lignes = []
+    if debut < debut_courant:
+        fin_passee = min(fin, debut_courant - timedelta(days=1))
+        lignes += cache.obtenir_historique(
+            granularite, 'serie', lambda: calculer(debut, fin_passee),
+            debut, fin_passee, categorie, client
+        )
+    if fin >= debut_courant:
+        debut_present = max(debut, debut_courant)
+        lignes += cache.obtenir(
+            'serie', lambda: calculer(debut_present, fin),
+            granularite, debut_present, fin, categorie, client
+        )
+    
+    series = [
+        {
+            'periode': ligne['periode'].isoformat(),
+            'facture': _montant_json(ligne['facture']),
+            'paye': _montant_json(ligne['paye']),
+            'en_attente': _montant_json(ligne['en_attente']),
+        }
+        for ligne in lignes
+    ]
+    return JsonResponse({
+        'granularite': granularite,
+        'debut': debut.isoformat(),
+        'fin': fin.isoformat(),
+        'series': series,
+    })
+
+
+# ==========================================
+# BALANCE ÂGÉE DES CRÉANCES
+# ==========================================
+
+def _cles_tranches():
+    """Retourne les clés des tranches de retard de la balance âgée."""
+    return [cle for cle, *_ in FactureQuerySet.TRANCHES_RETARD]
+
+
+def _balance_agee_lignes(par):
+    """Retourne les lignes de la balance âgée sérialisables (montants en chaînes)."""
+    cles = ['total'] + _cles_tranches()
+    for ligne in Facture.objects.all().balance_agee(par).iterator():
+        yield {
+            'id': ligne['groupe_id'],
+            'nom': ligne['groupe_nom'],
+            'nb_factures': ligne['nb_factures'],
+            **{cle: _montant_json(ligne[cle]) for cle in cles},
+        }
+
+
+def _balance_agee_regroupement(request):
+    """Lit le paramètre GET 'par' (client par défaut), None s'il est invalide."""
+    par = request.GET.get('par', 'client')
+    return par if par in FactureQuerySet.REGROUPEMENTS_BALANCE else None
+
+
+def balance_agee(request):
     """
-    # Utilisation des managers personnalisés
-    stats = Facture.objects.statistiques()
+    Vue de la balance âgée : encours en retard par client et par catégorie.
     
-    # Factures à échéance proche (7 jours)
-    factures_echeance_proche = Facture.objects.echeance_proche(7).avec_relations()
+    Chaque tableau provient d'une seule requête groupée
+    (FactureQuerySet.balance_agee), sans charger les factures.
     
-    # Factures en retard
-    factures_en_retard = Facture.objects.echeance_passee().avec_relations()
+    Template utilisé:
+        django_exo_1/balance_agee.html
+    """
+    cles = _cles_tranches()
     
-    # Top 5 des clients (par nombre de factures)
-    from django.db.models import Count
-    top_clients = Client.objects.annotate(
-        nb_factures=Count('factures')
-    ).order_by('-nb_factures')[:5]
+    def tableau(par):
+        return [
+            dict(ligne, montants=[ligne[cle] for cle in cles])
+            for ligne in Facture.objects.all().balance_agee(par)
+        ]
     
-    # Chiffre d'affaires par catégorie
-    from django.db.models import Sum
-    ca_par_categorie = CategorieFacture.objects.annotate(
-        ca=Sum('facture__montant_ttc', filter=models.Q(facture__statut='payee'))
-    ).exclude(ca__isnull=True).order_by('-ca')
+    par_client = tableau('client')
+    par_categorie = tableau('categorie')
+    
+    # Totaux généraux calculés sur les lignes groupées (une ligne par catégorie)
+    totaux = {
+        'nb_factures': sum(ligne['nb_factures'] for ligne in par_categorie),
+        'total': sum(ligne['total'] for ligne in par_categorie),
+        'tranches': [
+            (libelle, sum(ligne[cle] for ligne in par_categorie))
+            for cle, libelle, *_ in FactureQuerySet.TRANCHES_RETARD
+        ],
+    }
     
     context = {
-        'stats': stats,
-        'factures_echeance_proche': factures_echeance_proche,
-        'factures_en_retard': factures_en_retard,
-        'top_clients': top_clients,
-        'ca_par_categorie': ca_par_categorie,
+        'tranches': FactureQuerySet.TRANCHES_RETARD,
+        'par_client': par_client,
+        'par_categorie': par_categorie,
+        'totaux': totaux,
     }
+    return render(request, 'django_exo_1/balance_agee.html', context)
+
+
+def balance_agee_json(request):
+    """
+    API JSON de la balance âgée.
+    
+    Paramètres GET:
+        par: 'client' (défaut) ou 'categorie'
+        
+    Returns:
+        JsonResponse: {par, tranches: [{cle, libelle}], lignes: [...]}
+    """
+    par = _balance_agee_regroupement(request)
+    if par is None:
+        return JsonResponse({'erreur': "Regroupement inconnu."}, status=400)
+    return JsonResponse({
+        'par': par,
+        'tranches': [
+            {'cle': cle, 'libelle': libelle}
+            for cle, libelle, *_ in FactureQuerySet.TRANCHES_RETARD
+        ],
+        'lignes': list(_balance_agee_lignes(par)),
+    })
+
+
+class _Tampon:
+    """Pseudo-fichier dont write() renvoie la ligne au lieu de la stocker (csv.writer)."""
+    
+    def write(self, valeur):
+        return valeur
+
+
+def balance_agee_csv(request):
+    """
+    Export CSV de la balance âgée, envoyé ligne par ligne (StreamingHttpResponse).
+    
+    Paramètres GET:
+        par: 'client' (défaut) ou 'categorie'
+    """
+    par = _balance_agee_regroupement(request)
+    if par is None:
+        return JsonResponse({'erreur': "Regroupement inconnu."}, status=400)
+    
+    cles = ['id', 'nom', 'nb_factures', 'total'] + _cles_tranches()
+    entetes = ['Id', 'Nom', 'Nb factures', 'Total retard TTC'] + [
+        libelle for _cle, libelle, *_ in FactureQuerySet.TRANCHES_RETARD
+    ]
+    writer = csv.writer(_Tampon(), delimiter=';')
+    
+    def lignes():
+        yield writer.writerow(entetes)
+        for ligne in _balance_agee_lignes(par):
+            yield writer.writerow([ligne[cle] for cle in cles])
+    
+    response = StreamingHttpResponse(lignes(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="balance_agee_{par}.csv"'
+    return response
+
+
+def facture_export_csv(request):
+    """
+    Export CSV des factures, avec les mêmes filtres que la liste.
+    
+    Paramètres GET:
+        statut, categorie, client, search: comme la liste des factures
+        (400 si categorie ou client n'est pas un identifiant entier)
+    """
+    invalide = _identifiant_invalide(request.GET)
+    if invalide:
+        return HttpResponseBadRequest(f"{invalide} : identifiant entier attendu")
+    return _reponse_export_csv(_filtrer_factures(Facture.objects.all(), request.GET))
+
+
+def _reponse_export_csv(factures, nom_fichier='factures.csv'):
+    """
+    Réponse CSV d'un QuerySet de factures.
+    
+    Utilise le profil pour_export : les lignes sont lues par lots sous forme
+    de tuples et envoyées au fur et à mesure (StreamingHttpResponse), sans
+    instancier de modèle.
+    """
+    statuts = dict(Facture.STATUT_CHOICES)
+    lignes_export = factures.pour_export()
+    writer = csv.writer(_Tampon(), delimiter=';')
+    
+    def lignes():
+        yield writer.writerow(LigneExportFacture.ENTETES_CSV)
+        for ligne in lignes_export:
+            yield writer.writerow(ligne.valeurs_csv(statuts))
     
-    return render(request, 'django_exo_1/dashboard.html', context)
+    response = StreamingHttpResponse(lignes(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    return response